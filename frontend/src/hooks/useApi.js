@@ -2,6 +2,31 @@
 import { useState, useCallback } from "react";
 
 const BASE_URL = "http://localhost:6543";
+// Ukuran halaman saat mengikuti X-Next-Cursor (server membatasi dengan
+// api.page_size.max)
+const ALL_PAGES_LIMIT = 200;
+
+async function send(endpoint, options = {}) {
+  const url = `${BASE_URL}${endpoint}`;
+  const response = await fetch(url, {
+    credentials: "include",
+    ...options,
+    headers: {
+      "Content-Type": "application/json",
+      ...options.headers,
+    },
+  });
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(errorData.message || "Something went wrong");
+  }
+  return response;
+}
+
+function withParam(endpoint, key, value) {
+  const separator = endpoint.includes("?") ? "&" : "?";
+  return `${endpoint}${separator}${key}=${encodeURIComponent(value)}`;
+}
 
 function useApi() {
   const [data, setData] = useState(null);
@@ -13,19 +38,7 @@ function useApi() {
     setError(null);
     setData(null);
     try {
-      const url = `${BASE_URL}${endpoint}`;
-      const response = await fetch(url, {
-        headers: {
-          "Content-Type": "application/json",
-          ...options.headers,
-        },
-        credentials: "include",
-        ...options,
-      });
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.message || "Something went wrong");
-      }
+      const response = await send(endpoint, options);
       const result = await response.json();
       setData(result);
       return result;
@@ -37,7 +50,56 @@ function useApi() {
     }
   }, []);
 
-  return { data, loading, error, request };
+  // Satu halaman endpoint list beserta cursor halaman berikutnya
+  // (X-Next-Cursor, null di halaman terakhir) untuk tombol "muat lebih banyak"
+  const requestPage = useCallback(async (endpoint, options = {}) => {
+    setLoading(true);
+    setError(null);
+    try {
+      const response = await send(endpoint, options);
+      const items = await response.json();
+      setData(items);
+      return { items, nextCursor: response.headers.get("X-Next-Cursor") };
+    } catch (err) {
+      setError(err.message);
+      throw err;
+    } finally {
+      setLoading(false);
+    }
+  }, []);
+
+  // Endpoint list memakai keyset pagination: ikuti X-Next-Cursor sampai
+  // halaman terakhir lalu gabungkan semua item, untuk tabel admin dan
+  // hitungan yang butuh seluruh data
+  const requestAll = useCallback(async (endpoint, options = {}) => {
+    setLoading(true);
+    setError(null);
+    setData(null);
+    try {
+      const first = endpoint.includes("limit=")
+        ? endpoint
+        : withParam(endpoint, "limit", ALL_PAGES_LIMIT);
+      const items = [];
+      let cursor = null;
+      do {
+        const response = await send(
+          cursor ? withParam(first, "after", cursor) : first,
+          options
+        );
+        items.push(...(await response.json()));
+        cursor = response.headers.get("X-Next-Cursor");
+      } while (cursor);
+      setData(items);
+      return items;
+    } catch (err) {
+      setError(err.message);
+      throw err;
+    } finally {
+      setLoading(false);
+    }
+  }, []);
+
+  return { data, loading, error, request, requestPage, requestAll };
 }
 
 export default useApi;
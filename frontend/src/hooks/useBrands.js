@@ -3,11 +3,44 @@ import { useCallback } from "react";
 import useApi from "./useApi";
 
 function useBrands() {
-  const { data, loading, error, request } = useApi();
+  const { data, loading, error, request, requestAll } = useApi();
 
+  // Semua brand (mengikuti seluruh halaman X-Next-Cursor)
   const getBrands = useCallback(async () => {
-    return request("/api/brands");
-  }, [request]);
+    return requestAll("/api/brands");
+  }, [requestAll]);
+
+  const getBrandById = useCallback(
+    async (id) => {
+      return request(`/api/brands/${id}`);
+    },
+    [request]
+  );
+
+  // Setiap brand beserta product_count dan `top` produk teratas
+  // (sort: created_at | price | name, awali '-' untuk descending)
+  const getBrandIndex = useCallback(
+    async (top = 4, sort = "-created_at") => {
+      return request(
+        `/api/brands?top_products=${top}&products_sort=${encodeURIComponent(sort)}`
+      );
+    },
+    [request]
+  );
+
+  // params sama dengan getProducts (sort, limit, after, filter katalog)
+  const getBrandProducts = useCallback(
+    async (brandId, params = {}) => {
+      const query = new URLSearchParams(
+        Object.entries(params).filter(
+          ([, value]) => value !== undefined && value !== null && value !== ""
+        )
+      ).toString();
+      const endpoint = `/api/brands/${brandId}/products`;
+      return request(query ? `${endpoint}?${query}` : endpoint);
+    },
+    [request]
+  );
 
   const createBrand = useCallback(
     async (name) => {
@@ -43,6 +76,9 @@ function useBrands() {
     loading,
     error,
     getBrands,
+    getBrandById,
+    getBrandIndex,
+    getBrandProducts,
     createBrand,
     updateBrand,
     deleteBrand,
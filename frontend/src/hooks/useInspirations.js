@@ -3,16 +3,17 @@ import { useCallback } from "react";
 import useApi from "./useApi";
 
 function useInspirations() {
-  const { data, loading, error, request } = useApi();
+  const { data, loading, error, request, requestAll } = useApi();
 
+  // Semua inspirasi (mengikuti seluruh halaman X-Next-Cursor)
   const getInspirations = useCallback(
     async (tag = "") => {
       const url = tag
         ? `/api/inspirations?tag=${encodeURIComponent(tag)}`
         : "/api/inspirations";
-      return request(url);
+      return requestAll(url);
     },
-    [request]
+    [requestAll]
   );
 
   const getInspirationById = useCallback(
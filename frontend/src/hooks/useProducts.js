@@ -3,11 +3,59 @@ import { useCallback } from "react";
 import useApi from "./useApi";
 
 function useProducts() {
-  const { data, loading, error, request } = useApi();
+  const { data, loading, error, request, requestPage, requestAll } = useApi();
 
-  const getProducts = useCallback(async () => {
-    return request("/api/products");
-  }, [request]);
+  // params: { brand_id, category, material, price_min, price_max, in_stock,
+  // size, color, sort, limit, after } -> difilter di server. Tanpa limit/after
+  // semua halaman diambil; dengan limit/after hanya satu halaman.
+  const getProducts = useCallback(
+    async (params = {}) => {
+      const query = new URLSearchParams(
+        Object.entries(params).filter(
+          ([, value]) => value !== undefined && value !== null && value !== ""
+        )
+      ).toString();
+      const endpoint = query ? `/api/products?${query}` : "/api/products";
+      return params.limit || params.after
+        ? request(endpoint)
+        : requestAll(endpoint);
+    },
+    [request, requestAll]
+  );
+
+  // Kartu katalog dari read model product_cards: sudah berisi brand_name,
+  // in_stock dan favorite_count. params: { brand_id, in_stock, sort, limit, after }.
+  // Mengembalikan satu halaman { items, nextCursor }; kirim nextCursor
+  // sebagai params.after untuk halaman berikutnya
+  const getProductCards = useCallback(
+    async (params = {}) => {
+      const query = new URLSearchParams(
+        Object.entries(params).filter(
+          ([, value]) => value !== undefined && value !== null && value !== ""
+        )
+      ).toString();
+      return requestPage(
+        query ? `/api/products/cards?${query}` : "/api/products/cards"
+      );
+    },
+    [requestPage]
+  );
+
+  // Jumlah produk per brand/category/material/size/color dan rentang harga
+  // untuk filter yang sedang aktif (params sama dengan getProducts)
+  const getProductFacets = useCallback(
+    async (params = {}) => {
+      const query = new URLSearchParams(
+        Object.entries(params).filter(
+          ([, value]) => value !== undefined && value !== null && value !== ""
+        )
+      ).toString();
+      return request(
+        query ? `/api/products/facets?${query}` : "/api/products/facets"
+      );
+    },
+    [request]
+  );
 
   const getProductById = useCallback(
     async (id) => {
@@ -16,6 +64,57 @@ function useProducts() {
     [request]
   );
 
+  // Kartu produk yang sering dibeli user yang sama ("customers also bought"),
+  // masing-masing dengan co_purchases = jumlah user
+  const getAlsoBought = useCallback(
+    async (id, limit) => {
+      return request(
+        limit
+          ? `/api/products/${id}/also-bought?limit=${limit}`
+          : `/api/products/${id}/also-bought`
+      );
+    },
+    [request]
+  );
+
+  // Produk dengan atribut paling mirip (category, brand, bahan, warna,
+  // ukuran, rentang harga), masing-masing dengan similarity 0..1
+  const getSimilarProducts = useCallback(
+    async (id, limit) => {
+      return request(
+        limit
+          ? `/api/products/${id}/similar?limit=${limit}`
+          : `/api/products/${id}/similar`
+      );
+    },
+    [request]
+  );
+
+  // Rail "Trending now" / "Best sellers" dari ranking in-process di server.
+  // params: { category, limit }
+  const getRankedProducts = useCallback(
+    async (ranking, params = {}) => {
+      const query = new URLSearchParams(
+        Object.entries(params).filter(
+          ([, value]) => value !== undefined && value !== null && value !== ""
+        )
+      ).toString();
+      const path = `/api/products/${ranking}`;
+      return request(query ? `${path}?${query}` : path);
+    },
+    [request]
+  );
+
+  const getTrendingProducts = useCallback(
+    (params) => getRankedProducts("trending", params),
+    [getRankedProducts]
+  );
+
+  const getBestSellers = useCallback(
+    (params) => getRankedProducts("best-sellers", params),
+    [getRankedProducts]
+  );
+
   const createProduct = useCallback(
     async (productData) => {
       return request("/api/products", {
@@ -50,7 +149,13 @@ function useProducts() {
     loading,
     error,
     getProducts,
+    getProductCards,
+    getProductFacets,
     getProductById,
+    getAlsoBought,
+    getSimilarProducts,
+    getTrendingProducts,
+    getBestSellers,
     createProduct,
     updateProduct,
     deleteProduct,
@@ -3,11 +3,12 @@ import { useCallback } from "react";
 import useApi from "./useApi";
 
 function useTransactions() {
-  const { data, loading, error, request } = useApi();
+  const { data, loading, error, request, requestAll } = useApi();
 
+  // Semua transaksi (mengikuti seluruh halaman X-Next-Cursor)
   const getTransactions = useCallback(async () => {
-    return request("/api/transactions");
-  }, [request]);
+    return requestAll("/api/transactions");
+  }, [requestAll]);
 
   const getTransactionById = useCallback(
     async (id) => {
@@ -16,16 +17,33 @@ function useTransactions() {
     [request]
   );
 
+  // idempotencyKey: dipakai ulang saat mengirim ulang form yang sama supaya
+  // double submit / retry tidak membuat transaksi dua kali
   const createTransaction = useCallback(
-    async (transactionData) => {
+    async (transactionData, idempotencyKey) => {
       return request("/api/transactions", {
         method: "POST",
+        headers: idempotencyKey ? { "Idempotency-Key": idempotencyKey } : {},
         body: JSON.stringify(transactionData),
       });
     },
     [request]
   );
 
+  // order: { customer_name, shipping_address, payment_method,
+  //   items: [{ product_id, size, color, qty }] } -> satu request untuk
+  // seluruh keranjang, berhasil atau gagal bersama
+  const checkout = useCallback(
+    async (order, idempotencyKey) => {
+      return request("/api/checkout", {
+        method: "POST",
+        headers: idempotencyKey ? { "Idempotency-Key": idempotencyKey } : {},
+        body: JSON.stringify(order),
+      });
+    },
+    [request]
+  );
+
   const updateTransactionStatus = useCallback(
     async (id, status) => {
       return request(`/api/transactions/${id}`, {
@@ -45,6 +63,16 @@ function useTransactions() {
     [request]
   );
 
+  // params: { group_by: "day,brand", date_from, date_to, status, ... },
+  // dibaca dari rollup sales_daily di backend
+  const getSalesAnalytics = useCallback(
+    async (params = {}) => {
+      const query = new URLSearchParams(params).toString();
+      return request(`/api/analytics/sales${query ? `?${query}` : ""}`);
+    },
+    [request]
+  );
+
   return {
     data,
     loading,
@@ -52,8 +80,10 @@ function useTransactions() {
     getTransactions,
     getTransactionById,
     createTransaction,
+    checkout,
     updateTransactionStatus,
     deleteTransaction,
+    getSalesAnalytics,
   };
 }
 
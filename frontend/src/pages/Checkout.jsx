@@ -9,7 +9,12 @@ export default function Checkout() {
   const { user, loading: authLoading, error: authError } = useAuth();
   const { state } = useLocation();
   const navigate = useNavigate();
-  const product = state?.product;
+  // Produk dari Katalog berupa kartu (tanpa stok, sizes, colors),
+  // kolom lengkap diisi dari getProductById di bawah
+  const [latestProduct, setLatestProduct] = useState(null);
+  const product = latestProduct
+    ? { ...state?.product, ...latestProduct }
+    : state?.product;
 
   const { createTransaction } = useTransactions();
   const { getProductById } = useProducts();
@@ -24,6 +29,13 @@ export default function Checkout() {
   const [currentProductStock, setCurrentProductStock] = useState(
     product?.stock
   );
+  // Satu key per isi form: klik ganda atau retry mengirim key yang sama
+  const [idempotencyKey, setIdempotencyKey] = useState(() =>
+    crypto.randomUUID()
+  );
+  useEffect(() => {
+    setIdempotencyKey(crypto.randomUUID());
+  }, [formData]);
 
   useEffect(() => {
     const fetchLatestStock = async () => {
@@ -31,6 +43,7 @@ export default function Checkout() {
         try {
           const latestProduct = await getProductById(product.id);
           if (latestProduct) {
+            setLatestProduct(latestProduct);
             setCurrentProductStock(latestProduct.stock);
           }
         } catch (err) {
@@ -87,7 +100,10 @@ export default function Checkout() {
         purchased_color: formData.purchased_color,
       };
 
-      const newTransaction = await createTransaction(transactionData);
+      const newTransaction = await createTransaction(
+        transactionData,
+        idempotencyKey
+      );
       toast.success("Transaksi berhasil dibuat!");
       navigate("/payment", { state: { transaction: newTransaction } });
     } catch (err) {
@@ -15,6 +15,8 @@ export default function Dashboard() {
     loading: productsLoading,
     error: productsError,
     getProducts,
+    getTrendingProducts,
+    getBestSellers,
   } = useProducts();
   const { loading: brandsLoading, error: brandsError, getBrands } = useBrands();
   const {
@@ -36,6 +38,8 @@ export default function Dashboard() {
   const [inspirationsCount, setInspirationsCount] = useState(0);
   const [brandsCount, setBrandsCount] = useState(0);
   const [favorites, setFavorites] = useState([]);
+  const [trending, setTrending] = useState([]);
+  const [bestSellers, setBestSellers] = useState([]);
 
   useEffect(() => {
     const fetchData = async () => {
@@ -47,6 +51,17 @@ export default function Dashboard() {
         toast.error("Gagal memuat produk: " + err.message);
       }
 
+      try {
+        const [fetchedTrending, fetchedBestSellers] = await Promise.all([
+          getTrendingProducts({ limit: 8 }),
+          getBestSellers({ limit: 8 }),
+        ]);
+        setTrending(fetchedTrending || []);
+        setBestSellers(fetchedBestSellers || []);
+      } catch (err) {
+        console.error("Gagal mengambil ranking produk:", err);
+      }
+
       try {
         const fetchedBrands = await getBrands();
         setBrands(fetchedBrands || []);
@@ -87,6 +102,8 @@ export default function Dashboard() {
     user,
     authLoading,
     getProducts,
+    getTrendingProducts,
+    getBestSellers,
     getBrands,
     getInspirations,
     getFavorites,
@@ -200,6 +217,42 @@ export default function Dashboard() {
         </Link>
       </div>
 
+      {[
+        { title: "Trending Sekarang", items: trending },
+        { title: "Terlaris", items: bestSellers },
+      ].map(
+        (rail) =>
+          rail.items.length > 0 && (
+            <div key={rail.title} className="mb-10">
+              <h2 className="mb-4 text-2xl font-bold text-gray-800">
+                {rail.title}
+              </h2>
+              <div className="flex gap-4 pb-2 overflow-x-auto">
+                {rail.items.map((card) => (
+                  <Link
+                    key={card.id}
+                    to={`/product/${card.id}`}
+                    className="rounded-xl w-48 p-3 bg-white shadow shrink-0"
+                  >
+                    <img
+                      src={card.image_url}
+                      alt={card.name}
+                      className="object-contain w-full h-32 mb-2 rounded-md"
+                    />
+                    <p className="text-sm font-semibold text-gray-800">
+                      {card.name}
+                    </p>
+                    <p className="text-xs text-gray-600">{card.brand_name}</p>
+                    <p className="text-sm font-semibold text-orange-500">
+                      Rp {parseFloat(card.price).toLocaleString("id-ID")}
+                    </p>
+                  </Link>
+                ))}
+              </div>
+            </div>
+          )
+      )}
+
       <h2 className="mb-4 text-2xl font-bold text-gray-800">Katalog Produk</h2>
       <div className="sm:grid-cols-2 md:grid-cols-3 lg:grid-cols-4 grid grid-cols-1 gap-6">
         {products.map((product) => (
@@ -13,11 +13,13 @@ export default function DetailProduct() {
     loading: productLoading,
     error: productError,
     getProductById,
+    getSimilarProducts,
   } = useProducts();
-  const { loading: brandsLoading, error: brandsError, getBrands } = useBrands();
+  const { loading: brandsLoading, error: brandsError, getBrandById } = useBrands();
 
   const [product, setProduct] = useState(null);
   const [brandName, setBrandName] = useState("N/A");
+  const [similarProducts, setSimilarProducts] = useState([]);
 
   useEffect(() => {
     const fetchDetailsAndBrand = async () => {
@@ -25,14 +27,18 @@ export default function DetailProduct() {
         const fetchedProduct = await getProductById(id);
         setProduct(fetchedProduct);
 
+        // Rekomendasi tidak wajib: kalau gagal, halaman detail tetap tampil
+        getSimilarProducts(id, 4)
+          .then((fetchedSimilar) => setSimilarProducts(fetchedSimilar || []))
+          .catch((err) =>
+            console.error("Gagal mengambil produk serupa:", err)
+          );
+
         if (fetchedProduct?.brand_id) {
           try {
-            const fetchedBrands = await getBrands();
-            const foundBrand = fetchedBrands?.find(
-              (b) => b.id === fetchedProduct.brand_id
-            );
-            if (foundBrand) {
-              setBrandName(foundBrand.name);
+            const fetchedBrand = await getBrandById(fetchedProduct.brand_id);
+            if (fetchedBrand?.name) {
+              setBrandName(fetchedBrand.name);
             }
           } catch (err) {
             console.error("Gagal mengambil merek terkait produk:", err);
@@ -48,7 +54,7 @@ export default function DetailProduct() {
     if (!authLoading) {
       fetchDetailsAndBrand();
     }
-  }, [id, getProductById, getBrands, authLoading]); // Tambahkan getBrands ke dependensi
+  }, [id, getProductById, getSimilarProducts, getBrandById, authLoading]);
 
   // Hapus useEffect terpisah untuk fetchBrand karena sudah digabungkan di atas.
   // useEffect(() => {
@@ -152,6 +158,34 @@ export default function DetailProduct() {
           )}
         </div>
       </div>
+
+      {similarProducts.length > 0 && (
+        <div className="mt-12">
+          <h3 className="mb-4 text-2xl font-bold text-gray-800">
+            Kamu Mungkin Juga Suka
+          </h3>
+          <div className="sm:grid-cols-2 md:grid-cols-4 grid grid-cols-1 gap-6">
+            {similarProducts.map((card) => (
+              <Link
+                key={card.id}
+                to={`/product/${card.id}`}
+                className="rounded-xl p-4 bg-white shadow"
+              >
+                <img
+                  src={card.image_url}
+                  alt={card.name}
+                  className="object-contain w-full h-40 mb-3 rounded-md"
+                />
+                <p className="font-semibold text-gray-800">{card.name}</p>
+                <p className="text-sm text-gray-600">{card.brand_name}</p>
+                <p className="font-semibold text-orange-500">
+                  Rp {parseFloat(card.price).toLocaleString("id-ID")}
+                </p>
+              </Link>
+            ))}
+          </div>
+        </div>
+      )}
     </div>
   );
 }
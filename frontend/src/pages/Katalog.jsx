@@ -1,7 +1,6 @@
-import React, { useEffect, useState } from "react";
+import React, { useCallback, useEffect, useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
 import useProducts from "../hooks/useProducts";
-import useBrands from "../hooks/useBrands";
 import useAuth from "../hooks/useAuth";
 import { toast } from "sonner";
 
@@ -11,50 +10,48 @@ export default function Katalog() {
   const {
     loading: productsLoading,
     error: productsError,
-    getProducts,
+    getProductCards,
   } = useProducts();
-  const { loading: brandsLoading, error: brandsError, getBrands } = useBrands();
 
   const [products, setProducts] = useState([]);
-  const [brandsMap, setBrandsMap] = useState({});
+  // Cursor halaman berikutnya dari X-Next-Cursor; null di halaman terakhir
+  const [nextCursor, setNextCursor] = useState(null);
 
-  useEffect(() => {
-    const fetchCatalogData = async () => {
+  // Kartu sudah berisi nama brand dan status stok, jadi tidak perlu
+  // mengambil daftar brand; detail lengkap diambil di Checkout
+  const fetchCards = useCallback(
+    async (after) => {
       try {
-        const fetchedProducts = await getProducts();
-        setProducts(fetchedProducts || []);
+        const page = await getProductCards({ after });
+        setProducts((current) =>
+          after ? [...current, ...page.items] : page.items
+        );
+        setNextCursor(page.nextCursor);
       } catch (err) {
         console.error("Gagal mengambil produk untuk katalog:", err);
         toast.error("Gagal memuat produk: " + err.message);
       }
+    },
+    [getProductCards]
+  );
 
-      try {
-        const fetchedBrands = await getBrands();
-        const map = {};
-        fetchedBrands?.forEach((brand) => {
-          map[brand.id] = brand.name;
-        });
-        setBrandsMap(map);
-      } catch (err) {
-        console.error("Gagal mengambil merek untuk katalog:", err);
-        toast.error("Gagal memuat merek: " + err.message);
-      }
-    };
+  useEffect(() => {
     if (!authLoading) {
-      fetchCatalogData();
+      fetchCards();
     }
-  }, [getProducts, getBrands, authLoading]);
+  }, [fetchCards, authLoading]);
 
-  if (authLoading || productsLoading || brandsLoading)
+  // Saat memuat halaman berikutnya kartu yang sudah tampil tetap terlihat
+  if (authLoading || (productsLoading && products.length === 0))
     return (
       <div className="bg-nude min-h-screen p-8 text-center">
         Memuat katalog...
       </div>
     );
-  if (authError || productsError || brandsError)
+  if (authError || (productsError && products.length === 0))
     return (
       <div className="bg-nude min-h-screen p-8 text-center text-red-600">
-        Error memuat produk: {authError || productsError || brandsError}
+        Error memuat produk: {authError || productsError}
       </div>
     );
 
@@ -78,12 +75,14 @@ export default function Katalog() {
               {product.name}
             </h2>
             <p className="mb-1 text-sm text-gray-500">
-              Merek: {brandsMap[product.brand_id] || "N/A"}
+              Merek: {product.brand_name || "N/A"}
             </p>
             <p className="mb-2 font-semibold text-orange-500">
               Rp {parseFloat(product.price).toLocaleString("id-ID")}
             </p>
-            <p className="mb-2 text-sm text-gray-600">Stok: {product.stock}</p>
+            <p className="mb-2 text-sm text-gray-600">
+              Stok: {product.in_stock ? "Tersedia" : "Habis"}
+            </p>
             <div className="flex justify-between mt-2">
               <Link
                 to={`/product/${product.id}`}
@@ -114,6 +113,17 @@ export default function Katalog() {
           </div>
         ))}
       </div>
+      {nextCursor && (
+        <div className="mt-8 text-center">
+          <button
+            onClick={() => fetchCards(nextCursor)}
+            disabled={productsLoading}
+            className="hover:bg-orange-600 disabled:opacity-50 px-4 py-2 text-white bg-orange-500 rounded"
+          >
+            {productsLoading ? "Memuat..." : "Muat lebih banyak"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
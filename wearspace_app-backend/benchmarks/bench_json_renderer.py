@@ -0,0 +1,94 @@
+"""
+Benchmark: renderer JSON lama (indent=4) vs renderer ringkas.
+
+Mengukur throughput ``GET /api/products?limit=200`` lewat seluruh stack
+Pyramid (WebTest) dan ukuran payload-nya, untuk renderer lama
+``JSON(indent=4)`` dan ``FastJSON`` (orjson kalau terpasang).
+
+Jalankan dari folder ``wearspace_app-backend``::
+
+    python benchmarks/bench_json_renderer.py --rows 200
+
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+
+from pyramid.config import Configurator
+from pyramid.renderers import JSON
+from sqlalchemy import create_engine, insert
+from webtest import TestApp
+
+from wearspace_app import main as make_app
+from wearspace_app import renderers
+from wearspace_app.models import Base, Brand, Product
+
+
+def seed(url, rows):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    brand_id = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(Brand.__table__), [{'id': brand_id, 'name': 'Bench'}])
+        conn.execute(insert(Product.__table__), [{
+            'id': uuid.uuid4(), 'name': f'Product {i}', 'brand_id': brand_id,
+            'price': Decimal('149.90'), 'description': 'Lightweight everyday sneaker ' * 3,
+            'image_url': f'https://example.com/{i}.jpg', 'material': 'Mesh',
+            'category': 'Footwear', 'stock': 10, 'sizes': ['US 8', 'US 9', 'US 10'],
+            'colors': ['Black', 'White'],
+        } for i in range(rows)])
+    engine.dispose()
+
+
+def run(app, path, seconds):
+    app.get(path)  # warm up (juga mengisi cache katalog)
+    count, size = 0, 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        size = len(app.get(path).body)
+        count += 1
+    return count / (time.perf_counter() - start), size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.sqlite')
+    os.close(fd)
+    url = f'sqlite:///{path}'
+    try:
+        seed(url, args.rows)
+        settings = {'sqlalchemy.url': url, 'api.page_size.max': str(args.rows)}
+        request_path = f'/api/products?limit={args.rows}'
+
+        # Renderer sebelum perubahan ini
+        legacy = make_app({}, **settings)
+        config = Configurator(registry=legacy.registry)
+        config.add_renderer('json', JSON(indent=4))
+        config.commit()
+
+        compact = make_app({}, **settings)
+        pretty = make_app({}, **dict(settings, **{'api.json.pretty': 'true'}))
+
+        encoder = 'orjson' if renderers.orjson is not None else 'json'
+        print(f'{"renderer":<28}{"req/s":>10}{"payload":>12}')
+        for name, app in [
+            ('JSON(indent=4) (old)', legacy),
+            ('FastJSON pretty', pretty),
+            (f'FastJSON compact ({encoder})', compact),
+        ]:
+            rate, size = run(TestApp(app), request_path, args.seconds)
+            print(f'{name:<28}{rate:>10.1f}{size / 1024:>10.1f}KB')
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
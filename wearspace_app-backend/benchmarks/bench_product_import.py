@@ -0,0 +1,100 @@
+"""
+Benchmark: bulk import per batch vs satu create_product per baris.
+
+Jalur lama dimodelkan seperti view ``create_product``: lookup Brand,
+``add`` lalu ``flush`` untuk setiap produk. Keduanya ditulis ke SQLite
+di file sementara dan di-commit sekali di akhir.
+
+Jalankan dari folder ``wearspace_app-backend``::
+
+    python benchmarks/bench_product_import.py --rows 20000
+
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import uuid
+
+import transaction
+
+from wearspace_app.importer import ProductImporter, read_rows
+from wearspace_app.models import (
+    Base, Brand, Product, get_engine, get_session_factory, get_tm_session,
+)
+from wearspace_app.search import index_product
+
+
+def make_csv(n, brand_names):
+    lines = ['name,brand,price,stock,sizes,colors,category,material']
+    for i in range(n):
+        brand = brand_names[i % len(brand_names)]
+        lines.append(f'Product {i},{brand},{100 + i % 50}.90,{i % 20},S|M|L,Black|White,Apparel,Cotton')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def setup(url, brand_names):
+    engine = get_engine({'sqlalchemy.url': url})
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    factory = get_session_factory(engine)
+    with transaction.manager:
+        dbsession = get_tm_session(factory, transaction.manager)
+        for name in brand_names:
+            dbsession.add(Brand(id=uuid.uuid4(), name=name))
+    return engine, factory
+
+
+def per_row(factory, body):
+    import csv
+    with transaction.manager:
+        dbsession = get_tm_session(factory, transaction.manager)
+        brands = {b.name: b.id for b in dbsession.query(Brand)}
+        for row in csv.DictReader(io.StringIO(body.decode('utf-8'))):
+            brand = dbsession.query(Brand).get(brands[row['brand']])
+            product = Product(
+                name=row['name'], brand_id=brand.id, price=row['price'],
+                stock=int(row['stock']), sizes=row['sizes'].split('|'),
+                colors=row['colors'].split('|'), category=row['category'],
+                material=row['material'],
+            )
+            dbsession.add(product)
+            dbsession.flush()
+            index_product(dbsession, product.id)
+
+
+def bulk(factory, body, batch_size):
+    with transaction.manager:
+        dbsession = get_tm_session(factory, transaction.manager)
+        summary = ProductImporter(dbsession, batch_size).run(read_rows(io.BytesIO(body), 'csv'))
+    assert not summary['errors'], summary['errors'][:3]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    brand_names = [f'Brand {i}' for i in range(20)]
+    body = make_csv(args.rows, brand_names)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        results = []
+        for name, run in [
+            ('per-row create_product', lambda f: per_row(f, body)),
+            (f'bulk import (batch {args.batch_size})', lambda f: bulk(f, body, args.batch_size)),
+        ]:
+            engine, factory = setup(url, brand_names)
+            start = time.perf_counter()
+            run(factory)
+            elapsed = time.perf_counter() - start
+            engine.dispose()
+            results.append(elapsed)
+            print(f'{name:<32}{elapsed:>8.2f}s{args.rows / elapsed:>10.0f} rows/s')
+        print(f'speedup: {results[0] / results[1]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Microbenchmark: serializer terkompilasi vs helper reflektif lama.
+
+Mengukur biaya per baris untuk Product dan Transaction (dengan relasi
+product dan user), tanpa database, supaya yang terukur hanya serialisasi.
+
+Jalankan dari folder ``wearspace_app-backend``::
+
+    python benchmarks/bench_serializers.py --rows 20000
+
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from wearspace_app.models import Base, Product, Transaction, User
+from wearspace_app.serializers import configure_serializers, serialize
+
+
+def legacy_serialize_object(obj):
+    # Salinan serialize_object sebelum serializer dikompilasi
+    if not obj:
+        return None
+    data = {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+    for key, value in data.items():
+        if isinstance(value, uuid.UUID):
+            data[key] = str(value)
+        elif isinstance(value, datetime):
+            if value:
+                data[key] = value.isoformat()
+        elif isinstance(value, Decimal):
+            data[key] = float(value)
+    if 'hashed_password' in data:
+        del data['hashed_password']
+    return data
+
+
+def legacy_transaction(t):
+    t_data = legacy_serialize_object(t)
+    if t.product:
+        t_data['product'] = legacy_serialize_object(t.product)
+    if t.user:
+        t_data['user'] = legacy_serialize_object(t.user)
+    return t_data
+
+
+def make_rows(n):
+    now = datetime.now(timezone.utc)
+    user = User(id=uuid.uuid4(), email='bench@example.com', hashed_password='x',
+                phone='0812', address='Jl. Bench', created_at=now, updated_at=now)
+    products, transactions = [], []
+    for i in range(n):
+        product = Product(
+            id=uuid.uuid4(), name=f'Product {i}', brand_id=uuid.uuid4(),
+            price=Decimal('199.90'), description='Benchmark product',
+            image_url=f'https://example.com/{i}.jpg', material='Cotton',
+            category='Apparel', stock=10, sizes=['S', 'M'], colors=['Black'],
+            created_at=now, updated_at=now,
+        )
+        products.append(product)
+        transactions.append(Transaction(
+            id=uuid.uuid4(), user=user, product=product, user_id=user.id,
+            product_id=product.id, customer_name='Bench', shipping_address='Jl. Bench',
+            payment_method='Transfer', transaction_status='Berhasil',
+            purchased_size='M', purchased_color='Black',
+            transaction_date=now, updated_at=now,
+        ))
+    return products, transactions
+
+
+def per_row(fn, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            fn(row)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    configure_serializers(Base)
+    products, transactions = make_rows(args.rows)
+    assert serialize(products[0]) == legacy_serialize_object(products[0])
+    assert serialize(transactions[0], ('product', 'user')) == legacy_transaction(transactions[0])
+
+    cases = [
+        ('Product', products, legacy_serialize_object, serialize),
+        ('Transaction+relations', transactions, legacy_transaction,
+         lambda t: serialize(t, ('product', 'user'))),
+    ]
+    print(f'{"model":<24}{"legacy":>12}{"compiled":>12}{"speedup":>10}')
+    for name, rows, legacy, compiled in cases:
+        old = per_row(legacy, rows, args.repeat)
+        new = per_row(compiled, rows, args.repeat)
+        print(f'{name:<24}{old:>10.2f}us{new:>10.2f}us{old / new:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,11 @@ requires = [
     'waitress',
 ]
 
+# Encoder JSON lebih cepat untuk renderer 'json' (opsional)
+speedups_require = [
+    'orjson',
+]
+
 tests_require = [
     'WebTest >= 1.3.1',  # py3 compat
     'pytest>=3.7.4',
@@ -48,6 +53,7 @@ setup(
     zip_safe=False,
     extras_require={
         'testing': tests_require,
+        'speedups': speedups_require,
     },
     install_requires=requires,
     entry_points={
@@ -56,6 +62,9 @@ setup(
         ],
         'console_scripts': [
             'initialize_wearspace_app_db = wearspace_app.scripts.initialize_db:main',
+            'rebuild_wearspace_app_sales = wearspace_app.scripts.rebuild_sales:main',
+            'archive_wearspace_app_transactions = wearspace_app.scripts.archive_transactions:main',
+            'maintain_wearspace_app_partitions = wearspace_app.scripts.maintain_partitions:main',
         ],
     },
 )
@@ -5,8 +5,10 @@ from pyramid.authorization import ACLAuthorizationPolicy
 from sqlalchemy import engine_from_config
 from .models.meta import Base
 from .models import User # Import User model untuk callback auth
-from pyramid.renderers import JSON
+from pyramid.settings import asbool
 from .cors import cors_tween_factory
+from .streaming import StreamingJSON
+from .renderers import FastJSON, dumps
 import uuid # Diperlukan untuk get_user_principals
 
 # Callback untuk AuthTktAuthenticationPolicy
@@ -30,7 +32,9 @@ def main(global_config, **settings):
 
     # 1. Konfigurasi CORS (harus di awal)
     config.add_tween('.cors_tween_factory')
-    config.add_renderer('json', JSON(indent=4))
+    # JSON ringkas di produksi, rapi kalau api.json.pretty = true atau ?pretty=1
+    config.add_renderer('json', FastJSON(pretty=asbool(settings.get('api.json.pretty', False))))
+    config.add_renderer('json_stream', StreamingJSON(serializer=dumps)) # Opt-in lewat ?stream=1
 
     # 2. Konfigurasi Session Factory (AuthTkt policy membutuhkan ini)
     session_secret = settings.get('session.secret', 'a_default_session_secret_for_dev') # Ganti dengan secret kuat
@@ -63,6 +67,11 @@ def main(global_config, **settings):
 
     # 5. Include your application's models and routes
     config.include('.models') # Ini akan memanggil includeme dari wearspace_app/models/__init__.py
+    config.include('.cache') # Cache katalog in-process (products & brands)
+    config.include('.idempotency') # Key store untuk header Idempotency-Key
+    config.include('.recommendations') # Matriks co-purchase untuk also-bought
+    config.include('.rankings') # Ranking trending & best sellers in-process
+    config.include('.similarity') # Indeks atribut untuk produk serupa
     config.include('.routes') # Ini akan memanggil includeme dari wearspace_app/routes.py
 
     # 6. Scan views and other declaratively configured components
@@ -0,0 +1,48 @@
+"""Add product full-text search index
+
+Revision ID: 23d660c1deda
+Revises: 8c4678ccae61
+Create Date: 2026-10-18 11:26:05.903127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from wearspace_app.search import PG_SEARCH_VECTOR
+
+
+# revision identifiers, used by Alembic.
+revision = '23d660c1deda'
+down_revision = '8c4678ccae61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.execute('ALTER TABLE products ADD COLUMN search_vector tsvector')
+        op.execute(
+            f'UPDATE products SET search_vector = {PG_SEARCH_VECTOR} '
+            'FROM brands WHERE brands.id = products.brand_id'
+        )
+        op.execute('CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)')
+    elif dialect_name == 'sqlite':
+        op.execute(
+            'CREATE VIRTUAL TABLE products_fts USING fts5('
+            'product_id UNINDEXED, name, description, material, brand_name)'
+        )
+        op.execute(
+            'INSERT INTO products_fts (product_id, name, description, material, brand_name) '
+            'SELECT products.id, products.name, products.description, products.material, brands.name '
+            'FROM products JOIN brands ON brands.id = products.brand_id'
+        )
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.execute('DROP INDEX ix_products_search_vector')
+        op.execute('ALTER TABLE products DROP COLUMN search_vector')
+    elif dialect_name == 'sqlite':
+        op.execute('DROP TABLE products_fts')
@@ -0,0 +1,33 @@
+"""Add idempotency keys
+
+Revision ID: 4f2a9c7e1b3d
+Revises: 8cba75dd5543
+Create Date: 2026-10-18 16:10:27.531904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f2a9c7e1b3d'
+down_revision = '8cba75dd5543'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_keys',
+    sa.Column('user_key', sa.String(length=36), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('user_key', 'key', name=op.f('pk_idempotency_keys'))
+    )
+
+
+def downgrade():
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,28 @@
+"""Add composite indexes for transaction listing filters
+
+Revision ID: 4f7c2a9e1b38
+Revises: e81c3b5d0a64
+Create Date: 2026-10-18 22:04:17.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f7c2a9e1b38'
+down_revision = 'e81c3b5d0a64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_transactions_user_id_transaction_date', 'transactions', ['user_id', 'transaction_date'], unique=False)
+    op.create_index('ix_transactions_transaction_status_transaction_date', 'transactions', ['transaction_status', 'transaction_date'], unique=False)
+    op.create_index('ix_transactions_product_id_transaction_date', 'transactions', ['product_id', 'transaction_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_transactions_product_id_transaction_date', table_name='transactions')
+    op.drop_index('ix_transactions_transaction_status_transaction_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_id_transaction_date', table_name='transactions')
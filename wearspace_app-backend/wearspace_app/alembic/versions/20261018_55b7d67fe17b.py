@@ -0,0 +1,39 @@
+"""Add sharded stock counters
+
+Revision ID: 55b7d67fe17b
+Revises: 23d660c1deda
+Create Date: 2026-10-18 14:21:06.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from wearspace_app.models.meta import UUIDColumn
+
+
+# revision identifiers, used by Alembic.
+revision = '55b7d67fe17b'
+down_revision = '23d660c1deda'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('products', sa.Column('stock_shards', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('product_stock_shards',
+    sa.Column('product_id', UUIDColumn(length=36), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], name=op.f('fk_product_stock_shards_product_id_products'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'shard', name=op.f('pk_product_stock_shards'))
+    )
+
+
+def downgrade():
+    # Stok di shard dikembalikan ke products.stock sebelum tabelnya dihapus
+    op.execute(
+        'UPDATE products SET stock = (SELECT coalesce(sum(stock), 0) FROM product_stock_shards '
+        'WHERE product_stock_shards.product_id = products.id) WHERE stock_shards > 0'
+    )
+    op.drop_table('product_stock_shards')
+    op.drop_column('products', 'stock_shards')
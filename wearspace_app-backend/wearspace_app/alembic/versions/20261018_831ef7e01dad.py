@@ -0,0 +1,32 @@
+"""Add keyset pagination indexes
+
+Revision ID: 831ef7e01dad
+Revises: 0a7dee3d4191
+Create Date: 2026-10-18 09:12:40.512334
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '831ef7e01dad'
+down_revision = '0a7dee3d4191'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_brands_created_at_id', 'brands', ['created_at', 'id'], unique=False)
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'], unique=False)
+    op.create_index('ix_inspirations_created_at_id', 'inspirations', ['created_at', 'id'], unique=False)
+    op.create_index('ix_transactions_transaction_date_id', 'transactions', ['transaction_date', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_transactions_transaction_date_id', table_name='transactions')
+    op.drop_index('ix_inspirations_created_at_id', table_name='inspirations')
+    op.drop_index('ix_products_created_at_id', table_name='products')
+    op.drop_index('ix_brands_created_at_id', table_name='brands')
+    op.drop_index('ix_users_created_at_id', table_name='users')
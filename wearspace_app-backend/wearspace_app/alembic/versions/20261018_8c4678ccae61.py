@@ -0,0 +1,37 @@
+"""Add product catalog filter indexes
+
+Revision ID: 8c4678ccae61
+Revises: 831ef7e01dad
+Create Date: 2026-10-18 10:03:17.248911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4678ccae61'
+down_revision = '831ef7e01dad'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_products_brand_id_created_at_id', 'products', ['brand_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_products_category_created_at_id', 'products', ['category', 'created_at', 'id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.create_index('ix_products_name_id', 'products', ['name', 'id'], unique=False)
+    if op.get_bind().dialect.name == 'postgresql':
+        # Dipakai oleh filter ?size= dan ?color= (sizes @> ARRAY[...])
+        op.create_index('ix_products_sizes', 'products', ['sizes'], unique=False, postgresql_using='gin')
+        op.create_index('ix_products_colors', 'products', ['colors'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_products_colors', table_name='products')
+        op.drop_index('ix_products_sizes', table_name='products')
+    op.drop_index('ix_products_name_id', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_category_created_at_id', table_name='products')
+    op.drop_index('ix_products_brand_id_created_at_id', table_name='products')
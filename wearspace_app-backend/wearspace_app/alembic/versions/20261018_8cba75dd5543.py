@@ -0,0 +1,24 @@
+"""Add transaction quantity
+
+Revision ID: 8cba75dd5543
+Revises: 55b7d67fe17b
+Create Date: 2026-10-18 15:02:44.907116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8cba75dd5543'
+down_revision = '55b7d67fe17b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('transactions', sa.Column('quantity', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('transactions', 'quantity')
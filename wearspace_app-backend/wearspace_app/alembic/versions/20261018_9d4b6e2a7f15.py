@@ -0,0 +1,24 @@
+"""Add transactions.updated_at index
+
+Revision ID: 9d4b6e2a7f15
+Revises: c5a81f3e6d27
+Create Date: 2026-10-18 19:21:05.732118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4b6e2a7f15'
+down_revision = 'c5a81f3e6d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_transactions_updated_at', 'transactions', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_transactions_updated_at', table_name='transactions')
@@ -0,0 +1,62 @@
+"""Add sales_daily rollup table and transactions.unit_price
+
+Revision ID: a3d9f61c7e52
+Revises: 4f7c2a9e1b38
+Create Date: 2026-10-18 22:41:09.204617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from wearspace_app.models.meta import UUIDColumn
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d9f61c7e52'
+down_revision = '4f7c2a9e1b38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('transactions', sa.Column('unit_price', sa.DECIMAL(precision=10, scale=2), nullable=True))
+    # Transaksi lama memakai harga produk saat migrasi
+    op.execute(
+        'UPDATE transactions SET unit_price = '
+        '(SELECT price FROM products WHERE products.id = transactions.product_id)'
+    )
+
+    op.create_table('sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('brand_id', UUIDColumn(length=36), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('payment_method', sa.String(length=50), nullable=False),
+    sa.Column('transaction_status', sa.String(length=50), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'brand_id', 'category', 'payment_method', 'transaction_status', name=op.f('pk_sales_daily'))
+    )
+    op.create_index('ix_sales_daily_brand_id_day', 'sales_daily', ['brand_id', 'day'], unique=False)
+
+    # Isi awal dari riwayat transaksi (sama dengan sales.rebuild_sales)
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        day = "date(timezone('UTC', t.transaction_date))"
+    elif dialect_name == 'sqlite':
+        day = 'date(t.transaction_date)'
+    else:
+        return
+    op.execute(
+        'INSERT INTO sales_daily (day, brand_id, category, payment_method, transaction_status, orders, units, revenue) '
+        f"SELECT {day}, p.brand_id, coalesce(p.category, ''), t.payment_method, t.transaction_status, "
+        'count(t.id), sum(coalesce(t.quantity, 1)), sum(coalesce(t.unit_price, p.price) * coalesce(t.quantity, 1)) '
+        'FROM transactions AS t JOIN products AS p ON p.id = t.product_id '
+        f"GROUP BY {day}, p.brand_id, coalesce(p.category, ''), t.payment_method, t.transaction_status"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_sales_daily_brand_id_day', table_name='sales_daily')
+    op.drop_table('sales_daily')
+    op.drop_column('transactions', 'unit_price')
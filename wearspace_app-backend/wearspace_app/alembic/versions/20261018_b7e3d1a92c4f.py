@@ -0,0 +1,59 @@
+"""Add product_cards read model
+
+Revision ID: b7e3d1a92c4f
+Revises: 4f2a9c7e1b3d
+Create Date: 2026-10-18 16:48:12.204517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from wearspace_app.models.meta import UUIDColumn
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3d1a92c4f'
+down_revision = '4f2a9c7e1b3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_cards',
+    sa.Column('id', UUIDColumn(length=36), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('brand_id', UUIDColumn(length=36), nullable=False),
+    sa.Column('brand_name', sa.String(length=255), nullable=True),
+    sa.Column('price', sa.DECIMAL(precision=10, scale=2), nullable=False),
+    sa.Column('image_url', sa.String(length=255), nullable=True),
+    sa.Column('in_stock', sa.Boolean(), nullable=False),
+    sa.Column('favorite_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['id'], ['products.id'], name=op.f('fk_product_cards_id_products'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_product_cards'))
+    )
+    op.create_index('ix_product_cards_brand_id_created_at_id', 'product_cards', ['brand_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_product_cards_created_at_id', 'product_cards', ['created_at', 'id'], unique=False)
+    op.create_index('ix_product_cards_name_id', 'product_cards', ['name', 'id'], unique=False)
+    op.create_index('ix_product_cards_price_id', 'product_cards', ['price', 'id'], unique=False)
+
+    # Isi awal dari data yang sudah ada (sama dengan cards.rebuild_cards)
+    op.execute(
+        'INSERT INTO product_cards (id, name, brand_id, brand_name, price, image_url, '
+        'in_stock, favorite_count, created_at) '
+        'SELECT products.id, products.name, products.brand_id, brands.name, products.price, '
+        'products.image_url, '
+        '(products.stock > 0 OR EXISTS (SELECT 1 FROM product_stock_shards '
+        'WHERE product_stock_shards.product_id = products.id AND product_stock_shards.stock > 0)), '
+        '(SELECT count(*) FROM favorites WHERE favorites.product_id = products.id), '
+        'products.created_at '
+        'FROM products JOIN brands ON brands.id = products.brand_id'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_product_cards_price_id', table_name='product_cards')
+    op.drop_index('ix_product_cards_name_id', table_name='product_cards')
+    op.drop_index('ix_product_cards_created_at_id', table_name='product_cards')
+    op.drop_index('ix_product_cards_brand_id_created_at_id', table_name='product_cards')
+    op.drop_table('product_cards')
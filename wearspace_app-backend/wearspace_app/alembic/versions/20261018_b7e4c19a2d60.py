@@ -0,0 +1,170 @@
+"""Partition transactions by month (PostgreSQL) and add transactions_archive
+
+Revision ID: b7e4c19a2d60
+Revises: a3d9f61c7e52
+Create Date: 2026-10-18 23:26:51.907342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from wearspace_app.models.meta import UUIDColumn
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4c19a2d60'
+down_revision = 'a3d9f61c7e52'
+branch_labels = None
+depends_on = None
+
+# Sama dengan archive.PARTITION_MONTHS_AHEAD: partisi setahun ke depan langsung
+# dibuat, jadi insert bulan baru tidak bergantung pada job terjadwal yang
+# baru jalan belakangan
+PARTITION_MONTHS_AHEAD = 12
+PARTITION_CRON_JOB = 'wearspace-transaction-partitions'
+
+TRANSACTION_INDEXES = {
+    'ix_transactions_transaction_date_id': ['transaction_date', 'id'],
+    'ix_transactions_updated_at': ['updated_at'],
+    'ix_transactions_user_id_transaction_date': ['user_id', 'transaction_date'],
+    'ix_transactions_transaction_status_transaction_date': ['transaction_status', 'transaction_date'],
+    'ix_transactions_product_id_transaction_date': ['product_id', 'transaction_date'],
+}
+
+# Partisi bulanan transactions_YYYY_MM (batas bulan dalam UTC) dari bulan
+# tertua yang barisnya ada di transactions_default sampai months_ahead bulan
+# ke depan. Baris di partisi default dipindah ke partisi barunya sebelum
+# ATTACH, jadi fungsi ini juga "membereskan" default. Dipanggil harian oleh
+# pg_cron (kalau extension-nya ada) dan oleh
+# maintain_wearspace_app_partitions / archive_wearspace_app_transactions
+# (wearspace_app/archive.py).
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_transaction_partitions(months_ahead integer)
+RETURNS integer AS $$
+DECLARE
+    this_month date := date_trunc('month', now() AT TIME ZONE 'UTC')::date;
+    month_start date;
+    lower_bound timestamptz;
+    upper_bound timestamptz;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    SELECT least(this_month, coalesce(date_trunc('month', min(transaction_date) AT TIME ZONE 'UTC')::date, this_month))
+      INTO month_start FROM transactions_default;
+    WHILE month_start <= this_month + make_interval(months => months_ahead) LOOP
+        partition_name := 'transactions_' || to_char(month_start, 'YYYY_MM');
+        lower_bound := month_start::timestamp AT TIME ZONE 'UTC';
+        upper_bound := (month_start + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+        IF to_regclass(partition_name) IS NULL THEN
+            LOCK TABLE transactions_default IN SHARE ROW EXCLUSIVE MODE;
+            EXECUTE format('CREATE TABLE %I (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM transactions_default '
+                'WHERE transaction_date >= %L AND transaction_date < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                lower_bound, upper_bound, partition_name);
+            EXECUTE format('ALTER TABLE transactions ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, lower_bound, upper_bound);
+            created := created + 1;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def _create_transaction_constraints():
+    op.create_foreign_key(op.f('fk_transactions_user_id_users'), 'transactions', 'users', ['user_id'], ['id'])
+    op.create_foreign_key(op.f('fk_transactions_product_id_products'), 'transactions', 'products', ['product_id'], ['id'], ondelete='CASCADE')
+    for name, columns in TRANSACTION_INDEXES.items():
+        op.create_index(name, 'transactions', columns, unique=False)
+
+
+def upgrade():
+    op.create_table('transactions_archive',
+    sa.Column('id', UUIDColumn(length=36), nullable=False),
+    sa.Column('user_id', UUIDColumn(length=36), nullable=True),
+    sa.Column('transaction_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('product_id', UUIDColumn(length=36), nullable=False),
+    sa.Column('brand_id', UUIDColumn(length=36), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=True),
+    sa.Column('payment_method', sa.String(length=50), nullable=False),
+    sa.Column('transaction_status', sa.String(length=50), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.DECIMAL(precision=10, scale=2), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('payload', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_transactions_archive'))
+    )
+    op.create_index('ix_transactions_archive_user_id_transaction_date', 'transactions_archive', ['user_id', 'transaction_date'], unique=False)
+
+    # Declarative partitioning hanya ada di PostgreSQL
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # payload sudah dikompres zlib, TOAST tidak perlu mencoba mengompres lagi
+    op.execute('ALTER TABLE transactions_archive ALTER COLUMN payload SET STORAGE EXTERNAL')
+
+    # Tabel lama disingkirkan; nama PK dan index-nya dipakai tabel baru
+    op.rename_table('transactions', 'transactions_unpartitioned')
+    op.execute('ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT pk_transactions TO pk_transactions_unpartitioned')
+    for name in TRANSACTION_INDEXES:
+        op.drop_index(name, table_name='transactions_unpartitioned')
+    # Kunci partisi tidak boleh NULL
+    op.execute('UPDATE transactions_unpartitioned SET transaction_date = coalesce(updated_at, now()) WHERE transaction_date IS NULL')
+
+    op.execute(
+        'CREATE TABLE transactions (LIKE transactions_unpartitioned INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (transaction_date)'
+    )
+    op.alter_column('transactions', 'transaction_date', nullable=False)
+    # Primary key tabel partisi harus memuat kunci partisinya
+    op.create_primary_key(op.f('pk_transactions'), 'transactions', ['id', 'transaction_date'])
+    op.execute('CREATE TABLE transactions_default PARTITION OF transactions DEFAULT')
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+
+    # Semua baris masuk default dulu, lalu dipindah ke partisi bulanannya
+    op.execute('INSERT INTO transactions SELECT * FROM transactions_unpartitioned')
+    op.execute(f'SELECT create_transaction_partitions({PARTITION_MONTHS_AHEAD})')
+    op.drop_table('transactions_unpartitioned')
+    _create_transaction_constraints()
+
+    # Horizon partisi digeser tiap hari oleh pg_cron kalau tersedia; tanpa
+    # pg_cron, maintain_wearspace_app_partitions harus dijadwalkan (cron)
+    op.execute(f"""
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule('{PARTITION_CRON_JOB}', '15 0 * * *',
+            'SELECT create_transaction_partitions({PARTITION_MONTHS_AHEAD})');
+    END IF;
+END
+$$
+""")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(f"""
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.unschedule(jobid) FROM cron.job WHERE jobname = '{PARTITION_CRON_JOB}';
+    END IF;
+END
+$$
+""")
+        op.execute('DROP FUNCTION IF EXISTS create_transaction_partitions(integer)')
+        op.execute('CREATE TABLE transactions_unpartitioned (LIKE transactions INCLUDING DEFAULTS)')
+        op.execute('INSERT INTO transactions_unpartitioned SELECT * FROM transactions')
+        # Ikut menghapus semua partisinya
+        op.drop_table('transactions')
+        op.rename_table('transactions_unpartitioned', 'transactions')
+        op.alter_column('transactions', 'transaction_date', nullable=True)
+        op.create_primary_key(op.f('pk_transactions'), 'transactions', ['id'])
+        _create_transaction_constraints()
+
+    # Transaksi yang sudah diarsipkan tidak dikembalikan ke transactions
+    op.drop_index('ix_transactions_archive_user_id_transaction_date', table_name='transactions_archive')
+    op.drop_table('transactions_archive')
@@ -0,0 +1,53 @@
+"""Add product_variants
+
+Revision ID: c5a81f3e6d27
+Revises: b7e3d1a92c4f
+Create Date: 2026-10-18 18:02:37.415930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from wearspace_app.models.meta import UUIDColumn
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a81f3e6d27'
+down_revision = 'b7e3d1a92c4f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_variants',
+    sa.Column('product_id', UUIDColumn(length=36), nullable=False),
+    sa.Column('size', sa.String(length=10), nullable=False),
+    sa.Column('color', sa.String(length=50), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], name=op.f('fk_product_variants_product_id_products'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'size', 'color', name=op.f('pk_product_variants'))
+    )
+    op.create_index('ix_product_variants_color_product_id', 'product_variants', ['color', 'product_id'], unique=False)
+    op.create_index('ix_product_variants_size_color_product_id', 'product_variants', ['size', 'color', 'product_id'], unique=False)
+
+    # Isi awal: satu varian per kombinasi sizes x colors, stok NULL (tetap
+    # dibatasi products.stock sampai stok per varian diisi lewat API)
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.execute(
+            'INSERT INTO product_variants (product_id, size, color, stock) '
+            'SELECT DISTINCT products.id, s.size, c.color, NULL '
+            'FROM products, unnest(products.sizes) AS s(size), unnest(products.colors) AS c(color)'
+        )
+    elif dialect_name == 'sqlite':
+        op.execute(
+            'INSERT INTO product_variants (product_id, size, color, stock) '
+            'SELECT DISTINCT products.id, s.value, c.value, NULL '
+            'FROM products, json_each(products.sizes) AS s, json_each(products.colors) AS c'
+        )
+
+
+def downgrade():
+    op.drop_index('ix_product_variants_size_color_product_id', table_name='product_variants')
+    op.drop_index('ix_product_variants_color_product_id', table_name='product_variants')
+    op.drop_table('product_variants')
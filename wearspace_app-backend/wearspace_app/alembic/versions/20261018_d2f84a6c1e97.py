@@ -0,0 +1,42 @@
+"""Key products_fts rows by rowid through products_fts_ids (SQLite)
+
+Revision ID: d2f84a6c1e97
+Revises: b7e4c19a2d60
+Create Date: 2026-10-18 23:58:12.480115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f84a6c1e97'
+down_revision = 'b7e4c19a2d60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        'CREATE TABLE products_fts_ids ('
+        'rowid INTEGER PRIMARY KEY, product_id CHAR(36) NOT NULL UNIQUE)'
+    )
+    op.execute('INSERT INTO products_fts_ids (product_id) SELECT id FROM products')
+    # Isi ulang products_fts dengan rowid dari products_fts_ids
+    op.execute('DELETE FROM products_fts')
+    op.execute(
+        'INSERT INTO products_fts (rowid, product_id, name, description, material, brand_name) '
+        'SELECT products_fts_ids.rowid, products.id, products.name, products.description, '
+        'products.material, brands.name '
+        'FROM products JOIN brands ON brands.id = products.brand_id '
+        'JOIN products_fts_ids ON products_fts_ids.product_id = products.id'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    # Baris products_fts tetap valid; versi lama mencarinya lewat product_id
+    op.execute('DROP TABLE products_fts_ids')
@@ -0,0 +1,70 @@
+"""Add product_rankings checkpoint table
+
+Revision ID: e81c3b5d0a64
+Revises: 9d4b6e2a7f15
+Create Date: 2026-10-18 20:07:44.318520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from wearspace_app.models.meta import UUIDColumn
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81c3b5d0a64'
+down_revision = '9d4b6e2a7f15'
+branch_labels = None
+depends_on = None
+
+# Sama dengan default di wearspace_app/rankings.py
+HALF_LIFE = 3 * 24 * 60 * 60
+PURCHASE_WEIGHT = 3.0
+FAVORITE_WEIGHT = 1.0
+
+
+def upgrade():
+    op.create_table('product_rankings',
+    sa.Column('product_id', UUIDColumn(length=36), nullable=False),
+    sa.Column('trending_score', sa.Float(), nullable=False),
+    sa.Column('sales_count', sa.Integer(), nullable=False),
+    sa.Column('scored_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], name=op.f('fk_product_rankings_product_id_products'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', name=op.f('pk_product_rankings'))
+    )
+
+    # Isi awal dari riwayat transaksi dan favorit (sama dengan
+    # rankings.rebuild_rankings)
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.execute(
+            'INSERT INTO product_rankings (product_id, trending_score, sales_count, scored_at) '
+            'SELECT product_id, sum(score), sum(sales), now() FROM ('
+            f'SELECT product_id, {PURCHASE_WEIGHT} * quantity * '
+            f'power(0.5, extract(epoch FROM now() - transaction_date) / {HALF_LIFE}) AS score, '
+            'quantity AS sales FROM transactions '
+            "WHERE transaction_status != 'Dibatalkan' "
+            'UNION ALL '
+            f'SELECT product_id, {FAVORITE_WEIGHT} * '
+            f'power(0.5, extract(epoch FROM now() - created_at) / {HALF_LIFE}), 0 FROM favorites'
+            ') AS events GROUP BY product_id'
+        )
+    elif dialect_name == 'sqlite':
+        # SQLite belum tentu punya power(): event dalam satu half-life terakhir
+        # dihitung tanpa decay
+        op.execute(
+            'INSERT INTO product_rankings (product_id, trending_score, sales_count, scored_at) '
+            "SELECT product_id, sum(score), sum(sales), datetime('now') FROM ("
+            f'SELECT product_id, CASE WHEN (julianday(\'now\') - julianday(transaction_date)) * 86400 < {HALF_LIFE} '
+            f'THEN {PURCHASE_WEIGHT} * quantity ELSE 0 END AS score, '
+            'quantity AS sales FROM transactions '
+            "WHERE transaction_status != 'Dibatalkan' "
+            'UNION ALL '
+            f'SELECT product_id, CASE WHEN (julianday(\'now\') - julianday(created_at)) * 86400 < {HALF_LIFE} '
+            f'THEN {FAVORITE_WEIGHT} ELSE 0 END, 0 FROM favorites'
+            ') AS events GROUP BY product_id'
+        )
+
+
+def downgrade():
+    op.drop_table('product_rankings')
@@ -0,0 +1,170 @@
+# wearspace_app/archive.py
+import json
+import re
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, text
+from zope.sqlalchemy import mark_changed
+
+from .models import Product, Transaction, TransactionArchive, User
+from .sales import product_attributes
+from .serializers import get_serializer, serialize
+
+# Hanya transaksi yang statusnya tidak akan berubah lagi yang diarsipkan
+CLOSED_STATUSES = ('Berhasil', 'Dibatalkan')
+DEFAULT_ARCHIVE_MONTHS = 12
+DEFAULT_BATCH_SIZE = 1000
+# Partisi bulanan dibuat sekian bulan ke depan (PostgreSQL); sama dengan
+# horizon di migrasi b7e4c19a2d60
+PARTITION_MONTHS_AHEAD = 12
+
+PARTITION_NAME = re.compile(r'^transactions_(\d{4})_(\d{2})$')
+
+
+def archive_cutoff(months, now=None):
+    """
+    Awal bulan (UTC) ``months`` bulan sebelum bulan ini; transaksi sebelum
+    tanggal ini boleh diarsipkan.
+    """
+    now = now or datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 - months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def pack(transaction):
+    return zlib.compress(json.dumps(serialize(transaction), separators=(',', ':')).encode('utf-8'))
+
+
+def unpack(payload):
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+def archive_transactions(dbsession, cutoff, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Pindahkan satu batch transaksi selesai dengan transaction_date sebelum
+    ``cutoff`` ke transactions_archive. Mengembalikan jumlah yang dipindah;
+    panggil per transaksi database sampai hasilnya 0.
+
+    Rollup sales_daily tidak dikurangi: transaksi arsip tetap terhitung
+    sebagai penjualan. Kolom rollup (produk, brand, category, jumlah, harga)
+    disimpan terpisah dari payload supaya ``rebuild_sales``,
+    ``rebuild_rankings`` dan rebuild co-purchase tetap menghitungnya.
+    """
+    transactions = (
+        dbsession.query(Transaction)
+        .filter(
+            Transaction.transaction_status.in_(CLOSED_STATUSES),
+            Transaction.transaction_date < cutoff,
+        )
+        .order_by(Transaction.transaction_date, Transaction.id)
+        .limit(batch_size)
+        # Baris yang sedang diubah request lain dilewati, diarsipkan di run berikutnya
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not transactions:
+        return 0
+    products = product_attributes(dbsession, {t.product_id for t in transactions})
+    dbsession.execute(insert(TransactionArchive), [
+        {
+            'id': t.id,
+            'user_id': t.user_id,
+            'transaction_date': t.transaction_date,
+            'product_id': t.product_id,
+            'brand_id': products[t.product_id][0],
+            'category': products[t.product_id][1],
+            'payment_method': t.payment_method,
+            'transaction_status': t.transaction_status,
+            'quantity': t.quantity or 1,
+            'unit_price': t.unit_price if t.unit_price is not None else products[t.product_id][2],
+            'payload': pack(t),
+        }
+        for t in transactions
+    ])
+    dbsession.execute(
+        delete(Transaction)
+        # transaction_date ikut di WHERE supaya hanya partisi lama yang dibaca
+        .where(Transaction.id.in_([t.id for t in transactions]), Transaction.transaction_date < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    for t in transactions:
+        dbsession.expunge(t)
+    mark_changed(dbsession)
+    return len(transactions)
+
+
+def is_archived(dbsession, transaction_id):
+    return dbsession.query(TransactionArchive.id).filter(TransactionArchive.id == transaction_id).first() is not None
+
+
+def get_archived_transaction(dbsession, transaction_id, relations=(), fields=None):
+    """
+    Transaksi arsip dalam bentuk yang sama dengan ``serialize(Transaction)``,
+    atau ``None``. ``relations`` (product/user) dibaca dari tabel aslinya
+    kalau masih ada.
+    """
+    row = dbsession.get(TransactionArchive, transaction_id)
+    if row is None:
+        return None
+    payload = unpack(row.payload)
+    data = payload if fields is None else {key: value for key, value in payload.items() if key in fields}
+    related_ids = {'product': (Product, 'product_id'), 'user': (User, 'user_id')}
+    for name in relations:
+        model, key = related_ids[name]
+        related = dbsession.get(model, uuid.UUID(payload[key])) if payload.get(key) else None
+        if related is not None:
+            data[name] = get_serializer(model)(related)
+    return data
+
+
+def _is_partitioned(dbsession):
+    return dbsession.get_bind().dialect.name == 'postgresql' and dbsession.execute(
+        text("SELECT to_regprocedure('create_transaction_partitions(integer)') IS NOT NULL")
+    ).scalar()
+
+
+def ensure_partitions(dbsession, months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Buat partisi bulanan transactions sampai ``months_ahead`` bulan ke depan,
+    termasuk bulan yang barisnya sempat masuk ke partisi default.
+    Mengembalikan jumlah partisi baru (0 di luar PostgreSQL).
+    """
+    if not _is_partitioned(dbsession):
+        return 0
+    created = dbsession.execute(
+        text('SELECT create_transaction_partitions(:months)'), {'months': months_ahead}
+    ).scalar()
+    mark_changed(dbsession)
+    return created
+
+
+def drop_empty_partitions(dbsession, cutoff):
+    """
+    Hapus partisi bulanan yang seluruhnya sebelum ``cutoff`` dan sudah
+    kosong setelah diarsipkan. Mengembalikan nama partisi yang dihapus.
+    """
+    if not _is_partitioned(dbsession):
+        return []
+    names = dbsession.execute(text(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        "WHERE i.inhparent = 'transactions'::regclass ORDER BY c.relname"
+    )).scalars().all()
+    dropped = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if not match:
+            continue
+        year, month = int(match.group(1)), int(match.group(2))
+        end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+        if end > cutoff:
+            continue
+        # Nama sudah divalidasi regex, aman dipakai sebagai identifier
+        if dbsession.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{name}")')).scalar():
+            continue
+        dbsession.execute(text(f'DROP TABLE "{name}"'))
+        dropped.append(name)
+    if dropped:
+        mark_changed(dbsession)
+    return dropped
@@ -0,0 +1,63 @@
+# wearspace_app/brands.py
+from sqlalchemy import func, select
+from webob.exc import HTTPBadRequest
+
+from .models import Product
+
+# Batas ?top_products= untuk mode brand-index di GET /api/brands
+MAX_TOP_PRODUCTS = 20
+
+
+def parse_top_products(params):
+    value = params.get('top_products')
+    if value in (None, ''):
+        return 0
+    try:
+        value = int(value)
+    except ValueError:
+        raise HTTPBadRequest(json={'error': 'Invalid top_products. Must be an integer.'})
+    if value < 0 or value > MAX_TOP_PRODUCTS:
+        raise HTTPBadRequest(json={'error': f'Invalid top_products. Must be between 0 and {MAX_TOP_PRODUCTS}.'})
+    return value
+
+
+def count_products_by_brand(dbsession, brand_ids):
+    """
+    ``{brand_id: jumlah produk}`` dengan satu query GROUP BY.
+    """
+    if not brand_ids:
+        return {}
+    return dict(
+        dbsession.query(Product.brand_id, func.count(Product.id))
+        .filter(Product.brand_id.in_(brand_ids))
+        .group_by(Product.brand_id)
+    )
+
+
+def top_products_by_brand(dbsession, brand_ids, limit, sort_column, descending=False, options=()):
+    """
+    ``{brand_id: [Product, ...]}`` berisi paling banyak ``limit`` produk per
+    brand, diurutkan dengan ``sort_column``.
+
+    Semua brand diambil dalam satu query: ``row_number()`` dipartisi per
+    brand_id lalu difilter ``<= limit``, jadi jumlah query tidak bergantung
+    pada jumlah brand.
+    """
+    if not brand_ids or not limit:
+        return {}
+    order = [sort_column.desc(), Product.id.desc()] if descending else [sort_column, Product.id]
+    ranked = (
+        select(Product.id, func.row_number().over(partition_by=Product.brand_id, order_by=order).label('rank'))
+        .where(Product.brand_id.in_(brand_ids))
+        .subquery()
+    )
+    products = (
+        dbsession.query(Product).options(*options)
+        .join(ranked, ranked.c.id == Product.id)
+        .filter(ranked.c.rank <= limit)
+        .order_by(Product.brand_id, ranked.c.rank)
+    )
+    result = {}
+    for product in products:
+        result.setdefault(product.brand_id, []).append(product)
+    return result
@@ -0,0 +1,169 @@
+# wearspace_app/cache.py
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import transaction
+
+DEFAULT_MAX_ENTRIES = 512
+
+# Header pagination yang ikut disimpan bersama body
+CACHED_HEADERS = ('X-Next-Cursor', 'Link')
+
+_registry_lock = threading.Lock()
+
+
+class LRUCache(object):
+    """
+    Cache in-process dengan batas ukuran dan eviction LRU.
+
+    Entri dikelompokkan per namespace (misalnya ``'products'``). Setiap
+    namespace punya nomor generasi; ``invalidate`` menaikkan generasi dan
+    membuang entrinya, sehingga hasil query yang dimulai sebelum invalidasi
+    tidak akan pernah tersimpan. Semua operasi dijaga satu lock karena
+    waitress melayani request dari beberapa thread.
+
+    Generasi juga berfungsi sebagai version counter per tabel untuk ETag
+    (lihat wearspace_app/conditional.py); ``epoch`` membedakan proses.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.epoch = uuid.uuid4().hex[:8]
+        self.started_at = datetime.now(timezone.utc)
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._modified = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def version(self, namespace):
+        """
+        ``(generation, last_modified)`` untuk dipakai sebagai validator HTTP.
+        """
+        with self._lock:
+            return (
+                self._generations.get(namespace, 0),
+                self._modified.get(namespace, self.started_at),
+            )
+
+    def get(self, namespace, key):
+        with self._lock:
+            try:
+                value = self._entries[(namespace, key)]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return value
+
+    def set(self, namespace, key, value, generation):
+        with self._lock:
+            if generation != self._generations.get(namespace, 0):
+                # Ada write di tengah jalan, hasil ini mungkin sudah basi
+                return False
+            self._entries[(namespace, key)] = value
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._modified[namespace] = datetime.now(timezone.utc)
+            for entry_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[entry_key]
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+
+def get_catalog_cache(request):
+    registry = request.registry
+    cache = registry.get('catalog_cache')
+    if cache is None:
+        with _registry_lock:
+            cache = registry.get('catalog_cache')
+            if cache is None:
+                settings = registry.settings or {}
+                cache = LRUCache(int(settings.get('catalog_cache.max_entries', DEFAULT_MAX_ENTRIES)))
+                registry['catalog_cache'] = cache
+    return cache
+
+
+def cached_collection(request, namespace, build, key=None):
+    """
+    Read-through cache untuk list hasil serialisasi.
+
+    ``build`` dipanggil hanya saat cache miss; kuncinya adalah query string
+    request sehingga setiap kombinasi filter/halaman disimpan terpisah,
+    kecuali ``key`` diberikan sendiri.
+    """
+    cache = get_catalog_cache(request)
+    if key is None:
+        key = tuple(sorted(request.params.items()))
+    entry = cache.get(namespace, key)
+    if entry is not None:
+        items, headers = entry
+        request.response.headers.update(headers)
+        return items
+
+    generation = cache.generation(namespace)
+    items = build()
+    headers = {
+        name: request.response.headers[name]
+        for name in CACHED_HEADERS if name in request.response.headers
+    }
+    cache.set(namespace, key, (items, headers), generation)
+    return items
+
+
+def invalidate_on_commit(request, *namespaces):
+    """
+    Invalidasi namespace sekarang dan sekali lagi setelah transaksi commit.
+
+    Invalidasi kedua membuang entri yang sempat diisi ulang oleh request
+    lain dengan data lama sebelum perubahan ini terlihat di database.
+    """
+    cache = get_catalog_cache(request)
+    for namespace in namespaces:
+        cache.invalidate(namespace)
+
+    def after_commit(success):
+        if success:
+            for namespace in namespaces:
+                cache.invalidate(namespace)
+
+    tm = getattr(request, 'tm', None) or transaction.manager
+    tm.get().addAfterCommitHook(after_commit)
+
+
+def includeme(config):
+    settings = config.get_settings()
+    config.registry['catalog_cache'] = LRUCache(
+        int(settings.get('catalog_cache.max_entries', DEFAULT_MAX_ENTRIES))
+    )
@@ -0,0 +1,144 @@
+# wearspace_app/cards.py
+import uuid
+
+from sqlalchemy import delete, func, insert, select, update
+from webob.exc import HTTPBadRequest
+from zope.sqlalchemy import mark_changed
+
+from .catalog import FALSE_VALUES, TRUE_VALUES, in_stock_clause
+from .models import Brand, Favorite, Product, ProductCard
+
+# Nama sort di ?sort= sama dengan /api/products, masing-masing punya index
+CARD_SORT_KEYS = {
+    'created_at': ProductCard.created_at,
+    'price': ProductCard.price,
+    'name': ProductCard.name,
+}
+
+CARD_COLUMNS = (
+    'id', 'name', 'brand_id', 'brand_name', 'price', 'image_url',
+    'in_stock', 'favorite_count', 'created_at',
+)
+
+
+def _card_source(product_ids=None):
+    favorite_count = (
+        select(func.count()).select_from(Favorite)
+        .where(Favorite.product_id == Product.id)
+        .correlate(Product).scalar_subquery()
+    )
+    source = (
+        select(
+            Product.id, Product.name, Product.brand_id, Brand.name, Product.price,
+            Product.image_url, in_stock_clause(), favorite_count, Product.created_at,
+        )
+        .join(Brand, Brand.id == Product.brand_id)
+    )
+    if product_ids is not None:
+        source = source.where(Product.id.in_(product_ids))
+    return source
+
+
+def refresh_cards(dbsession, product_ids):
+    """
+    Bangun ulang kartu untuk produk yang baru dibuat/diubah, dengan satu
+    ``INSERT .. SELECT`` untuk seluruh ``product_ids``.
+    """
+    if not product_ids:
+        return
+    product_ids = list(product_ids)
+    dbsession.execute(
+        delete(ProductCard).where(ProductCard.id.in_(product_ids))
+        .execution_options(synchronize_session=False)
+    )
+    dbsession.execute(
+        insert(ProductCard).from_select(CARD_COLUMNS, _card_source(product_ids))
+    )
+    mark_changed(dbsession)
+
+
+def refresh_card_stock(dbsession, product_ids):
+    """
+    Sinkronkan ``in_stock`` setelah stok berubah (checkout). Baris hanya
+    ditulis kalau statusnya benar-benar berubah, jadi checkout biasa tidak
+    menambah write ke product_cards.
+    """
+    if not product_ids:
+        return
+    in_stock = (
+        select(in_stock_clause()).where(Product.id == ProductCard.id)
+        .correlate(ProductCard).scalar_subquery()
+    )
+    dbsession.execute(
+        update(ProductCard)
+        .where(ProductCard.id.in_(list(product_ids)), ProductCard.in_stock != in_stock)
+        .values(in_stock=in_stock)
+        .execution_options(synchronize_session=False)
+    )
+    mark_changed(dbsession)
+
+
+def adjust_favorite_count(dbsession, product_id, delta):
+    dbsession.execute(
+        update(ProductCard)
+        .where(ProductCard.id == product_id)
+        .values(favorite_count=ProductCard.favorite_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+    mark_changed(dbsession)
+
+
+def refresh_brand_cards(dbsession, brand_id):
+    """
+    Nama brand disalin ke setiap kartu, jadi rename brand memperbarui
+    semua kartu produknya.
+    """
+    dbsession.execute(
+        update(ProductCard)
+        .where(ProductCard.brand_id == brand_id)
+        .values(brand_name=select(Brand.name).where(Brand.id == brand_id).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+    mark_changed(dbsession)
+
+
+def remove_card(dbsession, product_id):
+    # FK ON DELETE CASCADE tidak aktif di SQLite, jadi dihapus eksplisit
+    dbsession.execute(
+        delete(ProductCard).where(ProductCard.id == product_id)
+        .execution_options(synchronize_session=False)
+    )
+    mark_changed(dbsession)
+
+
+def rebuild_cards(dbsession):
+    """
+    Isi ulang seluruh product_cards dari tabel sumber (setelah migrasi
+    atau seed data).
+    """
+    dbsession.execute(delete(ProductCard).execution_options(synchronize_session=False))
+    dbsession.execute(insert(ProductCard).from_select(CARD_COLUMNS, _card_source()))
+    mark_changed(dbsession)
+
+
+def apply_card_filters(query, params):
+    """
+    Filter ``brand_id`` dan ``in_stock`` untuk listing kartu.
+    """
+    brand_id = params.get('brand_id')
+    if brand_id:
+        try:
+            query = query.filter(ProductCard.brand_id == uuid.UUID(brand_id))
+        except ValueError:
+            raise HTTPBadRequest(json={'error': 'Invalid UUID format for brand ID.'})
+
+    in_stock = params.get('in_stock')
+    if in_stock:
+        in_stock = in_stock.lower()
+        if in_stock in TRUE_VALUES:
+            query = query.filter(ProductCard.in_stock.is_(True))
+        elif in_stock in FALSE_VALUES:
+            query = query.filter(ProductCard.in_stock.is_(False))
+        else:
+            raise HTTPBadRequest(json={'error': 'Invalid in_stock. Must be true or false.'})
+    return query
@@ -0,0 +1,130 @@
+# wearspace_app/catalog.py
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import exists, or_
+from webob.exc import HTTPBadRequest
+
+from .models import Product, ProductStockShard, ProductVariant
+
+# Nama sort yang boleh dipakai di ?sort=, awali dengan '-' untuk descending
+PRODUCT_SORT_KEYS = {
+    'created_at': Product.created_at,
+    'price': Product.price,
+    'name': Product.name,
+}
+DEFAULT_PRODUCT_SORT = 'created_at'
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def _parse_decimal(params, key):
+    value = params.get(key)
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise HTTPBadRequest(json={'error': f'Invalid {key}. Must be a number.'})
+
+
+def _shard_in_stock():
+    # Produk sharded menyimpan stoknya di product_stock_shards (products.stock = 0)
+    return exists().where(
+        ProductStockShard.product_id == Product.id, ProductStockShard.stock > 0
+    )
+
+
+def in_stock_clause():
+    """
+    Kondisi SQL "produk masih punya stok", termasuk produk sharded.
+    """
+    return or_(Product.stock > 0, _shard_in_stock())
+
+
+def variant_exists(size=None, color=None, available=False):
+    """
+    Kondisi SQL "produk punya varian ``size``/``color``". Size dan color
+    dicek pada varian yang sama ("size 42 warna Hitam"), jadi cukup satu
+    lookup ke index (size, color, product_id) di product_variants.
+    """
+    conditions = [ProductVariant.product_id == Product.id]
+    if size:
+        conditions.append(ProductVariant.size == size)
+    if color:
+        conditions.append(ProductVariant.color == color)
+    if available:
+        # Stok NULL: varian tidak dihitung sendiri, ikut stok produk
+        conditions.append(or_(ProductVariant.stock.is_(None), ProductVariant.stock > 0))
+    # Query facet sendiri memuat product_variants di FROM, jadi hanya
+    # products yang dikorelasikan
+    return exists().where(*conditions).correlate_except(ProductVariant)
+
+
+def apply_product_filters(query, params, dialect_name):
+    """
+    Terapkan filter katalog dari query string ke ``query`` Product.
+
+    Filter yang didukung: brand_id, category, material, price_min,
+    price_max, in_stock, size dan color. Semua filter digabung dengan AND
+    di dalam satu query SQL. Dengan in_stock=true, varian size/color yang
+    diminta juga harus masih punya stok.
+    """
+    brand_id = params.get('brand_id')
+    if brand_id:
+        try:
+            query = query.filter(Product.brand_id == uuid.UUID(brand_id))
+        except ValueError:
+            raise HTTPBadRequest(json={'error': 'Invalid UUID format for brand ID.'})
+
+    category = params.get('category')
+    if category:
+        query = query.filter(Product.category == category)
+
+    material = params.get('material')
+    if material:
+        query = query.filter(Product.material == material)
+
+    price_min = _parse_decimal(params, 'price_min')
+    if price_min is not None:
+        query = query.filter(Product.price >= price_min)
+
+    price_max = _parse_decimal(params, 'price_max')
+    if price_max is not None:
+        query = query.filter(Product.price <= price_max)
+
+    in_stock = params.get('in_stock')
+    available = False
+    if in_stock:
+        in_stock = in_stock.lower()
+        if in_stock in TRUE_VALUES:
+            query = query.filter(in_stock_clause())
+            available = True
+        elif in_stock in FALSE_VALUES:
+            query = query.filter(
+                or_(Product.stock <= 0, Product.stock.is_(None)), ~_shard_in_stock()
+            )
+        else:
+            raise HTTPBadRequest(json={'error': 'Invalid in_stock. Must be true or false.'})
+
+    size = params.get('size')
+    color = params.get('color')
+    if size or color:
+        query = query.filter(variant_exists(size, color, available))
+
+    return query
+
+
+def get_product_sort(params, sort_keys=PRODUCT_SORT_KEYS):
+    """
+    Mengembalikan ``(kolom, descending)`` dari ``?sort=``, misalnya ``-price``.
+    """
+    sort = params.get('sort') or DEFAULT_PRODUCT_SORT
+    descending = sort.startswith('-')
+    key = sort.lstrip('-')
+    if key not in sort_keys:
+        raise HTTPBadRequest(json={
+            'error': f"Invalid sort. Must be one of: {', '.join(sort_keys)}"
+        })
+    return sort_keys[key], descending
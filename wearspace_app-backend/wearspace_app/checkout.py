@@ -0,0 +1,96 @@
+# wearspace_app/checkout.py
+import uuid
+
+from sqlalchemy import insert
+from webob.exc import HTTPBadRequest
+
+from .inventory import reserve_stock_many
+from .models import Product, Transaction
+from .sales import product_attributes, record_sales
+from .variants import reserve_variants
+
+MAX_CHECKOUT_ITEMS = 100
+
+
+def parse_checkout_items(items):
+    """
+    Validasi ``items`` dari body ``/api/checkout``.
+
+    Setiap item berisi ``product_id``, ``size``, ``color`` dan ``qty``
+    (default 1). Mengembalikan list ``(product_id, size, color, qty)``.
+    """
+    if not isinstance(items, list) or not items:
+        raise HTTPBadRequest(json={'error': 'items must be a non-empty list.'})
+    if len(items) > MAX_CHECKOUT_ITEMS:
+        raise HTTPBadRequest(json={'error': f'Too many items (max {MAX_CHECKOUT_ITEMS}).'})
+
+    lines = []
+    for number, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            raise HTTPBadRequest(json={'error': f'Item {number} must be an object.'})
+        missing = [f for f in ('product_id', 'size', 'color') if not item.get(f)]
+        if missing:
+            raise HTTPBadRequest(json={'error': f'Item {number}: missing fields: {", ".join(missing)}'})
+        try:
+            product_id = uuid.UUID(str(item['product_id']))
+        except ValueError:
+            raise HTTPBadRequest(json={'error': f'Item {number}: invalid UUID format for product_id.'})
+        qty = item.get('qty', 1)
+        if isinstance(qty, bool) or not isinstance(qty, int) or qty < 1:
+            raise HTTPBadRequest(json={'error': f'Item {number}: qty must be a positive integer.'})
+        lines.append((product_id, item['size'], item['color'], qty))
+    return lines
+
+
+def place_order(dbsession, order, lines, user_id=None):
+    """
+    Reservasi stok untuk semua baris lalu buat satu Transaction per baris.
+
+    Stok dikurangi dengan satu UPDATE berbasis set
+    (``reserve_stock_many``) dan semua Transaction di-insert dengan satu
+    ``INSERT .. RETURNING`` (insertmanyvalues). Kalau ada produk yang tidak
+    ada atau stoknya kurang, HTTPBadRequest di-raise dan pyramid_tm
+    membatalkan seluruh transaksi database, termasuk stok yang sudah
+    dikurangi untuk produk lain. Stok per size/color (product_variants)
+    dikurangi setelah stok produk. Rollup sales_daily ikut diperbarui di
+    transaksi yang sama.
+    """
+    quantities = {}
+    for product_id, _, _, qty in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + qty
+
+    failed = reserve_stock_many(dbsession, quantities)
+    if failed:
+        found = set(pid for (pid,) in dbsession.query(Product.id).filter(Product.id.in_(failed)))
+        not_found = [pid for pid in failed if pid not in found]
+        raise HTTPBadRequest(json={
+            'error': 'Product not found.' if not_found else 'Product out of stock.',
+            'product_ids': [str(pid) for pid in (not_found or failed)],
+        })
+    unavailable, out_of_stock = reserve_variants(dbsession, lines)
+    if unavailable or out_of_stock:
+        raise HTTPBadRequest(json={
+            'error': 'Variant not available.' if unavailable else 'Variant out of stock.',
+            'product_ids': [str(pid) for pid in (unavailable or out_of_stock)],
+        })
+
+    products = product_attributes(dbsession, quantities)
+    records = [
+        {
+            'id': uuid.uuid4(),
+            'user_id': user_id,
+            'product_id': product_id,
+            'customer_name': order['customer_name'],
+            'shipping_address': order['shipping_address'],
+            'payment_method': order['payment_method'],
+            'purchased_size': size,
+            'purchased_color': color,
+            'quantity': qty,
+            'unit_price': products[product_id][2],
+            'transaction_status': 'Menunggu Pembayaran',
+        }
+        for product_id, size, color, qty in lines
+    ]
+    transactions = dbsession.scalars(insert(Transaction).returning(Transaction), records).all()
+    record_sales(dbsession, transactions, products=products)
+    return transactions
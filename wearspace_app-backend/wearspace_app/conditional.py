@@ -0,0 +1,101 @@
+# wearspace_app/conditional.py
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from webob.exc import HTTPNotFound, HTTPNotModified
+
+from .cache import get_catalog_cache
+
+
+def _make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _http_date(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header, etag):
+    # If-None-Match memakai weak comparison, jadi prefix W/ diabaikan
+    candidates = [c.strip() for c in header.split(',')]
+    return '*' in candidates or any(c.replace('W/', '', 1) == etag for c in candidates)
+
+
+def _not_modified_since(header, last_modified):
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _check(request, etag, last_modified):
+    """
+    Kirim 304 kalau validator dari client masih cocok, selain itu pasang
+    ETag/Last-Modified di response. If-None-Match didahulukan (RFC 7232).
+    """
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = _http_date(last_modified)
+
+    if_none_match = request.headers.get('If-None-Match')
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_none_match:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since and last_modified is not None:
+        not_modified = _not_modified_since(if_modified_since, last_modified)
+    else:
+        not_modified = False
+
+    if not_modified:
+        raise HTTPNotModified(headers=headers)
+    request.response.headers.update(headers)
+
+
+def check_collection(request, table, *tables):
+    """
+    Conditional GET untuk endpoint list.
+
+    ETag dibentuk dari version counter tabel (naik setiap write) dan query
+    string, jadi 304 bisa dikirim tanpa menyentuh database sama sekali.
+    ``tables`` tambahan dipakai kalau isi response bergantung pada lebih
+    dari satu tabel.
+    """
+    cache = get_catalog_cache(request)
+    versions = [cache.version(name) for name in (table,) + tables]
+    last_modified = max(modified for _, modified in versions)
+    params = sorted(request.params.items())
+    etag = _make_etag(table, *tables, cache.epoch, *[generation for generation, _ in versions], params)
+    _check(request, etag, last_modified)
+
+
+def check_item(request, model, item_id, not_found_message):
+    """
+    Conditional GET untuk satu baris berdasarkan ``updated_at``.
+
+    Hanya kolom timestamp yang di-query. Version counter tabel ikut masuk
+    ETag karena CURRENT_TIMESTAMP di SQLite hanya beresolusi detik, jadi dua
+    update dalam detik yang sama tetap menghasilkan ETag berbeda. Query
+    string (mis. ``?fields=``) juga ikut, seperti ``check_collection``,
+    karena representasinya berbeda.
+    """
+    row = (
+        request.dbsession.query(model.updated_at, model.created_at)
+        .filter(model.id == item_id).first()
+    )
+    if row is None:
+        raise HTTPNotFound(json={'error': not_found_message})
+    last_modified = row.updated_at or row.created_at
+    cache = get_catalog_cache(request)
+    generation, _ = cache.version(model.__tablename__)
+    params = sorted(request.params.items())
+    etag = _make_etag(model.__tablename__, item_id, last_modified, cache.epoch, generation, params)
+    _check(request, etag, last_modified)
@@ -13,7 +13,7 @@ def cors_tween_factory(handler, registry):
             response.headers['Access-Control-Allow-Origin'] = allowed_origin
             response.headers['Access-Control-Allow-Credentials'] = 'true'
             response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, If-None-Match, If-Modified-Since, Idempotency-Key'
             response.headers['Access-Control-Max-Age'] = '3600'
             
             return response
@@ -23,7 +23,9 @@ def cors_tween_factory(handler, registry):
         response.headers['Access-Control-Allow-Origin'] = allowed_origin
         response.headers['Access-Control-Allow-Credentials'] = 'true'
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, If-None-Match, If-Modified-Since, Idempotency-Key'
+        # Supaya frontend bisa membaca cursor pagination
+        response.headers['Access-Control-Expose-Headers'] = 'X-Next-Cursor, Link, ETag, Last-Modified, Idempotent-Replayed, X-Transaction-Archived'
         
         return response
 
@@ -0,0 +1,104 @@
+# wearspace_app/export.py
+import csv
+import io
+
+from pyramid.response import Response
+from sqlalchemy.orm import object_session
+from webob.exc import HTTPNotFound
+
+from .importer import LIST_SEPARATOR
+from .inventory import fill_sharded_stock
+from .models import Product, Transaction
+from .renderers import dumps
+from .serializers import column_keys, get_serializer, load_only_options, parse_fields
+from .streaming import iter_chunks, iter_query
+
+# entity -> (model, urutan baris); urutan mengikuti index keyset yang sudah ada
+EXPORT_ENTITIES = {
+    'products': (Product, ('created_at', 'id')),
+    'transactions': (Transaction, ('transaction_date', 'id')),
+}
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+
+def _csv_value(value):
+    # sizes/colors ditulis dengan format yang sama seperti bulk import
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(str(v) for v in value)
+    return value
+
+
+def _csv_lines(rows, keys):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(keys)
+    yield take()
+    for row in rows:
+        writer.writerow([_csv_value(row[key]) for key in keys])
+        yield take()
+
+
+def export_response(request, entity, fmt):
+    """
+    Response streaming untuk ``/api/export/{entity}.{format}``.
+
+    Baris dibaca lewat server-side cursor (``iter_query``) dan ditulis ke
+    ``app_iter`` per chunk, jadi byte pertama terkirim sebelum seluruh
+    tabel selesai dibaca dan memori tidak bergantung pada ukuran tabel.
+    ``?fields=`` membatasi kolom seperti pada endpoint GET lainnya.
+    """
+    if entity not in EXPORT_ENTITIES or fmt not in EXPORT_CONTENT_TYPES:
+        raise HTTPNotFound(json={'error': f'Unknown export: {entity}.{fmt}'})
+    model, order_by = EXPORT_ENTITIES[entity]
+    fields, _ = parse_fields(request, model)
+    keys = list(fields) if fields is not None else column_keys(model)
+    required = [getattr(model, name) for name in order_by]
+    serializer = get_serializer(model, fields)
+    if model is Product and 'stock' in keys:
+        # Stok produk sharded dijumlahkan dari shard-nya (jarang, hanya SKU flash sale)
+        required.append(Product.stock_shards)
+        plain = serializer
+
+        def serializer(product):
+            row = plain(product)
+            if product.stock_shards:
+                fill_sharded_stock(object_session(product), [product], [row])
+            return row
+    options = load_only_options(model, fields, required)
+
+    rows = iter_query(
+        request,
+        lambda session: (
+            session.query(model).options(*options)
+            .order_by(*[getattr(model, name) for name in order_by])
+        ),
+        serializer
+    )
+    if fmt == 'ndjson':
+        body = _ndjson_lines(rows)
+    else:
+        body = _csv_lines(rows, keys)
+
+    response = Response(
+        app_iter=iter_chunks(body),
+        content_type=EXPORT_CONTENT_TYPES[fmt],
+        charset='utf-8',
+    )
+    response.content_disposition = f'attachment; filename="{entity}.{fmt}"'
+    return response
@@ -0,0 +1,133 @@
+# wearspace_app/facets.py
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import case, distinct, func
+
+from .catalog import apply_product_filters
+from .models import Brand, Product, ProductVariant
+
+# Batas bawah bucket harga (Rupiah); bucket terakhir tidak punya batas atas
+DEFAULT_PRICE_BUCKETS = (100000, 250000, 500000, 1000000)
+
+# facet -> parameter filter miliknya. Setiap facet dihitung dengan semua
+# filter lain kecuali filternya sendiri, supaya sidebar tetap menampilkan
+# pilihan lain (mis. brand lain) setelah satu nilai dipilih.
+FACET_FILTERS = {
+    'brand': ('brand_id',),
+    'category': ('category',),
+    'material': ('material',),
+    'size': ('size',),
+    'color': ('color',),
+    'price': ('price_min', 'price_max'),
+}
+FILTER_KEYS = ('brand_id', 'category', 'material', 'price_min', 'price_max', 'in_stock', 'size', 'color')
+
+
+def get_price_buckets(settings):
+    value = (settings or {}).get('api.facets.price_buckets')
+    if not value:
+        return [Decimal(edge) for edge in DEFAULT_PRICE_BUCKETS]
+    try:
+        edges = sorted(Decimal(edge) for edge in value.split())
+    except InvalidOperation:
+        raise ValueError(f'Invalid api.facets.price_buckets: {value}')
+    return edges
+
+
+def filter_signature(params):
+    """
+    Kunci cache facet: hanya parameter filter, jadi ?limit=, ?sort= dan
+    sejenisnya tidak membuat entri cache baru.
+    """
+    return tuple(sorted((key, params[key]) for key in FILTER_KEYS if params.get(key)))
+
+
+class ProductFacets(object):
+    """
+    Hitung jumlah produk per brand, category, material, size, color dan
+    bucket harga dengan query GROUP BY, satu query per facet.
+
+    Size dan color dihitung dari tabel product_variants, jadi query yang
+    sama berjalan di PostgreSQL maupun SQLite.
+    """
+
+    def __init__(self, dbsession, params, price_buckets):
+        self.dbsession = dbsession
+        self.params = {key: params[key] for key in FILTER_KEYS if params.get(key)}
+        self.price_buckets = price_buckets
+        self.dialect_name = dbsession.get_bind().dialect.name
+
+    def _filtered(self, query, facet=None):
+        excluded = FACET_FILTERS.get(facet, ())
+        params = {key: value for key, value in self.params.items() if key not in excluded}
+        return apply_product_filters(query, params, self.dialect_name)
+
+    def _values(self, column, facet):
+        rows = (
+            self._filtered(self.dbsession.query(column, func.count(Product.id)), facet)
+            .filter(column.isnot(None))
+            .group_by(column)
+            .order_by(func.count(Product.id).desc(), column)
+        )
+        return [{'value': value, 'count': count} for value, count in rows]
+
+    def _variant_values(self, column, facet):
+        count = func.count(distinct(Product.id))
+        query = self._filtered(
+            self.dbsession.query(column, count)
+            .select_from(Product).join(ProductVariant, ProductVariant.product_id == Product.id),
+            facet
+        )
+        # Facet size dengan ?color= terpilih hanya menghitung size yang ada
+        # dalam warna itu (dan sebaliknya)
+        other = 'color' if facet == 'size' else 'size'
+        if self.params.get(other):
+            query = query.filter(getattr(ProductVariant, other) == self.params[other])
+        rows = query.group_by(column).order_by(count.desc(), column)
+        return [{'value': value, 'count': count} for value, count in rows]
+
+    def _brands(self):
+        count = func.count(Product.id)
+        rows = (
+            self._filtered(
+                self.dbsession.query(Brand.id, Brand.name, count)
+                .select_from(Product).join(Brand, Brand.id == Product.brand_id),
+                'brand'
+            )
+            .group_by(Brand.id, Brand.name)
+            .order_by(count.desc(), Brand.name)
+        )
+        return [{'value': str(brand_id), 'name': name, 'count': count} for brand_id, name, count in rows]
+
+    def _prices(self):
+        edges = self.price_buckets
+        bucket = case(
+            *[(Product.price < edge, index) for index, edge in enumerate(edges)],
+            else_=len(edges)
+        )
+        counts = dict(
+            self._filtered(self.dbsession.query(bucket, func.count(Product.id)), 'price')
+            .group_by(bucket)
+        )
+        # Bucket kosong tetap dikirim supaya sidebar punya rentang yang tetap
+        bounds = [None] + list(edges) + [None]
+        return [
+            {
+                'min': float(bounds[index] or 0),
+                'max': float(bounds[index + 1]) if bounds[index + 1] is not None else None,
+                'count': counts.get(index, 0),
+            }
+            for index in range(len(edges) + 1)
+        ]
+
+    def compute(self):
+        total = self._filtered(self.dbsession.query(func.count(Product.id))).scalar()
+        return {
+            'total': total,
+            'brand': self._brands(),
+            'category': self._values(Product.category, 'category'),
+            'material': self._values(Product.material, 'material'),
+            'size': self._variant_values(ProductVariant.size, 'size'),
+            'color': self._variant_values(ProductVariant.color, 'color'),
+            'price': self._prices(),
+        }
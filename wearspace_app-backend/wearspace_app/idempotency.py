@@ -0,0 +1,247 @@
+# wearspace_app/idempotency.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import transaction
+from pyramid.response import Response
+from sqlalchemy.exc import IntegrityError
+from webob.exc import HTTPBadRequest, HTTPConflict, HTTPUnprocessableEntity
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+# Ditambahkan ke response hasil replay
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 10000
+MAX_KEY_LENGTH = 255
+# Klaim key yang sedang diproses di backend memory; kalau hook transaksi
+# tidak pernah dipanggil, klaimnya kedaluwarsa sendiri
+IN_PROGRESS_TTL = 60
+
+_registry_lock = threading.Lock()
+
+
+def request_fingerprint(request, name):
+    """
+    Hash body JSON (urutan key diabaikan) plus nama endpoint, untuk
+    mendeteksi key yang dipakai ulang dengan request yang berbeda.
+    """
+    try:
+        payload = json.dumps(request.json_body, sort_keys=True, separators=(',', ':'), default=str)
+    except ValueError:
+        payload = request.body.decode('utf-8', 'replace')
+    return hashlib.sha256(f'{name}\n{payload}'.encode('utf-8')).hexdigest()
+
+
+def _check(request_hash, status, body, fingerprint):
+    if request_hash != fingerprint:
+        raise HTTPUnprocessableEntity(json={
+            'error': f'{IDEMPOTENCY_HEADER} was already used for a different request.'
+        })
+    if status is None:
+        raise HTTPConflict(json={
+            'error': f'A request with this {IDEMPOTENCY_HEADER} is still being processed.'
+        })
+    return status, body
+
+
+def _transaction_manager(request):
+    return getattr(request, 'tm', None) or transaction.manager
+
+
+class MemoryIdempotencyStore(object):
+    """
+    Key store in-process dengan batas ukuran (LRU) dan TTL per entri.
+
+    Cocok untuk satu proses waitress. Response baru disimpan setelah
+    transaksi database commit, jadi replay tidak pernah menunjuk ke
+    transaksi yang dibatalkan.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # (scope, key) -> (expires_at, request_hash, status, body)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _put(self, entry_key, entry):
+        self._entries[entry_key] = entry
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def claim(self, request, scope, key, fingerprint):
+        entry_key = (scope, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None or entry[0] <= now:
+                self._put(entry_key, (now + IN_PROGRESS_TTL, fingerprint, None, None))
+                return None
+            self._entries.move_to_end(entry_key)
+        return _check(*entry[1:], fingerprint)
+
+    def complete(self, request, scope, key, fingerprint, response):
+        entry_key = (scope, key)
+        status, body = response.status_code, response.body
+
+        def after_commit(success):
+            with self._lock:
+                if success:
+                    self._put(entry_key, (time.monotonic() + self.ttl, fingerprint, status, body))
+                else:
+                    self._entries.pop(entry_key, None)
+
+        _transaction_manager(request).get().addAfterCommitHook(after_commit)
+
+    def release(self, request, scope, key):
+        with self._lock:
+            self._entries.pop((scope, key), None)
+
+    abort = release
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _as_utc(value):
+    # SQLite mengembalikan datetime tanpa zona waktu
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class DatabaseIdempotencyStore(object):
+    """
+    Key store di tabel ``idempotency_keys``, dipakai bersama oleh semua
+    proses/instance.
+
+    Klaim key ditulis di transaksi yang sama dengan stok dan Transaction,
+    jadi response tersimpan kalau dan hanya kalau order-nya commit; kalau
+    request gagal, pyramid_tm membatalkan klaimnya juga. Request kedua
+    dengan key yang sama tertahan di primary key sampai request pertama
+    selesai.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+
+    def claim(self, request, scope, key, fingerprint):
+        dbsession = request.dbsession
+        now = datetime.now(timezone.utc)
+        row = dbsession.query(IdempotencyKey).get((scope, key))
+        if row is not None and _as_utc(row.expires_at) <= now:
+            dbsession.delete(row)
+            dbsession.flush()
+            row = None
+        if row is None:
+            # Sekalian buang key kedaluwarsa milik user yang sama
+            dbsession.query(IdempotencyKey).filter(
+                IdempotencyKey.user_key == scope,
+                IdempotencyKey.expires_at <= now,
+            ).delete(synchronize_session=False)
+            try:
+                with dbsession.begin_nested():
+                    dbsession.add(IdempotencyKey(
+                        user_key=scope, key=key, request_hash=fingerprint,
+                        expires_at=now + timedelta(seconds=self.ttl),
+                    ))
+                return None
+            except IntegrityError:
+                # Request lain dengan key yang sama commit lebih dulu
+                row = dbsession.query(IdempotencyKey).get((scope, key))
+                if row is None:
+                    raise HTTPConflict(json={
+                        'error': f'A request with this {IDEMPOTENCY_HEADER} is still being processed.'
+                    })
+        body = row.response_body.encode('utf-8') if row.response_body is not None else None
+        return _check(row.request_hash, row.status_code, body, fingerprint)
+
+    def complete(self, request, scope, key, fingerprint, response):
+        row = request.dbsession.query(IdempotencyKey).get((scope, key))
+        row.status_code = response.status_code
+        row.response_body = response.body.decode('utf-8')
+
+    def release(self, request, scope, key):
+        request.dbsession.query(IdempotencyKey).filter(
+            IdempotencyKey.user_key == scope, IdempotencyKey.key == key
+        ).delete(synchronize_session=False)
+
+    def abort(self, request, scope, key):
+        # Handler raise: pyramid_tm membatalkan klaim bersama transaksi request
+        pass
+
+
+def create_store(settings):
+    ttl = int(settings.get('idempotency.ttl', DEFAULT_TTL))
+    backend = settings.get('idempotency.backend', 'memory')
+    if backend == 'memory':
+        return MemoryIdempotencyStore(
+            int(settings.get('idempotency.max_entries', DEFAULT_MAX_ENTRIES)), ttl
+        )
+    if backend == 'database':
+        return DatabaseIdempotencyStore(ttl)
+    raise ValueError(f'Unknown idempotency.backend: {backend}')
+
+
+def get_idempotency_store(request):
+    registry = request.registry
+    store = registry.get('idempotency_store')
+    if store is None:
+        with _registry_lock:
+            store = registry.get('idempotency_store')
+            if store is None:
+                store = create_store(registry.settings or {})
+                registry['idempotency_store'] = store
+    return store
+
+
+def idempotent(request, name, handler):
+    """
+    Jalankan ``handler`` sekali per (user, ``Idempotency-Key``).
+
+    Tanpa header, ``handler`` langsung dipanggil. Dengan header, response
+    sukses pertama (2xx) disimpan selama TTL dan request berikutnya dengan
+    key yang sama mendapat response itu lagi tanpa menyentuh Product atau
+    Transaction. Key yang dipakai untuk body berbeda ditolak dengan 422,
+    dan key yang request pertamanya belum selesai mendapat 409.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return handler()
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPBadRequest(json={
+            'error': f'{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters.'
+        })
+
+    store = get_idempotency_store(request)
+    scope = request.authenticated_userid or 'anonymous'
+    fingerprint = request_fingerprint(request, name)
+    stored = store.claim(request, scope, key, fingerprint)
+    if stored is not None:
+        status, body = stored
+        response = Response(body=body, status=status, content_type='application/json', charset='utf-8')
+        response.headers[REPLAYED_HEADER] = 'true'
+        return response
+
+    try:
+        response = handler()
+    except Exception:
+        store.abort(request, scope, key)
+        raise
+    if 200 <= response.status_code < 300:
+        store.complete(request, scope, key, fingerprint, response)
+    else:
+        store.release(request, scope, key)
+    return response
+
+
+def includeme(config):
+    config.registry['idempotency_store'] = create_store(config.get_settings())
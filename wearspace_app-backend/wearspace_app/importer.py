@@ -0,0 +1,337 @@
+# wearspace_app/importer.py
+import csv
+import io
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import func
+from sqlalchemy.exc import DBAPIError
+from webob.exc import HTTPUnsupportedMediaType
+from zope.sqlalchemy import mark_changed
+
+from .models import Brand, Product
+from .cards import refresh_cards
+from .search import index_products
+from .variants import insert_variants
+
+IMPORT_BATCH_SIZE = 1000
+READ_BUFFER_SIZE = 64 * 1024
+# Error per baris yang dikirim balik dibatasi, jumlah totalnya tetap dihitung
+MAX_REPORTED_ERRORS = 1000
+# Pemisah sizes/colors di CSV, mis. "S|M|L" (NDJSON memakai array biasa)
+LIST_SEPARATOR = '|'
+
+CSV_TYPES = ('text/csv', 'application/csv')
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/x-jsonlines')
+
+COPY_COLUMNS = (
+    'id', 'name', 'brand_id', 'price', 'description', 'image_url',
+    'material', 'category', 'stock', 'sizes', 'colors',
+)
+
+_columns = Product.__table__.c
+MAX_PRICE = Decimal(10) ** (_columns.price.type.precision - _columns.price.type.scale)
+
+
+def detect_format(request):
+    """
+    ``csv`` atau ``ndjson`` dari ``?format=`` atau header Content-Type.
+    """
+    fmt = (request.params.get('format') or '').lower()
+    if not fmt:
+        content_type = request.content_type or ''
+        if content_type in CSV_TYPES:
+            fmt = 'csv'
+        elif content_type in NDJSON_TYPES:
+            fmt = 'ndjson'
+    if fmt not in ('csv', 'ndjson'):
+        raise HTTPUnsupportedMediaType(json={
+            'error': 'Import expects text/csv or application/x-ndjson (or ?format=csv|ndjson).'
+        })
+    return fmt
+
+
+def _buffered(stream):
+    # wsgi.input dari waitress dibungkus webob sebagai raw stream; tanpa
+    # buffer, iterasi per baris akan membaca byte demi byte
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream, READ_BUFFER_SIZE)
+    return stream
+
+
+def iter_csv(stream):
+    text = io.TextIOWrapper(_buffered(stream), encoding='utf-8-sig', newline='')
+    try:
+        for row in csv.DictReader(text):
+            yield row
+    finally:
+        # Jangan ikut menutup body request
+        text.detach()
+
+
+def iter_ndjson(stream):
+    for line in _buffered(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f'Invalid JSON: {e}')
+
+
+def read_rows(stream, fmt):
+    """
+    Baca body request baris demi baris. Baris NDJSON yang tidak valid
+    dikembalikan sebagai ``ValueError`` supaya bisa dilaporkan per baris.
+    """
+    return iter_csv(stream) if fmt == 'csv' else iter_ndjson(stream)
+
+
+def _text(raw, key, required=False):
+    value = raw.get(key)
+    value = '' if value is None else str(value).strip()
+    if not value:
+        if required:
+            raise ValueError(f'Missing field: {key}')
+        return None
+    max_length = getattr(_columns[key].type, 'length', None)
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{key} exceeds {max_length} characters')
+    return value
+
+
+def _list(raw, key):
+    value = raw.get(key)
+    if isinstance(value, str):
+        value = value.split(LIST_SEPARATOR)
+    if not isinstance(value, list):
+        value = []
+    value = [str(v).strip() for v in value if v is not None and str(v).strip()]
+    if not value:
+        raise ValueError(f'Missing field: {key}')
+    max_length = _columns[key].type.item_type.length
+    too_long = [v for v in value if len(v) > max_length]
+    if too_long:
+        raise ValueError(f'{key} value {too_long[0]!r} exceeds {max_length} characters')
+    return value
+
+
+def parse_product_row(raw):
+    """
+    Validasi satu baris import.
+
+    Mengembalikan ``(record, brand_id, brand_name)``; ``record`` sudah siap
+    di-insert kecuali ``brand_id`` yang di-resolve per batch oleh
+    ``BrandLookup``. Baris tidak valid menghasilkan ``ValueError``.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError('Row must be an object.')
+
+    try:
+        price = Decimal(str(raw.get('price')).strip())
+    except InvalidOperation:
+        raise ValueError('Invalid price.')
+    if not price.is_finite() or price < 0 or price >= MAX_PRICE:
+        raise ValueError('Invalid price.')
+
+    stock = raw.get('stock')
+    try:
+        stock = int(str(stock).strip())
+    except ValueError:
+        raise ValueError('Invalid stock.')
+    if stock < 0:
+        raise ValueError('Invalid stock.')
+
+    brand_id = _text(raw, 'brand_id')
+    brand_name = raw.get('brand')
+    brand_name = '' if brand_name is None else str(brand_name).strip()
+    if brand_id:
+        try:
+            brand_id = uuid.UUID(brand_id)
+        except ValueError:
+            raise ValueError('Invalid UUID format for brand ID.')
+    elif not brand_name:
+        raise ValueError('Missing field: brand_id or brand')
+
+    record = {
+        'id': uuid.uuid4(),
+        'name': _text(raw, 'name', required=True),
+        'brand_id': None,
+        'price': price,
+        'description': _text(raw, 'description'),
+        'image_url': _text(raw, 'image_url'),
+        'material': _text(raw, 'material'),
+        'category': _text(raw, 'category'),
+        'stock': stock,
+        'sizes': _list(raw, 'sizes'),
+        'colors': _list(raw, 'colors'),
+    }
+    return record, brand_id, brand_name
+
+
+class BrandLookup(object):
+    """
+    Resolusi brand (ID atau nama) dengan cache selama satu import.
+
+    Setiap batch hanya men-query brand yang belum pernah terlihat, dalam
+    satu query ``IN``, bukan satu ``query(Brand).get()`` per baris.
+    """
+
+    def __init__(self, dbsession):
+        self.dbsession = dbsession
+        self._by_name = {}
+        self._ids = {}
+
+    def prefetch(self, brand_ids, brand_names):
+        ids = set(brand_ids) - set(self._ids)
+        if ids:
+            found = set(
+                brand_id for (brand_id,) in
+                self.dbsession.query(Brand.id).filter(Brand.id.in_(ids))
+            )
+            for brand_id in ids:
+                self._ids[brand_id] = brand_id in found
+
+        names = set(n.lower() for n in brand_names) - set(self._by_name)
+        if names:
+            for brand_id, name in (
+                self.dbsession.query(Brand.id, Brand.name)
+                .filter(func.lower(Brand.name).in_(names))
+            ):
+                self._by_name[name.lower()] = brand_id
+            for name in names:
+                self._by_name.setdefault(name, None)
+
+    def resolve(self, brand_id, brand_name):
+        if brand_id:
+            if not self._ids.get(brand_id):
+                raise ValueError('Brand not found for the given brand_id.')
+            return brand_id
+        resolved = self._by_name.get(brand_name.lower())
+        if resolved is None:
+            raise ValueError(f'Brand not found: {brand_name}')
+        return resolved
+
+
+def _pg_array(values):
+    items = (v.replace('\\', '\\\\').replace('"', '\\"') for v in values)
+    return '{' + ','.join(f'"{v}"' for v in items) + '}'
+
+
+def _copy_products(dbsession, records):
+    """
+    Insert lewat ``COPY ... FROM STDIN`` (psycopg2). Mengembalikan False
+    kalau driver tidak mendukung ``copy_expert``.
+    """
+    cursor = dbsession.connection().connection.cursor()
+    try:
+        if not hasattr(cursor, 'copy_expert'):
+            return False
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in records:
+            writer.writerow([
+                _pg_array(record[c]) if c in ('sizes', 'colors') else record[c]
+                for c in COPY_COLUMNS
+            ])
+        buffer.seek(0)
+        cursor.copy_expert(
+            f'COPY products ({", ".join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+        return True
+    finally:
+        cursor.close()
+
+
+class ProductImporter(object):
+    """
+    Bulk import produk per batch.
+
+    Baris yang tidak valid (validasi, brand tidak ditemukan, atau ditolak
+    database) dicatat sebagai error per baris tanpa membatalkan baris lain:
+    setiap batch dijalankan di dalam SAVEPOINT, dan kalau batch gagal,
+    barisnya diulang satu per satu untuk menemukan yang bermasalah.
+    """
+
+    def __init__(self, dbsession, batch_size=IMPORT_BATCH_SIZE):
+        self.dbsession = dbsession
+        self.batch_size = batch_size
+        self.brands = BrandLookup(dbsession)
+        dialect = dbsession.get_bind().dialect
+        self.use_copy = dialect.name == 'postgresql'
+        self.db_errors = (DBAPIError, dialect.loaded_dbapi.Error)
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        pending = []
+        for row_number, raw in enumerate(rows, start=1):
+            if isinstance(raw, Exception):
+                self._error(row_number, raw)
+                continue
+            try:
+                pending.append((row_number, parse_product_row(raw)))
+            except ValueError as e:
+                self._error(row_number, e)
+                continue
+            if len(pending) >= self.batch_size:
+                self._flush(pending)
+                pending = []
+        if pending:
+            self._flush(pending)
+        # Error validasi dicatat saat parsing, error brand/database saat flush
+        self.errors.sort(key=lambda error: error['row'])
+        return {'inserted': self.inserted, 'failed': self.failed, 'errors': self.errors}
+
+    def _error(self, row_number, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': str(error)})
+
+    def _flush(self, pending):
+        self.brands.prefetch(
+            [brand_id for _, (_, brand_id, _) in pending if brand_id],
+            [name for _, (_, brand_id, name) in pending if not brand_id],
+        )
+        batch = []
+        for row_number, (record, brand_id, brand_name) in pending:
+            try:
+                record['brand_id'] = self.brands.resolve(brand_id, brand_name)
+            except ValueError as e:
+                self._error(row_number, e)
+                continue
+            batch.append((row_number, record))
+        if not batch:
+            return
+
+        records = [record for _, record in batch]
+        try:
+            with self.dbsession.begin_nested():
+                self._insert(records)
+        except self.db_errors:
+            records = []
+            for row_number, record in batch:
+                try:
+                    with self.dbsession.begin_nested():
+                        self.dbsession.execute(Product.__table__.insert(), [record])
+                except self.db_errors as e:
+                    self._error(row_number, getattr(e, 'orig', None) or e)
+                else:
+                    records.append(record)
+
+        index_products(self.dbsession, [record['id'] for record in records])
+        refresh_cards(self.dbsession, [record['id'] for record in records])
+        insert_variants(self.dbsession, records)
+        self.inserted += len(records)
+        # Insert lewat Core tidak terlihat oleh zope.sqlalchemy
+        mark_changed(self.dbsession)
+
+    def _insert(self, records):
+        if self.use_copy and _copy_products(self.dbsession, records):
+            return
+        # executemany: satu statement untuk seluruh batch
+        self.dbsession.execute(Product.__table__.insert(), records)
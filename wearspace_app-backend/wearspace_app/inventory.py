@@ -0,0 +1,242 @@
+# wearspace_app/inventory.py
+import random
+
+from sqlalchemy import case, func, update
+from webob.exc import HTTPBadRequest
+from zope.sqlalchemy import mark_changed
+
+from .cards import refresh_card_stock
+from .models import Product, ProductStockShard
+
+MAX_STOCK_SHARDS = 64
+
+
+def reserve_stock(dbsession, product_id, quantity=1):
+    """
+    Kurangi stok secara atomik dengan satu conditional UPDATE.
+
+    ``UPDATE products SET stock = stock - :n WHERE id = :id AND stock >= :n``
+    dievaluasi ulang oleh database setelah row lock didapat, jadi checkout
+    yang berjalan bersamaan tidak bisa menjual melebihi stok. Produk dengan
+    ``stock_shards`` > 0 dikurangi dari salah satu shard (lihat
+    ``_reserve_sharded``). Mengembalikan sisa stok, atau ``None`` kalau
+    produk tidak ada / stoknya kurang.
+    """
+    stmt = (
+        update(Product)
+        .where(Product.id == product_id, Product.stock >= quantity)
+        .values(stock=Product.stock - quantity)
+        # Objek Product yang sudah ada di session tidak perlu ikut disinkronkan
+        .execution_options(synchronize_session=False)
+    )
+    dialect = dbsession.get_bind().dialect
+    if dialect.update_returning:
+        remaining = dbsession.execute(stmt.returning(Product.stock)).scalar()
+    else:
+        result = dbsession.execute(stmt)
+        remaining = None
+        if result.rowcount == 1:
+            remaining = dbsession.query(Product.stock).filter(Product.id == product_id).scalar()
+
+    if remaining is None:
+        # Stok produk sharded selalu 0 di baris products, jadi jalur ini
+        # hanya dicoba setelah UPDATE di atas tidak mengenai baris apa pun
+        shards = dbsession.query(Product.stock_shards).filter(Product.id == product_id).scalar()
+        if shards:
+            remaining = _reserve_sharded(dbsession, product_id, shards, quantity)
+    if remaining == 0:
+        # Stok habis: kartu katalog ikut berubah menjadi tidak tersedia
+        refresh_card_stock(dbsession, [product_id])
+    mark_changed(dbsession)
+    return remaining
+
+
+def reserve_stock_many(dbsession, quantities):
+    """
+    Reservasi stok beberapa produk sekaligus.
+
+    ``quantities`` adalah ``{product_id: jumlah}``. Semua produk dikurangi
+    dengan satu UPDATE berbasis set
+    (``SET stock = stock - CASE WHEN id = .. THEN .. END WHERE id IN (..)
+    AND stock >= CASE ..``) dan RETURNING menunjukkan produk mana yang
+    berhasil. Mengembalikan daftar product_id yang gagal (tidak ada atau
+    stok kurang); kalau daftar itu tidak kosong, pemanggil harus membatalkan
+    transaksi karena produk lain sudah terlanjur dikurangi.
+    """
+    if not quantities:
+        return []
+    dialect = dbsession.get_bind().dialect
+    if not dialect.update_returning:
+        return [pid for pid, qty in quantities.items() if reserve_stock(dbsession, pid, qty) is None]
+
+    # Bentuk "WHEN products.id = :id" supaya parameter id memakai tipe UUIDColumn
+    quantity = case(*[(Product.id == pid, qty) for pid, qty in quantities.items()])
+    remaining = dict(dbsession.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock >= quantity)
+        .values(stock=Product.stock - quantity)
+        .returning(Product.id, Product.stock)
+        .execution_options(synchronize_session=False)
+    ).all())
+    missing = [pid for pid in quantities if pid not in remaining]
+    if missing:
+        sharded = dict(
+            dbsession.query(Product.id, Product.stock_shards)
+            .filter(Product.id.in_(missing), Product.stock_shards > 0)
+        )
+        for pid in missing:
+            if pid in sharded:
+                left = _reserve_sharded(dbsession, pid, sharded[pid], quantities[pid])
+                if left is not None:
+                    remaining[pid] = left
+        missing = [pid for pid in missing if pid not in remaining]
+    refresh_card_stock(dbsession, [pid for pid, left in remaining.items() if left == 0])
+    mark_changed(dbsession)
+    return missing
+
+
+def _take(dbsession, product_id, shard, quantity):
+    result = dbsession.execute(
+        update(ProductStockShard)
+        .where(
+            ProductStockShard.product_id == product_id,
+            ProductStockShard.shard == shard,
+            ProductStockShard.stock >= quantity,
+        )
+        .values(stock=ProductStockShard.stock - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _reserve_sharded(dbsession, product_id, shards, quantity):
+    """
+    Ambil stok dari shard acak; kalau shard itu habis, coba shard lain yang
+    masih cukup. Kalau tidak ada satu shard pun yang cukup tetapi totalnya
+    cukup, stok diambil dari beberapa shard sekaligus di dalam SAVEPOINT.
+    """
+    start = random.randrange(shards)
+    if not _take(dbsession, product_id, start, quantity):
+        candidates = [
+            shard for (shard,) in dbsession.query(ProductStockShard.shard).filter(
+                ProductStockShard.product_id == product_id,
+                ProductStockShard.stock >= quantity,
+                ProductStockShard.shard != start,
+            )
+        ]
+        random.shuffle(candidates)
+        if not any(_take(dbsession, product_id, shard, quantity) for shard in candidates):
+            if not _take_spanning(dbsession, product_id, quantity):
+                return None
+    return shard_totals(dbsession, [product_id]).get(product_id, 0)
+
+
+def _take_spanning(dbsession, product_id, quantity):
+    rows = (
+        dbsession.query(ProductStockShard.shard, ProductStockShard.stock)
+        .filter(ProductStockShard.product_id == product_id, ProductStockShard.stock > 0)
+        .order_by(ProductStockShard.stock.desc())
+        .all()
+    )
+    if sum(stock for _, stock in rows) < quantity:
+        return False
+    savepoint = dbsession.begin_nested()
+    needed = quantity
+    for shard, stock in rows:
+        take = min(stock, needed)
+        if not _take(dbsession, product_id, shard, take):
+            # Shard sudah diambil pembeli lain di antara SELECT dan UPDATE
+            savepoint.rollback()
+            return False
+        needed -= take
+        if not needed:
+            break
+    savepoint.commit()
+    return True
+
+
+def shard_totals(dbsession, product_ids):
+    """
+    ``{product_id: jumlah stok semua shard}`` untuk produk yang sharded.
+    """
+    if not product_ids:
+        return {}
+    return dict(
+        dbsession.query(ProductStockShard.product_id, func.sum(ProductStockShard.stock))
+        .filter(ProductStockShard.product_id.in_(product_ids))
+        .group_by(ProductStockShard.product_id)
+    )
+
+
+def fill_sharded_stock(dbsession, products, rows):
+    """
+    Ganti ``stock`` hasil serialisasi dengan jumlah shard.
+
+    ``rows[i]`` adalah hasil serialisasi ``products[i]``. Hanya produk
+    dengan stok 0 di baris products yang dicek, dengan satu query GROUP BY.
+    """
+    ids = [p.id for p, row in zip(products, rows) if row.get('stock') == 0]
+    totals = shard_totals(dbsession, ids)
+    if totals:
+        for product, row in zip(products, rows):
+            if product.id in totals:
+                row['stock'] = totals[product.id]
+    return rows
+
+
+def _parse_count(value, name, maximum=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise HTTPBadRequest(json={'error': f'Invalid {name}.'})
+    if value < 0 or (maximum is not None and value > maximum):
+        raise HTTPBadRequest(json={'error': f'Invalid {name}.'})
+    return value
+
+
+def _split(stock, shards):
+    return [stock // shards + (1 if i < stock % shards else 0) for i in range(shards)]
+
+
+def configure_stock_shards(dbsession, product, shards, stock=None):
+    """
+    Aktifkan (``shards`` > 0), ubah jumlah, atau matikan (0) mode sharded.
+
+    Stok saat ini (atau ``stock`` kalau diberikan) dibagi rata ke shard
+    baru. Baris shard lama dikunci dulu supaya decrement yang sedang
+    berjalan tidak hilang saat stok dihitung ulang.
+    """
+    shards = _parse_count(shards, 'stock_shards', MAX_STOCK_SHARDS)
+    if stock is None:
+        locked = (
+            dbsession.query(ProductStockShard.stock)
+            .filter(ProductStockShard.product_id == product.id)
+            .with_for_update().all()
+        )
+        stock = sum(s for (s,) in locked) if product.stock_shards else (product.stock or 0)
+    stock = _parse_count(stock, 'stock')
+
+    dbsession.query(ProductStockShard).filter(
+        ProductStockShard.product_id == product.id
+    ).delete(synchronize_session=False)
+    dbsession.expire(product, ['shards'])
+    product.stock_shards = shards
+    if shards:
+        product.stock = 0
+        dbsession.add_all([
+            ProductStockShard(product_id=product.id, shard=i, stock=value)
+            for i, value in enumerate(_split(stock, shards))
+        ])
+    else:
+        product.stock = stock
+    dbsession.flush()
+
+
+def set_stock(dbsession, product, stock):
+    """
+    Set stok produk; untuk produk sharded stok dibagi ulang ke semua shard.
+    """
+    if product.stock_shards:
+        configure_stock_shards(dbsession, product, product.stock_shards, stock)
+    else:
+        product.stock = stock
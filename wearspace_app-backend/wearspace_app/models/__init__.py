@@ -1,4 +1,4 @@
-from sqlalchemy import engine_from_config
+from sqlalchemy import engine_from_config, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import configure_mappers
 import zope.sqlalchemy
@@ -7,10 +7,17 @@ import zope.sqlalchemy
 # Base.metadata prior to any initialization routines
 from .user import User
 from .transaction import Transaction
+from .transaction_archive import TransactionArchive
 from .brand import Brand
 from .product import Product
+from .product_card import ProductCard
+from .product_ranking import ProductRanking
+from .product_variant import ProductVariant, before_flush as sync_variants_before_flush
+from .stock_shard import ProductStockShard
+from .sales_daily import SalesDaily
 from .favorite import Favorite
 from .inspiration import Inspiration
+from .idempotency_key import IdempotencyKey
 
 from .meta import Base, UUIDColumn  # Import Base and UUIDColumn
 
@@ -20,12 +27,31 @@ configure_mappers()
 
 
 def get_engine(settings, prefix='sqlalchemy.'):
-    return engine_from_config(settings, prefix)
+    engine = engine_from_config(settings, prefix)
+    if engine.dialect.name == 'sqlite' and engine.dialect.driver == 'pysqlite':
+        _enable_sqlite_savepoints(engine)
+    return engine
+
+
+def _enable_sqlite_savepoints(engine):
+    # pysqlite baru mengirim BEGIN sebelum INSERT/UPDATE/DELETE, sehingga
+    # SAVEPOINT (session.begin_nested) bisa membuka transaksinya sendiri dan
+    # RELEASE langsung meng-commit. BEGIN dikirim sendiri oleh SQLAlchemy,
+    # sesuai resep di dokumentasi dialect SQLite.
+    @event.listens_for(engine, 'connect')
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def do_begin(conn):
+        conn.exec_driver_sql('BEGIN')
 
 
 def get_session_factory(engine):
     factory = sessionmaker()
     factory.configure(bind=engine)
+    # product_variants mengikuti sizes/colors produk di setiap flush
+    event.listen(factory, 'before_flush', sync_variants_before_flush)
     return factory
 
 
@@ -72,6 +98,10 @@ def includeme(config):
     # use pyramid_retry to retry a request when transient exceptions occur
     config.include('pyramid_retry')
 
+    # Serializer JSON per model dikompilasi sekali saat konfigurasi
+    from ..serializers import configure_serializers
+    configure_serializers(Base)
+
     session_factory = get_session_factory(get_engine(settings))
     config.registry['dbsession_factory'] = session_factory
 
@@ -1,12 +1,16 @@
 # your_project_name/models/brand.py
 import uuid
-from sqlalchemy import Column, DateTime, String
+from sqlalchemy import Column, DateTime, String, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .meta import Base, UUIDColumn
 
 class Brand(Base):
     __tablename__ = 'brands'
+    __table_args__ = (
+        # Index untuk keyset pagination (created_at, id)
+        Index('ix_brands_created_at_id', 'created_at', 'id'),
+    )
     id = Column(UUIDColumn, primary_key=True, default=uuid.uuid4)
     name = Column(String(255), unique=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
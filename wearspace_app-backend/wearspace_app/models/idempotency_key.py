@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy.sql import func
+from .meta import Base
+
+class IdempotencyKey(Base):
+    # Response pertama untuk setiap (user, Idempotency-Key); status_code NULL
+    # berarti request pertama masih diproses
+    __tablename__ = 'idempotency_keys'
+    user_key = Column(String(36), primary_key=True) # user ID atau 'anonymous'
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    response_body = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,11 +1,15 @@
 # your_project_name/models/inspiration.py
 import uuid
-from sqlalchemy import Column, DateTime, Text, String
+from sqlalchemy import Column, DateTime, Text, String, Index
 from sqlalchemy.sql import func
 from .meta import Base, UUIDColumn
 
 class Inspiration(Base):
     __tablename__ = 'inspirations'
+    __table_args__ = (
+        # Index untuk keyset pagination (created_at, id)
+        Index('ix_inspirations_created_at_id', 'created_at', 'id'),
+    )
     id = Column(UUIDColumn, primary_key=True, default=uuid.uuid4)
     title = Column(String(255), nullable=False)
     description = Column(Text)
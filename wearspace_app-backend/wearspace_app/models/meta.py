@@ -1,5 +1,7 @@
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.schema import MetaData
+from sqlalchemy.sql.functions import now
 from sqlalchemy.types import TypeDecorator, CHAR
 import uuid
 
@@ -17,6 +19,15 @@ NAMING_CONVENTION = {
 metadata = MetaData(naming_convention=NAMING_CONVENTION)
 Base = declarative_base(metadata=metadata)
 
+
+@compiles(now, 'sqlite')
+def sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP menyimpan 'YYYY-MM-DD HH:MM:SS' sedangkan DateTime
+    # SQLAlchemy menyimpan 'YYYY-MM-DD HH:MM:SS.ffffff'. Dengan format yang
+    # sama, kolom waktu bisa dibandingkan dan diurutkan apa adanya (keyset
+    # pagination memakai index (created_at, id) tanpa strftime).
+    return "(strftime('%Y-%m-%d %H:%M:%f', 'now') || '000')"
+
 class UUIDColumn(TypeDecorator):
     """
     UUIDType for SQLAlchemy, stores UUIDs as CHAR(32) and converts them to/from uuid.UUID objects.
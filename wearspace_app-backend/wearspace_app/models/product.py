@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, DateTime, Text, Integer, String, DECIMAL, ForeignKey
+from sqlalchemy import DDL, event, Column, DateTime, Text, Integer, String, DECIMAL, ForeignKey, Index, JSON
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -7,6 +7,16 @@ from .meta import Base, UUIDColumn
 
 class Product(Base):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Index untuk keyset pagination (created_at, id)
+        Index('ix_products_created_at_id', 'created_at', 'id'),
+        # Index untuk filter dan sort katalog (?brand_id=, ?category=, ?sort=)
+        Index('ix_products_brand_id_created_at_id', 'brand_id', 'created_at', 'id'),
+        Index('ix_products_category_created_at_id', 'category', 'created_at', 'id'),
+        Index('ix_products_price_id', 'price', 'id'),
+        Index('ix_products_name_id', 'name', 'id'),
+        # GIN index untuk sizes/colors hanya dibuat di migrasi PostgreSQL
+    )
     id = Column(UUIDColumn, primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
     brand_id = Column(UUIDColumn, ForeignKey('brands.id'), nullable=False)
@@ -16,8 +26,12 @@ class Product(Base):
     material = Column(String(100))
     category = Column(String(100))
     stock = Column(Integer, default=0)
-    sizes = Column(ARRAY(String(10)))
-    colors = Column(ARRAY(String(50)))
+    # > 0: mode sharded untuk SKU flash sale, stok ada di product_stock_shards
+    # (Product.stock = 0) dan dibaca sebagai jumlah semua shard
+    stock_shards = Column(Integer, nullable=False, default=0, server_default='0')
+    # ARRAY hanya ada di PostgreSQL, SQLite (production.ini) menyimpannya sebagai JSON
+    sizes = Column(ARRAY(String(10)).with_variant(JSON, 'sqlite'))
+    colors = Column(ARRAY(String(50)).with_variant(JSON, 'sqlite'))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -43,4 +57,47 @@ class Product(Base):
         passive_deletes=True,        # Biarkan database yang melakukan CASCADE
         lazy=True
     )
-    # --- AKHIR PERBAIKAN ---
\ No newline at end of file
+    # --- AKHIR PERBAIKAN ---
+
+    shards = relationship(
+        'ProductStockShard',
+        back_populates='product',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        lazy=True
+    )
+
+    # Tanpa passive_deletes: SQLite tidak menjalankan ON DELETE CASCADE,
+    # jadi varian dihapus oleh ORM
+    variants = relationship(
+        'ProductVariant',
+        back_populates='product',
+        cascade='all, delete-orphan',
+        order_by='(ProductVariant.size, ProductVariant.color)',
+        lazy=True
+    )
+
+
+# --- Indeks full-text produk (dipakai oleh wearspace_app/search.py) ---
+# Kolom/tabel ini sengaja tidak dipetakan ke model karena bentuknya berbeda
+# per database: tsvector + GIN di PostgreSQL, tabel bayangan FTS5 di SQLite.
+event.listen(Product.__table__, 'after_create', DDL(
+    'ALTER TABLE products ADD COLUMN search_vector tsvector'
+).execute_if(dialect='postgresql'))
+event.listen(Product.__table__, 'after_create', DDL(
+    'CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)'
+).execute_if(dialect='postgresql'))
+event.listen(Product.__table__, 'after_create', DDL(
+    'CREATE VIRTUAL TABLE products_fts USING fts5('
+    'product_id UNINDEXED, name, description, material, brand_name)'
+).execute_if(dialect='sqlite'))
+event.listen(Product.__table__, 'after_create', DDL(
+    'CREATE TABLE products_fts_ids ('
+    'rowid INTEGER PRIMARY KEY, product_id CHAR(36) NOT NULL UNIQUE)'
+).execute_if(dialect='sqlite'))
+event.listen(Product.__table__, 'after_drop', DDL(
+    'DROP TABLE IF EXISTS products_fts'
+).execute_if(dialect='sqlite'))
+event.listen(Product.__table__, 'after_drop', DDL(
+    'DROP TABLE IF EXISTS products_fts_ids'
+).execute_if(dialect='sqlite'))
\ No newline at end of file
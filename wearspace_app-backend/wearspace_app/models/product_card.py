@@ -0,0 +1,25 @@
+from sqlalchemy import Boolean, Column, DateTime, DECIMAL, ForeignKey, Index, Integer, String
+from .meta import Base, UUIDColumn
+
+class ProductCard(Base):
+    # Read model untuk kartu produk di katalog: satu baris per produk dengan
+    # nama brand, status stok dan jumlah favorit yang sudah dihitung, jadi
+    # listing tidak perlu join Brand/Favorite atau membaca shard stok.
+    # Dipelihara oleh wearspace_app/cards.py dari setiap jalur write.
+    __tablename__ = 'product_cards'
+    __table_args__ = (
+        # Satu index per urutan listing (?sort=) dan filter brand
+        Index('ix_product_cards_created_at_id', 'created_at', 'id'),
+        Index('ix_product_cards_price_id', 'price', 'id'),
+        Index('ix_product_cards_name_id', 'name', 'id'),
+        Index('ix_product_cards_brand_id_created_at_id', 'brand_id', 'created_at', 'id'),
+    )
+    id = Column(UUIDColumn, ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    name = Column(String(255), nullable=False)
+    brand_id = Column(UUIDColumn, nullable=False)
+    brand_name = Column(String(255))
+    price = Column(DECIMAL(10, 2), nullable=False)
+    image_url = Column(String(255))
+    in_stock = Column(Boolean, nullable=False, default=False)
+    favorite_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True))
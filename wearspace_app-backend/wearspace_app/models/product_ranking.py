@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+from .meta import Base, UUIDColumn
+
+class ProductRanking(Base):
+    # Checkpoint skor ranking in-process (wearspace_app/rankings.py).
+    # trending_score adalah nilai skor yang sudah di-decay pada scored_at;
+    # sales_count adalah jumlah unit terjual (transaksi yang tidak dibatalkan).
+    __tablename__ = 'product_rankings'
+    product_id = Column(UUIDColumn, ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    trending_score = Column(Float, nullable=False, default=0)
+    sales_count = Column(Integer, nullable=False, default=0)
+    scored_at = Column(DateTime(timezone=True))
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, inspect
+from sqlalchemy.orm import relationship
+from .meta import Base, UUIDColumn
+
+class ProductVariant(Base):
+    # Satu baris per kombinasi size/color. stock NULL berarti stok varian
+    # tidak dihitung sendiri (hanya dibatasi Product.stock), misalnya hasil
+    # backfill dari kolom sizes/colors
+    __tablename__ = 'product_variants'
+    __table_args__ = (
+        # Filter katalog "size X warna Y" / "warna Y" tanpa scan array
+        Index('ix_product_variants_size_color_product_id', 'size', 'color', 'product_id'),
+        Index('ix_product_variants_color_product_id', 'color', 'product_id'),
+    )
+    product_id = Column(UUIDColumn, ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    size = Column(String(10), primary_key=True)
+    color = Column(String(50), primary_key=True)
+    stock = Column(Integer)
+
+    product = relationship('Product', back_populates='variants')
+
+
+def sync_product_variants(product):
+    """
+    Samakan ``product.variants`` dengan ``sizes`` x ``colors``. Kombinasi
+    baru ditambahkan tanpa stok sendiri, kombinasi yang hilang dihapus
+    (delete-orphan), stok varian yang tetap ada tidak berubah.
+    """
+    wanted = [(size, color) for size in product.sizes or () for color in product.colors or ()]
+    wanted = list(dict.fromkeys(wanted))
+    existing = {(v.size, v.color): v for v in product.variants}
+    for key, variant in existing.items():
+        if key not in wanted:
+            product.variants.remove(variant)
+    for size, color in wanted:
+        if (size, color) not in existing:
+            product.variants.append(ProductVariant(size=size, color=color))
+
+
+def before_flush(session, flush_context, instances):
+    # Product baru atau yang sizes/colors-nya diubah langsung lewat ORM;
+    # kalau variants ikut di-set (variants.set_variants), varian itu dipakai
+    from .product import Product
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Product):
+            continue
+        attrs = inspect(obj).attrs
+        if attrs.variants.history.has_changes():
+            continue
+        if obj in session.new or attrs.sizes.history.has_changes() or attrs.colors.history.has_changes():
+            sync_product_variants(obj)
@@ -0,0 +1,20 @@
+from sqlalchemy import DECIMAL, Column, Date, Index, Integer, String
+from .meta import Base, UUIDColumn
+
+class SalesDaily(Base):
+    # Rollup penjualan per hari (UTC), brand, category, payment_method dan
+    # status transaksi (wearspace_app/sales.py). Diperbarui di unit of work
+    # yang sama dengan transaksi; category '' berarti produk tanpa category.
+    # brand_id sengaja tanpa FK supaya riwayat tetap ada setelah brand dihapus.
+    __tablename__ = 'sales_daily'
+    __table_args__ = (
+        Index('ix_sales_daily_brand_id_day', 'brand_id', 'day'),
+    )
+    day = Column(Date, primary_key=True)
+    brand_id = Column(UUIDColumn, primary_key=True)
+    category = Column(String(100), primary_key=True)
+    payment_method = Column(String(50), primary_key=True)
+    transaction_status = Column(String(50), primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(DECIMAL(14, 2), nullable=False, default=0)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import relationship
+from .meta import Base, UUIDColumn
+
+class ProductStockShard(Base):
+    # Satu baris counter stok per shard; checkout mengunci salah satu shard
+    # secara acak, bukan baris Product yang sama untuk setiap pembeli
+    __tablename__ = 'product_stock_shards'
+    product_id = Column(UUIDColumn, ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    stock = Column(Integer, nullable=False, default=0)
+
+    product = relationship('Product', back_populates='shards')
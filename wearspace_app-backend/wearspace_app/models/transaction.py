@@ -1,11 +1,25 @@
 import uuid
-from sqlalchemy import Column, DateTime, Text, Integer, String, DECIMAL, ForeignKey
+from sqlalchemy import Column, DateTime, Text, Integer, String, DECIMAL, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .meta import Base, UUIDColumn
 
 class Transaction(Base):
+    # Di PostgreSQL tabel ini dipartisi per bulan (RANGE transaction_date) dan
+    # primary key-nya (id, transaction_date); lihat migrasi b7e4c19a2d60.
+    # Transaksi lama yang sudah selesai dipindah ke transactions_archive.
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Index untuk keyset pagination (transaction_date, id)
+        Index('ix_transactions_transaction_date_id', 'transaction_date', 'id'),
+        # Refresh inkremental matriks co-purchase (recommendations.py)
+        Index('ix_transactions_updated_at', 'updated_at'),
+        # Filter listing GET /api/transactions (transactions.py): filter
+        # kesamaan di kolom pertama, urutan transaction_date dari index
+        Index('ix_transactions_user_id_transaction_date', 'user_id', 'transaction_date'),
+        Index('ix_transactions_transaction_status_transaction_date', 'transaction_status', 'transaction_date'),
+        Index('ix_transactions_product_id_transaction_date', 'product_id', 'transaction_date'),
+    )
     id = Column(UUIDColumn, primary_key=True, default=uuid.uuid4)
     user_id = Column(UUIDColumn, ForeignKey('users.id'))
     # --- PERBAIKAN DI SINI ---
@@ -18,6 +32,10 @@ class Transaction(Base):
     transaction_status = Column(String(50), nullable=False, default='Menunggu Pembayaran')
     purchased_size = Column(String(10), nullable=False)
     purchased_color = Column(String(50), nullable=False)
+    # Jumlah barang dalam satu baris transaksi (checkout multi-item)
+    quantity = Column(Integer, nullable=False, default=1, server_default='1')
+    # Harga satuan saat transaksi dibuat, dasar revenue di sales_daily
+    unit_price = Column(DECIMAL(10, 2))
     transaction_date = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
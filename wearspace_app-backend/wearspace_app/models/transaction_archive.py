@@ -0,0 +1,25 @@
+from sqlalchemy import DECIMAL, Column, DateTime, Index, Integer, LargeBinary, String
+from sqlalchemy.sql import func
+from .meta import Base, UUIDColumn
+
+class TransactionArchive(Base):
+    # Cold storage transaksi lama yang sudah selesai (wearspace_app/archive.py).
+    # payload berisi hasil serialisasi Transaction sebagai JSON terkompresi
+    # zlib. Kolom lain untuk lookup dan untuk rebuild rollup/ranking/
+    # co-purchase (brand_id dan category disalin dari produk saat diarsipkan).
+    __tablename__ = 'transactions_archive'
+    __table_args__ = (
+        Index('ix_transactions_archive_user_id_transaction_date', 'user_id', 'transaction_date'),
+    )
+    id = Column(UUIDColumn, primary_key=True)
+    user_id = Column(UUIDColumn)
+    transaction_date = Column(DateTime(timezone=True))
+    product_id = Column(UUIDColumn, nullable=False)
+    brand_id = Column(UUIDColumn, nullable=False)
+    category = Column(String(100))
+    payment_method = Column(String(50), nullable=False)
+    transaction_status = Column(String(50), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(DECIMAL(10, 2), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    payload = Column(LargeBinary, nullable=False)
@@ -1,6 +1,6 @@
 # your_project_name/models/user.py
 import uuid
-from sqlalchemy import Column, DateTime, Text, String
+from sqlalchemy import Column, DateTime, Text, String, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .meta import Base, UUIDColumn
@@ -8,6 +8,10 @@ from bcrypt import hashpw, gensalt, checkpw
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Index untuk keyset pagination (created_at, id)
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
     id = Column(UUIDColumn, primary_key=True, default=uuid.uuid4)
     email = Column(String(255), unique=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
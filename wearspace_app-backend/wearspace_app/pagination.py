@@ -0,0 +1,119 @@
+# wearspace_app/pagination.py
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import DateTime, Numeric, and_, or_
+from webob.exc import HTTPBadRequest
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def get_page_size(request):
+    """
+    Baca ``?limit=`` dan batasi dengan ``api.page_size.max``.
+
+    Default diambil dari ``api.page_size.default`` di file .ini.
+    """
+    settings = request.registry.settings or {}
+    default_size = int(settings.get('api.page_size.default', DEFAULT_PAGE_SIZE))
+    max_size = int(settings.get('api.page_size.max', MAX_PAGE_SIZE))
+
+    limit = request.params.get('limit')
+    if limit in (None, ''):
+        return min(default_size, max_size)
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise HTTPBadRequest(json={'error': 'Invalid limit. Must be an integer.'})
+    if limit < 1:
+        raise HTTPBadRequest(json={'error': 'Invalid limit. Must be greater than 0.'})
+    return min(limit, max_size)
+
+
+def _to_cursor_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _from_cursor_value(column, value):
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Numeric):
+        return Decimal(value)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_to_cursor_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [_from_cursor_value(c, v) for c, v in zip(columns, values)]
+    except (ValueError, TypeError, InvalidOperation, binascii.Error, UnicodeError):
+        raise HTTPBadRequest(json={'error': 'Invalid pagination cursor.'})
+
+
+def _keyset_filter(keys, descending):
+    # (a, b) > (va, vb) ditulis manual supaya portable di SQLite dan PostgreSQL.
+    # Kolom dibandingkan langsung dengan nilai cursor (tanpa fungsi) supaya
+    # index (kolom, id) tetap dipakai; di SQLite server_default now() sudah
+    # ditulis dengan format yang sama dengan nilai dari Python (models/meta.py).
+    clauses = []
+    for i, (expr, value) in enumerate(keys):
+        equal_prefix = [e == v for e, v in keys[:i]]
+        step = expr < value if descending else expr > value
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def paginate(request, query, columns, descending=False):
+    """
+    Keyset pagination untuk ``query`` berdasarkan ``columns``.
+
+    ``columns`` adalah atribut ORM berurutan, kolom terakhir harus unik
+    (biasanya ``id``) supaya urutan stabil. Mengembalikan tuple
+    ``(items, next_cursor)``; ``next_cursor`` bernilai ``None`` di halaman
+    terakhir. Cursor juga dikirim lewat header ``X-Next-Cursor`` dan ``Link``
+    sehingga body tetap berupa list JSON seperti sebelumnya.
+    """
+    limit = get_page_size(request)
+
+    if descending:
+        query = query.order_by(*[c.desc() for c in columns])
+    else:
+        query = query.order_by(*columns)
+
+    after = request.params.get('after')
+    if after:
+        values = decode_cursor(after, columns)
+        query = query.filter(_keyset_filter(list(zip(columns, values)), descending))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+        request.response.headers['X-Next-Cursor'] = next_cursor
+        if getattr(request, 'matched_route', None) is not None:
+            params = dict(request.params)
+            params['after'] = next_cursor
+            next_url = request.current_route_url(_query=params)
+            request.response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return rows, next_cursor
@@ -0,0 +1,426 @@
+# wearspace_app/rankings.py
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+
+import transaction
+from sqlalchemy.exc import IntegrityError
+from zope.sqlalchemy import mark_changed
+
+from .models import Favorite, Product, ProductRanking, Transaction, TransactionArchive
+
+CANCELLED_STATUS = 'Dibatalkan'
+
+# Bobot sinyal trending: satu unit terjual dan satu favorit baru
+PURCHASE_WEIGHT = 3.0
+FAVORITE_WEIGHT = 1.0
+
+TRENDING = 'trending'
+BEST_SELLERS = 'best_sellers'
+
+DEFAULT_HALF_LIFE = 3 * 24 * 60 * 60
+DEFAULT_CHECKPOINT_INTERVAL = 300
+# Panjang list top-N yang disimpan per (ranking, category)
+DEFAULT_MAX_RESULTS = 50
+# Skor disimpan relatif terhadap epoch; epoch digeser sebelum 2 ** x overflow
+MAX_EPOCH_HALF_LIVES = 256
+
+_registry_lock = threading.Lock()
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    # SQLite mengembalikan datetime tanpa zona waktu
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _add_pending(pending, product_id, trend, sales):
+    entry = pending.setdefault(product_id, [0.0, 0])
+    entry[0] += trend
+    entry[1] += sales
+
+
+def _rank_key(item):
+    return item[1], str(item[0])
+
+
+class RankingEngine(object):
+    """
+    Ranking "Trending now" dan "Best sellers" di memory.
+
+    Skor trending adalah jumlah bobot event yang meluruh eksponensial
+    dengan half-life ``half_life`` detik. Karena semua skor meluruh dengan
+    faktor yang sama, skor disimpan relatif terhadap ``epoch`` (event pada
+    waktu t bernilai ``w * 2 ** ((t - epoch) / half_life)``), jadi event baru
+    cukup menambah satu angka tanpa menyentuh produk lain. Best sellers
+    adalah jumlah unit terjual.
+
+    Setiap ``checkpoint_interval`` detik delta sejak checkpoint terakhir
+    ditambahkan ke tabel product_rankings, lalu tabelnya dibaca ulang supaya
+    event dari proses lain ikut masuk. List top-N per (ranking, category)
+    diperbarui di tempat setiap kali skor berubah (O(N)); list hanya
+    dihitung ulang dari semua produk (O(P)) setelah reload di checkpoint,
+    atau kalau produk di list yang penuh turun skornya sehingga pengganti
+    dari luar list tidak diketahui (pembatalan, hapus, pindah category).
+    """
+
+    def __init__(self, half_life=DEFAULT_HALF_LIFE, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+                 max_results=DEFAULT_MAX_RESULTS):
+        self.half_life = half_life
+        self.checkpoint_interval = checkpoint_interval
+        self.max_results = max_results
+        self._lock = threading.RLock()
+        self._epoch = time.time()
+        self._trend = {}
+        self._sales = {}
+        self._category = {}
+        # Produk yang category-nya belum diketahui (event sebelum sync)
+        self._uncategorized = set()
+        # product_id -> [delta trending relatif epoch, delta unit terjual]
+        self._pending = {}
+        self._tops = {}
+        self._loaded = False
+        self._checkpointed_at = None
+
+    def _scale(self, at):
+        return 2 ** ((at - self._epoch) / self.half_life)
+
+    def _rebase(self, now):
+        if (now - self._epoch) / self.half_life < MAX_EPOCH_HALF_LIVES:
+            return
+        factor = 1 / self._scale(now)
+        self._trend = {pid: score * factor for pid, score in self._trend.items()}
+        for entry in self._pending.values():
+            entry[0] *= factor
+        self._epoch = now
+        self._tops.clear()
+
+    def _place(self, key, product_id, score):
+        """
+        Perbarui skor ``product_id`` di list top-N ``key`` yang tersimpan;
+        ``score`` <= 0 berarti produk keluar dari list.
+        """
+        ranked = self._tops.get(key)
+        if ranked is None:
+            return
+        full = len(ranked) >= self.max_results
+        index = next((i for i, (pid, _) in enumerate(ranked) if pid == product_id), None)
+        item = (product_id, score)
+        if index is not None:
+            if _rank_key(item) == _rank_key(ranked[index]):
+                return
+            if full and _rank_key(item) < _rank_key(ranked[index]):
+                # Produk di luar list bisa saja lebih tinggi: hitung ulang nanti
+                del self._tops[key]
+                return
+            del ranked[index]
+        elif full and _rank_key(item) <= _rank_key(ranked[-1]):
+            return
+        if score <= 0:
+            return
+        position = 0
+        while position < len(ranked) and _rank_key(ranked[position]) > _rank_key(item):
+            position += 1
+        ranked.insert(position, item)
+        del ranked[self.max_results:]
+
+    def _update_tops(self, product_id, category, scores=None):
+        """
+        Terapkan skor ``product_id`` saat ini (atau ``scores`` per ranking)
+        ke list global dan list ``category``.
+        """
+        for kind, values in ((TRENDING, self._trend), (BEST_SELLERS, self._sales)):
+            score = values.get(product_id, 0) if scores is None else scores[kind]
+            self._place((kind, None), product_id, score)
+            if category is not None:
+                self._place((kind, category), product_id, score)
+
+    def record(self, product_id, trend=0.0, sales=0, at=None):
+        """
+        Catat satu event: ``trend`` adalah bobot trending (mis.
+        ``PURCHASE_WEIGHT * qty``), ``sales`` perubahan unit terjual (negatif
+        untuk transaksi yang dibatalkan/dihapus).
+        """
+        with self._lock:
+            now = time.time() if at is None else at
+            self._rebase(now)
+            delta = trend * self._scale(now)
+            self._trend[product_id] = self._trend.get(product_id, 0.0) + delta
+            self._sales[product_id] = max(0, self._sales.get(product_id, 0) + sales)
+            _add_pending(self._pending, product_id, delta, sales)
+            if product_id not in self._category:
+                self._uncategorized.add(product_id)
+            self._update_tops(product_id, self._category.get(product_id))
+
+    def set_category(self, product_id, category):
+        with self._lock:
+            old = self._category.get(product_id)
+            self._category[product_id] = category
+            self._uncategorized.discard(product_id)
+            if old == category:
+                return
+            if old is not None:
+                for kind in (TRENDING, BEST_SELLERS):
+                    self._place((kind, old), product_id, 0)
+            if category is not None:
+                for kind, values in ((TRENDING, self._trend), (BEST_SELLERS, self._sales)):
+                    self._place((kind, category), product_id, values.get(product_id, 0))
+
+    def forget(self, product_id):
+        with self._lock:
+            self._update_tops(product_id, self._category.get(product_id), {TRENDING: 0, BEST_SELLERS: 0})
+            for values in (self._trend, self._sales, self._category, self._pending):
+                values.pop(product_id, None)
+            self._uncategorized.discard(product_id)
+
+    def top(self, kind, category=None, limit=None):
+        """
+        ``[(product_id, nilai), ...]`` terurut menurun. Nilai trending
+        adalah skor yang sudah di-decay sampai sekarang.
+        """
+        with self._lock:
+            ranked = self._tops.get((kind, category))
+            if ranked is None:
+                scores = self._trend if kind == TRENDING else self._sales
+                ranked = heapq.nlargest(
+                    self.max_results,
+                    (
+                        (pid, score) for pid, score in scores.items()
+                        if score > 0 and (category is None or self._category.get(pid) == category)
+                    ),
+                    key=_rank_key
+                )
+                self._tops[(kind, category)] = ranked
+            factor = 1 / self._scale(time.time()) if kind == TRENDING else 1
+        return [(pid, score * factor) for pid, score in ranked[:limit]]
+
+    def _reload(self, dbsession):
+        rows = (
+            dbsession.query(
+                ProductRanking.product_id, ProductRanking.trending_score,
+                ProductRanking.sales_count, ProductRanking.scored_at, Product.category,
+            )
+            .join(Product, Product.id == ProductRanking.product_id)
+        )
+        trend, sales = {}, {}
+        for product_id, score, count, scored_at, category in rows:
+            scored_at = _timestamp(scored_at)
+            trend[product_id] = score * self._scale(self._epoch if scored_at is None else scored_at)
+            sales[product_id] = count
+            self._category[product_id] = category
+        # Event yang belum masuk checkpoint tetap dihitung
+        for product_id, (delta, count) in self._pending.items():
+            trend[product_id] = trend.get(product_id, 0.0) + delta
+            sales[product_id] = max(0, sales.get(product_id, 0) + count)
+        self._trend, self._sales = trend, sales
+        self._uncategorized -= set(self._category)
+        self._tops.clear()
+        self._loaded = True
+
+    def _resolve_categories(self, dbsession):
+        ids = list(self._uncategorized)
+        if not ids:
+            return
+        found = dict(dbsession.query(Product.id, Product.category).filter(Product.id.in_(ids)))
+        for product_id in ids:
+            if product_id in found:
+                self.set_category(product_id, found[product_id])
+            else:
+                # Produk sudah dihapus
+                self.forget(product_id)
+
+    def sync(self, dbsession, transaction_manager=None):
+        """
+        Muat tabel saat pertama dipakai, lengkapi category produk yang baru
+        muncul, dan jalankan checkpoint kalau sudah waktunya.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._reload(dbsession)
+                self._checkpointed_at = time.monotonic()
+            self._resolve_categories(dbsession)
+            due = time.monotonic() - self._checkpointed_at >= self.checkpoint_interval
+        if due:
+            self.checkpoint(dbsession, transaction_manager)
+
+    def checkpoint(self, dbsession, transaction_manager=None):
+        """
+        Tambahkan delta ke product_rankings di transaksi ``dbsession`` lalu
+        baca ulang tabelnya. Baris dikunci (FOR UPDATE) supaya checkpoint dari
+        beberapa proses saling menjumlah, bukan saling menimpa. Kalau
+        transaksinya gagal, delta dikembalikan ke antrean.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._checkpointed_at = time.monotonic()
+            now = time.time()
+            self._rebase(now)
+            factor = 1 / self._scale(now)
+        scored_at = datetime.fromtimestamp(now, timezone.utc)
+
+        def requeue(entries):
+            with self._lock:
+                for product_id, (delta, count) in entries.items():
+                    _add_pending(self._pending, product_id, delta * self._scale(now) * factor, count)
+
+        if batch:
+            rows = {
+                row.product_id: row for row in
+                dbsession.query(ProductRanking)
+                .filter(ProductRanking.product_id.in_(list(batch)))
+                .with_for_update()
+            }
+            missing = []
+            for product_id, (delta, count) in batch.items():
+                row = rows.get(product_id)
+                if row is None:
+                    missing.append(ProductRanking(
+                        product_id=product_id, trending_score=delta * factor,
+                        sales_count=max(0, count), scored_at=scored_at,
+                    ))
+                    continue
+                age = now - (_timestamp(row.scored_at) or now)
+                row.trending_score = row.trending_score * 2 ** (-age / self.half_life) + delta * factor
+                row.sales_count = max(0, row.sales_count + count)
+                row.scored_at = scored_at
+            dbsession.flush()
+            if missing:
+                try:
+                    with dbsession.begin_nested():
+                        dbsession.add_all(missing)
+                except IntegrityError:
+                    # Proses lain membuat barisnya lebih dulu (atau produknya
+                    # dihapus); dicoba lagi di checkpoint berikutnya
+                    requeue({row.product_id: batch[row.product_id] for row in missing})
+            mark_changed(dbsession)
+
+            def after_commit(success):
+                if not success:
+                    requeue(batch)
+
+            (transaction_manager or transaction.manager).get().addAfterCommitHook(after_commit)
+
+        with self._lock:
+            self._reload(dbsession)
+
+
+def rebuild_rankings(dbsession, half_life=DEFAULT_HALF_LIFE):
+    """
+    Hitung ulang seluruh product_rankings dari transactions,
+    transactions_archive dan favorites (seed data, atau kalau tabel perlu
+    diperbaiki).
+    """
+    now = time.time()
+    scores, sales = {}, {}
+
+    def add(product_id, weight, at):
+        at = _timestamp(at)
+        decay = 2 ** (-(now - at) / half_life) if at is not None else 1
+        scores[product_id] = scores.get(product_id, 0.0) + weight * decay
+
+    archived = (
+        dbsession.query(TransactionArchive.product_id, TransactionArchive.quantity, TransactionArchive.transaction_date)
+        # Produk yang sudah dihapus tidak punya baris ranking
+        .join(Product, Product.id == TransactionArchive.product_id)
+        .filter(TransactionArchive.transaction_status != CANCELLED_STATUS)
+    )
+    live = (
+        dbsession.query(Transaction.product_id, Transaction.quantity, Transaction.transaction_date)
+        .filter(Transaction.transaction_status != CANCELLED_STATUS)
+    )
+    for product_id, quantity, transaction_date in live.union_all(archived):
+        quantity = quantity or 1
+        add(product_id, PURCHASE_WEIGHT * quantity, transaction_date)
+        sales[product_id] = sales.get(product_id, 0) + quantity
+    for product_id, created_at in dbsession.query(Favorite.product_id, Favorite.created_at):
+        add(product_id, FAVORITE_WEIGHT, created_at)
+
+    dbsession.query(ProductRanking).delete(synchronize_session=False)
+    scored_at = datetime.fromtimestamp(now, timezone.utc)
+    dbsession.add_all([
+        ProductRanking(
+            product_id=product_id, trending_score=score,
+            sales_count=sales.get(product_id, 0), scored_at=scored_at,
+        )
+        for product_id, score in scores.items()
+    ])
+    dbsession.flush()
+
+
+def create_engine(settings):
+    return RankingEngine(
+        float(settings.get('rankings.half_life', DEFAULT_HALF_LIFE)),
+        int(settings.get('rankings.checkpoint_interval', DEFAULT_CHECKPOINT_INTERVAL)),
+        int(settings.get('rankings.max_results', DEFAULT_MAX_RESULTS)),
+    )
+
+
+def get_ranking_engine(request):
+    registry = request.registry
+    engine = registry.get('ranking_engine')
+    if engine is None:
+        with _registry_lock:
+            engine = registry.get('ranking_engine')
+            if engine is None:
+                engine = create_engine(registry.settings or {})
+                registry['ranking_engine'] = engine
+    return engine
+
+
+def _transaction_manager(request):
+    return getattr(request, 'tm', None) or transaction.manager
+
+
+def record_on_commit(request, events):
+    """
+    ``events`` berisi ``(product_id, bobot trending, perubahan unit terjual)``
+    atau dengan elemen keempat ``at`` (datetime event; default saat commit).
+    Dicatat ke engine setelah transaksi commit, jadi order yang gagal tidak
+    ikut dihitung. Event negatif dengan ``at`` yang sama persis menghapus
+    bobot event aslinya (mis. favorit yang dihapus).
+    """
+    engine = get_ranking_engine(request)
+    events = [(event + (None,))[:4] for event in events]
+
+    def after_commit(success):
+        if success:
+            for product_id, trend, sales, at in events:
+                engine.record(product_id, trend, sales, _timestamp(at))
+
+    _transaction_manager(request).get().addAfterCommitHook(after_commit)
+
+
+def update_product_on_commit(request, product_id, category=None, deleted=False):
+    engine = get_ranking_engine(request)
+    if deleted:
+        # FK ON DELETE CASCADE tidak aktif di SQLite, jadi dihapus eksplisit
+        request.dbsession.query(ProductRanking).filter(
+            ProductRanking.product_id == product_id
+        ).delete(synchronize_session=False)
+
+    def after_commit(success):
+        if success:
+            if deleted:
+                engine.forget(product_id)
+            else:
+                engine.set_category(product_id, category)
+
+    _transaction_manager(request).get().addAfterCommitHook(after_commit)
+
+
+def ranked_products(request, kind, limit):
+    """
+    Top-N dari engine untuk ``?category=``; checkpoint berjalan di sini
+    kalau sudah waktunya.
+    """
+    engine = get_ranking_engine(request)
+    engine.sync(request.dbsession, _transaction_manager(request))
+    return engine.top(kind, request.params.get('category') or None, min(limit, engine.max_results))
+
+
+def includeme(config):
+    config.registry['ranking_engine'] = create_engine(config.get_settings())
@@ -0,0 +1,303 @@
+# wearspace_app/recommendations.py
+import heapq
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+import transaction
+from sqlalchemy import func, literal, or_
+from sqlalchemy.orm import Session
+
+from .models import Transaction, TransactionArchive
+
+log = logging.getLogger(__name__)
+
+SUCCESS_STATUS = 'Berhasil'
+
+DEFAULT_TOP_K = 20
+# Detik antara dua refresh inkremental (transaksi yang berubah saja)
+DEFAULT_REFRESH_INTERVAL = 30
+# Detik antara dua rebuild penuh; menangkap transaksi yang dihapus
+DEFAULT_REBUILD_INTERVAL = 3600
+# Refresh inkremental membaca ulang sedikit ke belakang: now() di
+# PostgreSQL adalah waktu mulai transaksi, jadi baris yang commit belakangan
+# bisa punya timestamp lebih kecil dari watermark. Baris yang terbaca dua
+# kali tidak mengubah hasil.
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+_registry_lock = threading.Lock()
+
+
+class CoPurchaseIndex(object):
+    """
+    Matriks co-purchase sparse di memory untuk "customers also bought".
+
+    Dua produk dihitung dibeli bersama kalau user yang sama punya transaksi
+    ``Berhasil`` untuk keduanya; nilai sel adalah jumlah user tersebut.
+    Matriks disimpan sebagai ``{product_id: Counter(product_id lain)}``
+    (hanya sel bukan nol), dan top-K per produk dihitung ulang hanya untuk
+    produk yang selnya berubah, jadi lookup cukup satu akses dict.
+
+    Setelah build pertama, hanya transaksi yang dibuat/diubah sejak
+    watermark yang dibaca (``transaction_date``/``updated_at``). Build
+    penuh ikut membaca transactions_archive; transaksi arsip tidak pernah
+    berubah lagi, jadi refresh inkremental tidak perlu membacanya.
+
+    Build penuh berkala (``rebuild_interval``) berjalan di thread
+    background dengan Session sendiri; lookup tetap membaca matriks lama
+    sampai matriks baru ditukar di bawah lock.
+    """
+
+    def __init__(self, top_k=DEFAULT_TOP_K, refresh_interval=DEFAULT_REFRESH_INTERVAL,
+                 rebuild_interval=DEFAULT_REBUILD_INTERVAL):
+        self.top_k = top_k
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        # Hanya satu build penuh berjalan pada satu waktu
+        self._build_lock = threading.Lock()
+        self._rebuild_thread = None
+        # Id transaksi yang dihapus selama build penuh berjalan
+        self._discarded = None
+        self._reset()
+
+    def _reset(self):
+        # transaction_id -> (user_id, product_id) untuk transaksi Berhasil
+        self._purchases = {}
+        # user_id -> Counter(product_id -> jumlah transaksi Berhasil)
+        self._baskets = defaultdict(Counter)
+        self._matrix = defaultdict(Counter)
+        self._top = {}
+        self._watermark = None
+        self._built_at = None
+        self._refreshed_at = None
+        self._stale = False
+
+    def mark_stale(self):
+        # Dipanggil setelah commit transaksi yang statusnya berubah, supaya
+        # lookup berikutnya langsung membaca perubahannya
+        self._stale = True
+
+    def discard(self, transaction_ids):
+        # Transaksi yang dihapus tidak terlihat oleh refresh inkremental
+        with self._lock:
+            if self._discarded is not None:
+                self._discarded.update(transaction_ids)
+            self._discard(transaction_ids)
+
+    def _discard(self, transaction_ids):
+        dirty = set()
+        for transaction_id in transaction_ids:
+            previous = self._purchases.pop(transaction_id, None)
+            if previous is not None:
+                self._remove(previous[0], previous[1], dirty)
+        self._update_top(dirty)
+
+    def _rows(self, dbsession, since=None):
+        changed = func.coalesce(Transaction.updated_at, Transaction.transaction_date)
+        query = dbsession.query(
+            Transaction.id, Transaction.user_id, Transaction.product_id,
+            Transaction.transaction_status, changed,
+        )
+        if since is None:
+            query = query.filter(
+                Transaction.transaction_status == SUCCESS_STATUS, Transaction.user_id.isnot(None)
+            )
+            archived = dbsession.query(
+                TransactionArchive.id, TransactionArchive.user_id, TransactionArchive.product_id,
+                TransactionArchive.transaction_status, literal(None, Transaction.transaction_date.type),
+            ).filter(
+                TransactionArchive.transaction_status == SUCCESS_STATUS, TransactionArchive.user_id.isnot(None)
+            )
+            query = query.union_all(archived)
+        else:
+            since -= REFRESH_OVERLAP
+            query = query.filter(or_(Transaction.transaction_date >= since, Transaction.updated_at >= since))
+        return query
+
+    def _add(self, user_id, product_id, dirty):
+        basket = self._baskets[user_id]
+        basket[product_id] += 1
+        if basket[product_id] > 1:
+            return
+        for other in basket:
+            if other != product_id:
+                self._matrix[product_id][other] += 1
+                self._matrix[other][product_id] += 1
+                dirty.add(other)
+        dirty.add(product_id)
+
+    def _remove(self, user_id, product_id, dirty):
+        basket = self._baskets[user_id]
+        basket[product_id] -= 1
+        if basket[product_id] > 0:
+            return
+        del basket[product_id]
+        for other in basket:
+            for a, b in ((product_id, other), (other, product_id)):
+                self._matrix[a][b] -= 1
+                if not self._matrix[a][b]:
+                    del self._matrix[a][b]
+            dirty.add(other)
+        dirty.add(product_id)
+        if not basket:
+            del self._baskets[user_id]
+
+    def _apply(self, rows, dirty):
+        for transaction_id, user_id, product_id, status, changed in rows:
+            if changed is not None and (self._watermark is None or changed > self._watermark):
+                self._watermark = changed
+            previous = self._purchases.get(transaction_id)
+            current = (user_id, product_id) if status == SUCCESS_STATUS and user_id else None
+            if previous == current:
+                continue
+            if previous is not None:
+                del self._purchases[transaction_id]
+                self._remove(previous[0], previous[1], dirty)
+            if current is not None:
+                self._purchases[transaction_id] = current
+                self._add(current[0], current[1], dirty)
+
+    def _update_top(self, product_ids):
+        for product_id in product_ids:
+            counts = self._matrix.get(product_id)
+            if not counts:
+                self._top.pop(product_id, None)
+                self._matrix.pop(product_id, None)
+                continue
+            # Seri diurutkan dengan product_id supaya hasilnya stabil
+            self._top[product_id] = tuple(heapq.nsmallest(
+                self.top_k, ((other, n) for other, n in counts.items()),
+                key=lambda item: (-item[1], str(item[0]))
+            ))
+
+    def rebuild(self, dbsession):
+        """
+        Build penuh ke matriks baru tanpa memegang lock, lalu tukar. Transaksi
+        yang dihapus selama build dikeluarkan lagi setelah ditukar; perubahan
+        lain dibaca refresh inkremental berikutnya (watermark matriks baru).
+        """
+        with self._build_lock:
+            with self._lock:
+                self._discarded = set()
+            try:
+                fresh = CoPurchaseIndex(self.top_k)
+                dirty = set()
+                fresh._apply(fresh._rows(dbsession), dirty)
+                fresh._update_top(dirty)
+            except Exception:
+                with self._lock:
+                    self._discarded = None
+                raise
+            with self._lock:
+                self._purchases, self._baskets = fresh._purchases, fresh._baskets
+                self._matrix, self._top = fresh._matrix, fresh._top
+                self._watermark = fresh._watermark
+                discarded, self._discarded = self._discarded, None
+                self._discard(discarded)
+                self._built_at = self._refreshed_at = time.monotonic()
+                self._stale = True
+
+    def _rebuild_in_background(self, bind):
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+
+            def run():
+                # Session request sudah ditutup saat thread ini berjalan
+                dbsession = Session(bind=bind)
+                try:
+                    self.rebuild(dbsession)
+                except Exception:
+                    log.exception('Co-purchase rebuild failed')
+                    # Matriks lama tetap dipakai; dicoba lagi setelah rebuild_interval
+                    with self._lock:
+                        self._built_at = time.monotonic()
+                finally:
+                    dbsession.close()
+
+            self._rebuild_thread = threading.Thread(target=run, name='co-purchase-rebuild', daemon=True)
+            self._rebuild_thread.start()
+
+    def refresh(self, dbsession):
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._stale = False
+            dirty = set()
+            self._apply(self._rows(dbsession, self._watermark) if self._watermark else self._rows(dbsession), dirty)
+            self._update_top(dirty)
+            self._refreshed_at = time.monotonic()
+
+    def ensure_fresh(self, dbsession):
+        if self._built_at is None:
+            # Belum ada matriks yang bisa dipakai: build pertama ditunggu
+            self.rebuild(dbsession)
+            return
+        now = time.monotonic()
+        if now - self._built_at >= self.rebuild_interval:
+            self._rebuild_in_background(dbsession.get_bind())
+        if self._stale or now - self._refreshed_at >= self.refresh_interval:
+            self.refresh(dbsession)
+
+    def also_bought(self, dbsession, product_id, limit=None):
+        """
+        ``[(product_id, jumlah user), ...]`` terurut menurun, paling banyak
+        ``limit`` (dan ``top_k``) item.
+        """
+        self.ensure_fresh(dbsession)
+        top = self._top.get(product_id, ())
+        return list(top[:limit] if limit else top)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'products': len(self._matrix),
+                'pairs': sum(len(c) for c in self._matrix.values()),
+                'purchases': len(self._purchases),
+                'users': len(self._baskets),
+            }
+
+
+def create_index(settings):
+    return CoPurchaseIndex(
+        int(settings.get('recommendations.top_k', DEFAULT_TOP_K)),
+        int(settings.get('recommendations.refresh_interval', DEFAULT_REFRESH_INTERVAL)),
+        int(settings.get('recommendations.rebuild_interval', DEFAULT_REBUILD_INTERVAL)),
+    )
+
+
+def get_co_purchase_index(request):
+    registry = request.registry
+    index = registry.get('co_purchase_index')
+    if index is None:
+        with _registry_lock:
+            index = registry.get('co_purchase_index')
+            if index is None:
+                index = create_index(registry.settings or {})
+                registry['co_purchase_index'] = index
+    return index
+
+
+def refresh_on_commit(request, deleted=()):
+    """
+    Transaksi berubah status: matriks di-refresh inkremental pada lookup
+    berikutnya setelah perubahan ini commit. ``deleted`` berisi id
+    transaksi yang dihapus, yang langsung dikeluarkan dari matriks.
+    """
+    index = get_co_purchase_index(request)
+
+    def after_commit(success):
+        if success:
+            if deleted:
+                index.discard(deleted)
+            index.mark_stale()
+
+    tm = getattr(request, 'tm', None) or transaction.manager
+    tm.get().addAfterCommitHook(after_commit)
+
+
+def includeme(config):
+    config.registry['co_purchase_index'] = create_index(config.get_settings())
@@ -0,0 +1,65 @@
+# wearspace_app/renderers.py
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from pyramid.settings import asbool
+
+try:
+    # Opsional (pip install -e ".[speedups]"): encoder C yang langsung
+    # mengenali UUID dan datetime
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(obj):
+    # Serializer model sudah mengubah UUID/datetime/Decimal ke tipe JSON,
+    # hook ini hanya untuk nilai yang dibentuk manual di view
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    def dumps(value, pretty=False):
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        return orjson.dumps(value, default=_default, option=option)
+else:  # pragma: no cover
+    _compact_encoder = json.JSONEncoder(
+        separators=(',', ':'), ensure_ascii=False, default=_default)
+    _pretty_encoder = json.JSONEncoder(
+        indent=4, ensure_ascii=False, default=_default)
+
+    def dumps(value, pretty=False):
+        encoder = _pretty_encoder if pretty else _compact_encoder
+        return encoder.encode(value).encode('utf-8')
+
+
+class FastJSON(object):
+    """
+    Renderer JSON ringkas (tanpa indentasi) untuk renderer ``json``.
+
+    Output rapi hanya dikirim kalau ``pretty=True`` (``api.json.pretty`` di
+    development.ini) atau client meminta ``?pretty=1``.
+    """
+
+    def __init__(self, pretty=False):
+        self.pretty = pretty
+
+    def __call__(self, info):
+        def _render(value, system):
+            pretty = self.pretty
+            request = system.get('request')
+            if request is not None:
+                response = request.response
+                if response.content_type == response.default_content_type:
+                    response.content_type = 'application/json'
+                pretty = pretty or asbool(request.params.get('pretty', False))
+            return dumps(value, pretty)
+        return _render
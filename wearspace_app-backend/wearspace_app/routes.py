@@ -16,14 +16,26 @@ def includeme(config):
     # API Routes for Brands
     config.add_route('brands', '/api/brands')
     config.add_route('brand_by_id', '/api/brands/{id}')
+    config.add_route('brand_products', '/api/brands/{id}/products')
 
     # API Routes for Products
     config.add_route('products', '/api/products')
+    # Harus didaftarkan sebelum product_by_id supaya 'search' tidak dianggap {id}
+    config.add_route('product_search', '/api/products/search')
+    config.add_route('product_import', '/api/products/import')
+    config.add_route('product_facets', '/api/products/facets')
+    config.add_route('product_cards', '/api/products/cards')
+    config.add_route('product_trending', '/api/products/trending')
+    config.add_route('product_best_sellers', '/api/products/best-sellers')
     config.add_route('product_by_id', '/api/products/{id}')
+    config.add_route('product_also_bought', '/api/products/{id}/also-bought')
+    config.add_route('product_similar', '/api/products/{id}/similar')
 
     # API Routes for Transactions
     config.add_route('transactions', '/api/transactions')
     config.add_route('transaction_by_id', '/api/transactions/{id}')
+    # Checkout keranjang: beberapa produk dalam satu request/transaksi database
+    config.add_route('checkout', '/api/checkout')
 
     # API Routes for Favorites
     config.add_route('favorites', '/api/favorites')
@@ -31,4 +43,13 @@ def includeme(config):
 
     # API Routes for Inspirations
     config.add_route('inspirations', '/api/inspirations')
-    config.add_route('inspiration_by_id', '/api/inspirations/{id}')
\ No newline at end of file
+    config.add_route('inspiration_by_id', '/api/inspirations/{id}')
+
+    # Export streaming: /api/export/products.ndjson, /api/export/transactions.csv
+    config.add_route('export', '/api/export/{entity}.{format}')
+
+    # Rollup penjualan per hari/brand/category/payment_method
+    config.add_route('analytics_sales', '/api/analytics/sales')
+
+    # API Route untuk statistik cache katalog (hit/miss)
+    config.add_route('cache_stats', '/api/cache/stats')
\ No newline at end of file
@@ -0,0 +1,278 @@
+# wearspace_app/sales.py
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import delete, func, insert, literal_column, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from webob.exc import HTTPBadRequest
+from zope.sqlalchemy import mark_changed
+
+from .models import Brand, Product, SalesDaily, Transaction, TransactionArchive
+from .transactions import TRANSACTION_STATUSES
+
+# Status yang dihitung kalau ?status= tidak diberikan; ?status=all untuk semua
+DEFAULT_STATUS = 'Berhasil'
+
+KEY_COLUMNS = (
+    SalesDaily.day, SalesDaily.brand_id, SalesDaily.category,
+    SalesDaily.payment_method, SalesDaily.transaction_status,
+)
+ROLLUP_COLUMNS = (
+    'day', 'brand_id', 'category', 'payment_method', 'transaction_status',
+    'orders', 'units', 'revenue',
+)
+
+# ?group_by= -> kolom sales_daily
+GROUP_COLUMNS = {
+    'day': SalesDaily.day,
+    'brand': SalesDaily.brand_id,
+    'category': SalesDaily.category,
+    'payment_method': SalesDaily.payment_method,
+    'status': SalesDaily.transaction_status,
+}
+
+
+def product_attributes(dbsession, product_ids):
+    """
+    ``{product_id: (brand_id, category, price)}`` dengan satu query.
+    """
+    if not product_ids:
+        return {}
+    return {
+        product_id: (brand_id, category, price)
+        for product_id, brand_id, category, price in
+        dbsession.query(Product.id, Product.brand_id, Product.category, Product.price)
+        .filter(Product.id.in_(list(product_ids)))
+    }
+
+
+def _day(value):
+    if value is None:
+        return datetime.now(timezone.utc).date()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _collect(dbsession, entries, products=None):
+    """
+    ``entries`` berisi ``(transaction, tanda, status)``; ``status`` None
+    berarti transaction_status saat ini. Hasilnya delta per kunci rollup.
+    """
+    if products is None:
+        products = product_attributes(dbsession, {t.product_id for t, _, _ in entries})
+    deltas = {}
+    for transaction, sign, status in entries:
+        brand_id, category, price = products[transaction.product_id]
+        units = transaction.quantity or 1
+        unit_price = transaction.unit_price if transaction.unit_price is not None else price
+        key = (
+            _day(transaction.transaction_date), brand_id, category or '',
+            transaction.payment_method, status or transaction.transaction_status,
+        )
+        delta = deltas.setdefault(key, [0, 0, Decimal(0)])
+        delta[0] += sign
+        delta[1] += sign * units
+        delta[2] += sign * Decimal(unit_price or 0) * units
+    return deltas
+
+
+def _apply(dbsession, deltas):
+    # Urutan kunci tetap supaya dua request yang menyentuh baris yang sama
+    # mengunci dengan urutan yang sama (tidak deadlock)
+    for key in sorted(deltas, key=lambda key: tuple(str(value) for value in key)):
+        orders, units, revenue = deltas[key]
+        if not (orders or units or revenue):
+            continue
+        stmt = (
+            update(SalesDaily)
+            .where(*[column == value for column, value in zip(KEY_COLUMNS, key)])
+            .values(
+                orders=SalesDaily.orders + orders,
+                units=SalesDaily.units + units,
+                revenue=SalesDaily.revenue + revenue,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if dbsession.execute(stmt).rowcount:
+            continue
+        try:
+            with dbsession.begin_nested():
+                dbsession.execute(insert(SalesDaily).values(
+                    dict(zip(ROLLUP_COLUMNS, key + (orders, units, revenue)))
+                ))
+        except IntegrityError:
+            # Request lain membuat barisnya lebih dulu
+            dbsession.execute(stmt)
+    mark_changed(dbsession)
+
+
+def record_sales(dbsession, transactions, sign=1, products=None):
+    """
+    Tambahkan (``sign`` = 1) atau kurangi (-1) ``transactions`` di
+    sales_daily, di transaksi database yang sama dengan pemanggilnya.
+
+    Brand dan category diambil dari produk saat ini; perubahan brand/category
+    produk tidak memindahkan penjualan lama sampai ``rebuild_sales``.
+    """
+    transactions = list(transactions)
+    if transactions:
+        _apply(dbsession, _collect(dbsession, [(t, sign, None) for t in transactions], products))
+
+
+def move_sales(dbsession, transaction, old_status):
+    """
+    Pindahkan transaksi dari baris status lama ke status barunya.
+    """
+    if old_status != transaction.transaction_status:
+        _apply(dbsession, _collect(dbsession, [(transaction, -1, old_status), (transaction, 1, None)]))
+
+
+def _utc_day(dbsession, column):
+    if dbsession.get_bind().dialect.name == 'postgresql':
+        return func.date(func.timezone(literal_column("'UTC'"), column))
+    # SQLite menyimpan datetime tanpa zona waktu (UTC)
+    return func.date(column)
+
+
+def rebuild_sales(dbsession):
+    """
+    Hitung ulang seluruh sales_daily dari transactions ditambah
+    transactions_archive dengan satu ``INSERT .. SELECT .. GROUP BY``.
+    Transaksi arsip memakai brand/category yang disalin saat diarsipkan.
+    Mengembalikan jumlah baris rollup.
+    """
+    units = func.coalesce(Transaction.quantity, 1)
+    live = (
+        select(
+            _utc_day(dbsession, Transaction.transaction_date).label('day'),
+            Product.brand_id.label('brand_id'),
+            func.coalesce(Product.category, '').label('category'),
+            Transaction.payment_method.label('payment_method'),
+            Transaction.transaction_status.label('transaction_status'),
+            units.label('units'),
+            (func.coalesce(Transaction.unit_price, Product.price) * units).label('revenue'),
+        )
+        .select_from(Transaction)
+        .join(Product, Product.id == Transaction.product_id)
+    )
+    archived = select(
+        _utc_day(dbsession, TransactionArchive.transaction_date),
+        TransactionArchive.brand_id,
+        func.coalesce(TransactionArchive.category, ''),
+        TransactionArchive.payment_method,
+        TransactionArchive.transaction_status,
+        TransactionArchive.quantity,
+        TransactionArchive.unit_price * TransactionArchive.quantity,
+    )
+    rows = union_all(live, archived).subquery()
+    # GROUP BY kolom subquery, bukan ekspresi, jadi bind parameter di
+    # ekspresi day/category tidak perlu sama persis dengan SELECT
+    keys = (rows.c.day, rows.c.brand_id, rows.c.category, rows.c.payment_method, rows.c.transaction_status)
+    source = select(*keys, func.count(), func.sum(rows.c.units), func.sum(rows.c.revenue)).group_by(*keys)
+    dbsession.execute(delete(SalesDaily).execution_options(synchronize_session=False))
+    dbsession.execute(insert(SalesDaily).from_select(ROLLUP_COLUMNS, source))
+    mark_changed(dbsession)
+    return dbsession.query(func.count()).select_from(SalesDaily).scalar()
+
+
+def _parse_day(params, key):
+    value = params.get(key)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPBadRequest(json={'error': f'Invalid {key}. Use YYYY-MM-DD.'})
+
+
+def parse_group_by(params):
+    names = []
+    for name in (params.get('group_by') or 'day').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in GROUP_COLUMNS:
+            raise HTTPBadRequest(json={
+                'error': f"Invalid group_by. Must be one of: {', '.join(GROUP_COLUMNS)}"
+            })
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def _amounts(orders, units, revenue):
+    return {'orders': int(orders or 0), 'units': int(units or 0), 'revenue': round(float(revenue or 0), 2)}
+
+
+def sales_report(dbsession, params):
+    """
+    Revenue, unit dan jumlah order dari sales_daily untuk
+    ``GET /api/analytics/sales``, dikelompokkan dengan ``?group_by=`` (mis.
+    ``day,brand``). Filter: ``date_from``/``date_to`` (inklusif),
+    ``status`` (default Berhasil, ``all`` untuk semua), ``brand_id``,
+    ``category`` dan ``payment_method``. Tabel transactions tidak dibaca.
+    """
+    group_by = parse_group_by(params)
+    columns = [GROUP_COLUMNS[name] for name in group_by]
+    sums = [func.sum(SalesDaily.orders), func.sum(SalesDaily.units), func.sum(SalesDaily.revenue)]
+    query = dbsession.query(*columns, *sums)
+    if 'brand' in group_by:
+        query = query.add_columns(Brand.name).outerjoin(Brand, Brand.id == SalesDaily.brand_id)
+        query = query.group_by(Brand.name)
+
+    status = params.get('status') or DEFAULT_STATUS
+    if status != 'all':
+        if status not in TRANSACTION_STATUSES:
+            raise HTTPBadRequest(json={
+                'error': f"Invalid status. Must be one of: all, {', '.join(TRANSACTION_STATUSES)}"
+            })
+        query = query.filter(SalesDaily.transaction_status == status)
+
+    date_from = _parse_day(params, 'date_from')
+    date_to = _parse_day(params, 'date_to')
+    if date_from and date_to and date_from > date_to:
+        raise HTTPBadRequest(json={'error': 'date_from must not be after date_to.'})
+    if date_from:
+        query = query.filter(SalesDaily.day >= date_from)
+    if date_to:
+        query = query.filter(SalesDaily.day <= date_to)
+
+    brand_id = params.get('brand_id')
+    if brand_id:
+        try:
+            query = query.filter(SalesDaily.brand_id == uuid.UUID(brand_id))
+        except ValueError:
+            raise HTTPBadRequest(json={'error': 'Invalid UUID format for brand ID.'})
+    if params.get('category'):
+        query = query.filter(SalesDaily.category == params['category'])
+    if params.get('payment_method'):
+        query = query.filter(SalesDaily.payment_method == params['payment_method'])
+
+    rows = []
+    totals = [0, 0, Decimal(0)]
+    for row in query.group_by(*columns).order_by(*columns):
+        values = dict(zip(group_by, row))
+        orders, units, revenue = row[len(columns):len(columns) + 3]
+        item = {}
+        for name, value in values.items():
+            if name == 'day':
+                item['day'] = value.isoformat()
+            elif name == 'brand':
+                item['brand_id'] = str(value)
+                item['brand_name'] = row[-1]
+            elif name == 'category':
+                item['category'] = value or None
+            else:
+                item[name] = value
+        item.update(_amounts(orders, units, revenue))
+        rows.append(item)
+        totals = [totals[0] + (orders or 0), totals[1] + (units or 0), totals[2] + Decimal(str(revenue or 0))]
+
+    return {
+        'group_by': group_by,
+        'status': status,
+        'totals': _amounts(*totals),
+        'rows': rows,
+    }
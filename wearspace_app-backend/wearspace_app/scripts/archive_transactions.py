@@ -0,0 +1,64 @@
+import argparse
+import sys
+
+from pyramid.paster import bootstrap, setup_logging
+
+from ..archive import (
+    DEFAULT_ARCHIVE_MONTHS,
+    DEFAULT_BATCH_SIZE,
+    PARTITION_MONTHS_AHEAD,
+    archive_cutoff,
+    archive_transactions,
+    drop_empty_partitions,
+    ensure_partitions,
+)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Move closed transactions older than N months to transactions_archive '
+                    'and maintain the monthly transactions partitions (PostgreSQL).',
+    )
+    parser.add_argument(
+        'config_uri',
+        help='Configuration file, e.g., development.ini',
+    )
+    parser.add_argument('--months', type=int, default=DEFAULT_ARCHIVE_MONTHS,
+                        help='Archive transactions older than this many months (default: %(default)s).')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Transactions moved per database transaction (default: %(default)s).')
+    parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD,
+                        help='Create monthly partitions this far ahead (default: %(default)s).')
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    if args.months < 1 or args.batch_size < 1 or args.months_ahead < 0:
+        sys.exit('--months and --batch-size must be positive, --months-ahead must not be negative.')
+
+    env = bootstrap(args.config_uri)
+    request = env['request']
+    try:
+        with request.tm:
+            created = ensure_partitions(request.dbsession, args.months_ahead)
+        print(f"✅ Partitions created: {created}")
+
+        cutoff = archive_cutoff(args.months)
+        total = 0
+        while True:
+            # Satu batch per transaksi supaya lock dan WAL tetap kecil
+            with request.tm:
+                moved = archive_transactions(request.dbsession, cutoff, args.batch_size)
+            total += moved
+            if moved < args.batch_size:
+                break
+        print(f"✅ Archived {total} transactions older than {cutoff.date().isoformat()}.")
+
+        with request.tm:
+            dropped = drop_empty_partitions(request.dbsession, cutoff)
+        if dropped:
+            print(f"✅ Dropped empty partitions: {', '.join(dropped)}")
+    finally:
+        env['closer']()
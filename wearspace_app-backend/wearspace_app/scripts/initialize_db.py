@@ -7,6 +7,9 @@ from pyramid.paster import bootstrap, setup_logging
 from sqlalchemy.exc import OperationalError
 import transaction # Import transaction explicitly if you want to control it manually outside Pyramid's tm
 
+from ..cards import rebuild_cards
+from ..rankings import rebuild_rankings
+from ..sales import rebuild_sales
 from ..models import (
     User,
     Brand,
@@ -108,6 +111,7 @@ def setup_models(dbsession):
         transaction_status="Berhasil",
         purchased_size="US 9",
         purchased_color="Black",
+        unit_price=150.00,
         transaction_date=datetime(2025, 5, 20, 10, 30, 0)
     )
     dbsession.add(transaction_1)
@@ -122,6 +126,7 @@ def setup_models(dbsession):
         transaction_status="Menunggu Pembayaran",
         purchased_size="M",
         purchased_color="Blue",
+        unit_price=30.00,
         transaction_date=datetime(2025, 5, 25, 14, 0, 0)
     )
     dbsession.add(transaction_2)
@@ -155,6 +160,12 @@ def setup_models(dbsession):
     )
     dbsession.add(inspiration_2)
 
+    # Read model kartu produk dibangun dari data di atas
+    dbsession.flush()
+    rebuild_cards(dbsession)
+    rebuild_rankings(dbsession)
+    rebuild_sales(dbsession)
+
 
 def parse_args(argv):
     parser = argparse.ArgumentParser()
@@ -0,0 +1,35 @@
+import argparse
+import sys
+
+from pyramid.paster import bootstrap, setup_logging
+
+from ..archive import PARTITION_MONTHS_AHEAD, ensure_partitions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Create the monthly transactions partitions ahead of time (PostgreSQL). '
+                    'Schedule it (e.g. daily) when pg_cron is not installed.',
+    )
+    parser.add_argument(
+        'config_uri',
+        help='Configuration file, e.g., development.ini',
+    )
+    parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD,
+                        help='Create monthly partitions this far ahead (default: %(default)s).')
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+    if args.months_ahead < 0:
+        sys.exit('--months-ahead must not be negative.')
+
+    env = bootstrap(args.config_uri)
+    try:
+        with env['request'].tm:
+            created = ensure_partitions(env['request'].dbsession, args.months_ahead)
+        print(f"✅ Partitions created: {created}")
+    finally:
+        env['closer']()
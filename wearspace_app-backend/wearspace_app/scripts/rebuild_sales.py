@@ -0,0 +1,32 @@
+import argparse
+import sys
+
+from pyramid.paster import bootstrap, setup_logging
+
+from ..sales import rebuild_sales
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Recompute the sales_daily rollup table from transactions.',
+    )
+    parser.add_argument(
+        'config_uri',
+        help='Configuration file, e.g., development.ini',
+    )
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    setup_logging(args.config_uri)
+
+    env = bootstrap(args.config_uri)
+    try:
+        # Hapus dan isi ulang sales_daily dalam satu transaksi, jadi
+        # /api/analytics/sales tidak pernah melihat tabel yang setengah terisi
+        with env['request'].tm:
+            rows = rebuild_sales(env['request'].dbsession)
+        print(f"✅ sales_daily rebuilt: {rows} rows.")
+    finally:
+        env['closer']()
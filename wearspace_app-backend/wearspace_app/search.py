@@ -0,0 +1,159 @@
+# wearspace_app/search.py
+import re
+
+from sqlalchemy import bindparam, or_, text
+
+from .models import Brand, Product
+
+# Bobot ts_rank / bm25 per kolom: name > brand > material > description
+PG_SEARCH_VECTOR = """
+    setweight(to_tsvector('simple', coalesce(products.name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(brands.name, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(products.material, '')), 'C') ||
+    setweight(to_tsvector('simple', coalesce(products.description, '')), 'D')
+"""
+
+# Kolom products_fts: product_id, name, description, material, brand_name
+FTS5_BM25_WEIGHTS = '0.0, 10.0, 1.0, 2.0, 5.0'
+
+# product_id di FTS5 tidak terindeks, jadi baris products_fts dicari lewat
+# rowid-nya. products_fts_ids memetakan product_id ke rowid tersebut
+# (rowid implisit products bisa berubah setelah VACUUM, jadi tidak dipakai).
+FTS5_ROWID = '(SELECT rowid FROM products_fts_ids WHERE product_id = :id)'
+FTS5_ROWIDS = '(SELECT rowid FROM products_fts_ids WHERE product_id IN :ids)'
+FTS5_INSERT = (
+    'INSERT INTO products_fts (rowid, product_id, name, description, material, brand_name) '
+    'SELECT products_fts_ids.rowid, products.id, products.name, products.description, '
+    'products.material, brands.name '
+    'FROM products JOIN brands ON brands.id = products.brand_id '
+    'JOIN products_fts_ids ON products_fts_ids.product_id = products.id '
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _dialect_name(dbsession):
+    return dbsession.get_bind().dialect.name
+
+
+def _fts5_query(q):
+    # Setiap kata di-quote supaya operator FTS5 dari user tidak ikut dieksekusi,
+    # '*' membuat pencarian prefix ("snea" -> "sneakers")
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(q))
+
+
+def index_product(dbsession, product_id):
+    """
+    Sinkronkan indeks pencarian untuk satu produk setelah insert/update.
+    """
+    dialect_name = _dialect_name(dbsession)
+    params = {'id': str(product_id)}
+    if dialect_name == 'postgresql':
+        dbsession.execute(text(
+            f'UPDATE products SET search_vector = {PG_SEARCH_VECTOR} '
+            'FROM brands WHERE brands.id = products.brand_id AND products.id = :id'
+        ), params)
+    elif dialect_name == 'sqlite':
+        dbsession.execute(text('INSERT OR IGNORE INTO products_fts_ids (product_id) VALUES (:id)'), params)
+        dbsession.execute(text(f'DELETE FROM products_fts WHERE rowid = {FTS5_ROWID}'), params)
+        dbsession.execute(text(FTS5_INSERT + 'WHERE products.id = :id'), params)
+
+
+def index_products(dbsession, product_ids):
+    """
+    Versi batch ``index_product`` untuk bulk import: satu statement per batch.
+    """
+    if not product_ids:
+        return
+    dialect_name = _dialect_name(dbsession)
+    params = {'ids': [str(i) for i in product_ids]}
+    if dialect_name == 'postgresql':
+        dbsession.execute(text(
+            f'UPDATE products SET search_vector = {PG_SEARCH_VECTOR} '
+            'FROM brands WHERE brands.id = products.brand_id AND products.id IN :ids'
+        ).bindparams(bindparam('ids', expanding=True)), params)
+    elif dialect_name == 'sqlite':
+        for statement in (
+            'INSERT OR IGNORE INTO products_fts_ids (product_id) SELECT id FROM products WHERE id IN :ids',
+            f'DELETE FROM products_fts WHERE rowid IN {FTS5_ROWIDS}',
+            FTS5_INSERT + 'WHERE products.id IN :ids',
+        ):
+            dbsession.execute(text(statement).bindparams(bindparam('ids', expanding=True)), params)
+
+
+def reindex_brand(dbsession, brand_id):
+    """
+    Nama brand ikut diindeks, jadi rename brand memperbarui semua produknya.
+    """
+    dialect_name = _dialect_name(dbsession)
+    params = {'brand_id': str(brand_id)}
+    if dialect_name == 'postgresql':
+        dbsession.execute(text(
+            f'UPDATE products SET search_vector = {PG_SEARCH_VECTOR} '
+            'FROM brands WHERE brands.id = products.brand_id AND brands.id = :brand_id'
+        ), params)
+    elif dialect_name == 'sqlite':
+        dbsession.execute(text(
+            'UPDATE products_fts SET brand_name = '
+            '(SELECT name FROM brands WHERE brands.id = :brand_id) '
+            'WHERE rowid IN (SELECT products_fts_ids.rowid FROM products_fts_ids '
+            'JOIN products ON products.id = products_fts_ids.product_id '
+            'WHERE products.brand_id = :brand_id)'
+        ), params)
+
+
+def remove_product(dbsession, product_id):
+    # Di PostgreSQL search_vector ikut terhapus bersama barisnya
+    if _dialect_name(dbsession) == 'sqlite':
+        params = {'id': str(product_id)}
+        dbsession.execute(text(f'DELETE FROM products_fts WHERE rowid = {FTS5_ROWID}'), params)
+        dbsession.execute(text('DELETE FROM products_fts_ids WHERE product_id = :id'), params)
+
+
+def search_products(dbsession, q, limit, options=()):
+    """
+    Cari produk berdasarkan name, description, material dan nama brand.
+
+    Hasil diurutkan dari yang paling relevan. ``options`` diteruskan ke
+    query Product (misalnya ``load_only`` untuk sparse fieldset).
+    """
+    dialect_name = _dialect_name(dbsession)
+    if dialect_name == 'postgresql':
+        ranked = dbsession.execute(text(
+            'SELECT products.id FROM products, websearch_to_tsquery(\'simple\', :q) AS query '
+            'WHERE products.search_vector @@ query '
+            'ORDER BY ts_rank_cd(products.search_vector, query) DESC, products.id '
+            'LIMIT :limit'
+        ), {'q': q, 'limit': limit}).scalars().all()
+    elif dialect_name == 'sqlite':
+        match = _fts5_query(q)
+        if not match:
+            return []
+        ranked = dbsession.execute(text(
+            'SELECT product_id FROM products_fts WHERE products_fts MATCH :match '
+            f'ORDER BY bm25(products_fts, {FTS5_BM25_WEIGHTS}), product_id '
+            'LIMIT :limit'
+        ), {'match': match, 'limit': limit}).scalars().all()
+    else:
+        # Database lain: fallback ILIKE tanpa ranking
+        pattern = f'%{q}%'
+        return (
+            dbsession.query(Product).join(Brand).options(*options)
+            .filter(or_(
+                Product.name.ilike(pattern),
+                Product.description.ilike(pattern),
+                Product.material.ilike(pattern),
+                Brand.name.ilike(pattern),
+            ))
+            .order_by(Product.name, Product.id)
+            .limit(limit).all()
+        )
+
+    if not ranked:
+        return []
+    ids = [str(i) for i in ranked]
+    products = {
+        str(p.id): p
+        for p in dbsession.query(Product).options(*options).filter(Product.id.in_(ids)).all()
+    }
+    return [products[i] for i in ids if i in products]
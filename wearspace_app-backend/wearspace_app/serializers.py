@@ -0,0 +1,169 @@
+# wearspace_app/serializers.py
+import threading
+from operator import attrgetter
+
+from sqlalchemy import DateTime, Numeric
+from sqlalchemy.orm import class_mapper, load_only
+from webob.exc import HTTPBadRequest
+
+from .models.meta import UUIDColumn
+
+# Kolom yang tidak boleh pernah keluar lewat API
+EXCLUDED_COLUMNS = frozenset(['hashed_password'])
+
+_serializers = {}
+_lock = threading.Lock()
+
+
+def _converter(column):
+    # Konversi dipilih sekali per kolom berdasarkan tipenya, bukan per nilai
+    if isinstance(column.type, UUIDColumn):
+        return 'str({v})'
+    if isinstance(column.type, DateTime):
+        return '{v}.isoformat()'
+    if isinstance(column.type, Numeric):
+        return 'float({v})'
+    return None
+
+
+def column_keys(model):
+    """
+    Nama atribut kolom ``model`` yang boleh keluar lewat API, urut sesuai tabel.
+    """
+    return [
+        prop.key for prop in class_mapper(model).column_attrs
+        if prop.columns[0].name not in EXCLUDED_COLUMNS
+    ]
+
+
+def compile_serializer(model, fields=None):
+    """
+    Buat fungsi ``serialize(obj)`` khusus untuk ``model``.
+
+    Source fungsi dibentuk dari daftar kolom tabel lalu di-``exec`` sekali,
+    sehingga saat runtime tidak ada lagi iterasi ``__table__.columns``
+    maupun rantai ``isinstance`` untuk setiap nilai. ``fields`` membatasi
+    kolom yang ikut (sparse fieldset).
+    """
+    mapper = class_mapper(model)
+    columns = [
+        (prop.key, prop.columns[0])
+        for prop in mapper.column_attrs
+        if prop.columns[0].name not in EXCLUDED_COLUMNS
+        and (fields is None or prop.key in fields)
+    ]
+    if not columns:
+        return lambda obj: {}
+    lines = []
+    for i, (key, column) in enumerate(columns):
+        var = f'v{i}'
+        expr = _converter(column)
+        if expr is None:
+            lines.append(f'        {key!r}: {var},')
+        else:
+            lines.append(f'        {key!r}: None if {var} is None else {expr.format(v=var)},')
+    names = ', '.join(f'v{i}' for i in range(len(columns)))
+    loaded = ', '.join(f'd[{key!r}]' for key, _ in columns)
+    source = (
+        'def serialize(obj):\n'
+        # Atribut yang sudah ter-load dibaca langsung dari __dict__ instance;
+        # kalau ada yang expired/deferred, fallback ke getattr (lazy load)
+        '    d = obj.__dict__\n'
+        '    try:\n'
+        f'        {names}, = {loaded},\n'
+        '    except KeyError:\n'
+        f'        {names}, = _get(obj)\n'
+        '    return {\n'
+        + '\n'.join(lines) + '\n'
+        '    }\n'
+    )
+    namespace = {'_get': attrgetter(*[key for key, _ in columns])}
+    if len(columns) == 1:
+        namespace['_get'] = lambda obj, _g=namespace['_get']: (_g(obj),)
+    exec(compile(source, f'<serializer {model.__name__}>', 'exec'), namespace)
+    serialize = namespace['serialize']
+    serialize.__doc__ = f'Compiled serializer for {model.__name__}.'
+    return serialize
+
+
+def get_serializer(model, fields=None):
+    key = (model, fields)
+    serializer = _serializers.get(key)
+    if serializer is None:
+        with _lock:
+            serializer = _serializers.get(key)
+            if serializer is None:
+                serializer = _serializers[key] = compile_serializer(model, fields)
+    return serializer
+
+
+def configure_serializers(base):
+    """
+    Kompilasi serializer untuk semua model yang terdaftar di ``base``.
+
+    Dipanggil dari ``wearspace_app.models`` setelah ``configure_mappers()``.
+    """
+    for mapper in base.registry.mappers:
+        get_serializer(mapper.class_)
+
+
+def serialize(obj, relations=(), fields=None):
+    """
+    Serialisasi ``obj`` ke dict siap JSON.
+
+    ``relations`` berisi nama relationship yang ikut diserialisasi, misalnya
+    ``('product', 'user')`` untuk Transaction. Relasi bernilai ``None``
+    tidak dimasukkan ke hasil. ``fields`` (hasil ``parse_fields``) membatasi
+    kolom milik ``obj`` sendiri.
+    """
+    data = get_serializer(type(obj), fields)(obj)
+    for name in relations:
+        related = getattr(obj, name)
+        if related is None:
+            continue
+        if isinstance(related, (list, tuple, set)):
+            data[name] = [get_serializer(type(r))(r) for r in related]
+        else:
+            data[name] = get_serializer(type(related))(related)
+    return data
+
+
+def parse_fields(request, model, relations=()):
+    """
+    Baca ``?fields=id,name,price`` untuk ``model``.
+
+    Mengembalikan ``(fields, relations)``: ``fields`` adalah tuple nama
+    kolom (urut sesuai tabel) atau ``None`` kalau parameter tidak dikirim;
+    ``relations`` hanya berisi relasi yang ikut diminta. Nama yang bukan
+    kolom model maupun relasi yang diizinkan ditolak dengan 400.
+    """
+    raw = request.params.get('fields')
+    if not raw:
+        return None, tuple(relations)
+    requested = set(f.strip() for f in raw.split(',') if f.strip())
+    allowed = column_keys(model)
+    unknown = requested - set(allowed) - set(relations)
+    if unknown:
+        raise HTTPBadRequest(json={
+            'error': f"Invalid fields: {', '.join(sorted(unknown))}. "
+                     f"Allowed: {', '.join(allowed + list(relations))}"
+        })
+    fields = tuple(key for key in allowed if key in requested)
+    return fields, tuple(r for r in relations if r in requested)
+
+
+def load_only_options(model, fields, required=()):
+    """
+    Opsi query ``load_only`` supaya SELECT hanya memuat kolom yang diminta.
+
+    ``required`` berisi kolom tambahan yang dibutuhkan server (misalnya
+    kolom sort untuk cursor pagination) walau tidak ikut di output.
+    """
+    if fields is None:
+        return []
+    attrs = [getattr(model, f) for f in fields] + list(required)
+    if not attrs:
+        # Hanya relasi yang diminta, cukup primary key
+        mapper = class_mapper(model)
+        attrs = [getattr(model, mapper.get_property_by_column(c).key) for c in mapper.primary_key]
+    return [load_only(*attrs)]
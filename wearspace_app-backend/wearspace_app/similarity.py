@@ -0,0 +1,307 @@
+# wearspace_app/similarity.py
+import bisect
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+import transaction
+from sqlalchemy.orm import Session
+
+from .facets import get_price_buckets
+from .models import Product
+
+log = logging.getLogger(__name__)
+
+# Bobot per jenis atribut; produk dengan category sama lebih mirip daripada
+# produk yang hanya berbagi satu ukuran
+FEATURE_WEIGHTS = {
+    'category': 3.0,
+    'brand': 2.0,
+    'material': 1.5,
+    'price': 1.5,
+    'color': 1.0,
+    'size': 0.5,
+}
+
+DEFAULT_TOP_K = 12
+DEFAULT_REBUILD_INTERVAL = 3600
+
+_registry_lock = threading.Lock()
+
+
+def _feature_values(product):
+    return (
+        product.id, product.category, product.material, product.brand_id,
+        list(product.colors or ()), list(product.sizes or ()), product.price,
+    )
+
+
+def product_features(category, material, brand_id, colors, sizes, price, price_buckets):
+    """
+    Vektor atribut sparse ``{(jenis, nilai): bobot}``. Material dipecah per
+    koma ("Mesh, Rubber"), harga dipetakan ke bucket harga facet.
+    """
+    features = {}
+
+    def add(kind, value):
+        if value not in (None, ''):
+            features[(kind, str(value).strip().lower())] = FEATURE_WEIGHTS[kind]
+
+    add('category', category)
+    add('brand', brand_id)
+    for part in (material or '').split(','):
+        add('material', part.strip())
+    if price is not None:
+        add('price', bisect.bisect_right(price_buckets, price))
+    for color in colors or ():
+        add('color', color)
+    for size in sizes or ():
+        add('size', size)
+    return features
+
+
+class SimilarityIndex(object):
+    """
+    "Produk serupa" berdasarkan cosine similarity atribut produk.
+
+    Katalog disimpan sebagai matriks fitur sparse (vektor per produk plus
+    inverted index fitur -> produk). Skor satu produk terhadap seluruh
+    katalog dihitung sekaligus lewat posting list fiturnya, jadi hanya
+    produk yang berbagi minimal satu fitur yang disentuh. Top-K per produk
+    di-cache; perubahan satu produk hanya memperbarui cache produk yang
+    berbagi fitur dengannya.
+
+    Build penuh berkala (``rebuild_interval``) dan build setelah bulk
+    import berjalan di thread background dengan Session sendiri, sama
+    seperti ``CoPurchaseIndex``; lookup tetap membaca indeks lama sampai
+    indeks baru ditukar di bawah lock.
+    """
+
+    def __init__(self, price_buckets, top_k=DEFAULT_TOP_K, rebuild_interval=DEFAULT_REBUILD_INTERVAL):
+        self.price_buckets = price_buckets
+        self.top_k = top_k
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        # Hanya satu build penuh berjalan pada satu waktu
+        self._build_lock = threading.Lock()
+        self._rebuild_thread = None
+        # Perubahan produk selama build penuh berjalan, diulang setelah ditukar
+        self._pending = None
+        self._invalidated = False
+        self._vectors = {}
+        self._norms = {}
+        self._postings = defaultdict(set)
+        self._top = {}
+        self._built_at = None
+
+    def _set_vector(self, product_id, features):
+        for feature in self._vectors.pop(product_id, {}):
+            postings = self._postings.get(feature)
+            if postings is not None:
+                postings.discard(product_id)
+                if not postings:
+                    del self._postings[feature]
+        self._norms.pop(product_id, None)
+        if features is None:
+            return
+        self._vectors[product_id] = features
+        self._norms[product_id] = math.sqrt(sum(w * w for w in features.values())) or 1.0
+        for feature in features:
+            self._postings[feature].add(product_id)
+
+    def _scores(self, product_id):
+        vector = self._vectors[product_id]
+        dots = defaultdict(float)
+        for feature, weight in vector.items():
+            # Fitur yang sama selalu berbobot sama di kedua vektor
+            contribution = weight * weight
+            for other in self._postings[feature]:
+                if other != product_id:
+                    dots[other] += contribution
+        norm = self._norms[product_id]
+        return {other: dot / (norm * self._norms[other]) for other, dot in dots.items()}
+
+    def _similarity(self, a, b):
+        vector, other = self._vectors.get(a), self._vectors.get(b)
+        if vector is None or other is None:
+            return 0.0
+        dot = sum(w * w for feature, w in vector.items() if feature in other)
+        return dot / (self._norms[a] * self._norms[b])
+
+    def _compute_top(self, product_id):
+        return tuple(heapq.nlargest(
+            self.top_k, self._scores(product_id).items(), key=lambda item: (item[1], str(item[0]))
+        ))
+
+    def rebuild(self, dbsession):
+        """
+        Build penuh ke indeks baru tanpa memegang lock, lalu tukar. Perubahan
+        produk yang commit selama build diterapkan lagi setelah ditukar.
+        """
+        with self._build_lock:
+            self._build(dbsession)
+
+    def _build(self, dbsession):
+        with self._lock:
+            self._pending = []
+            self._invalidated = False
+            started = time.monotonic()
+        try:
+            fresh = SimilarityIndex(self.price_buckets, self.top_k)
+            rows = dbsession.query(
+                Product.id, Product.category, Product.material, Product.brand_id,
+                Product.colors, Product.sizes, Product.price,
+            )
+            for product_id, *values in rows:
+                fresh._set_vector(product_id, product_features(*values, self.price_buckets))
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            self._vectors, self._norms = fresh._vectors, fresh._norms
+            self._postings, self._top = fresh._postings, {}
+            pending, self._pending = self._pending, None
+            for product_id, values in pending:
+                self._update(product_id, values)
+            # Bulk import selama build: bisa jadi belum terbaca, build lagi
+            self._built_at = float('-inf') if self._invalidated else started
+
+    def _rebuild_in_background(self, bind):
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+
+            def run():
+                # Session request sudah ditutup saat thread ini berjalan
+                dbsession = Session(bind=bind)
+                try:
+                    self.rebuild(dbsession)
+                except Exception:
+                    log.exception('Similarity rebuild failed')
+                    # Indeks lama tetap dipakai; dicoba lagi setelah rebuild_interval
+                    with self._lock:
+                        self._built_at = time.monotonic()
+                finally:
+                    dbsession.close()
+
+            self._rebuild_thread = threading.Thread(target=run, name='similarity-rebuild', daemon=True)
+            self._rebuild_thread.start()
+
+    def update(self, product_id, values=None):
+        """
+        Ganti vektor satu produk (``values`` dari ``_feature_values``, None
+        kalau produk dihapus) dan perbarui top-K produk lain yang berbagi
+        fitur dengannya, tanpa menghitung ulang seluruh katalog.
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((product_id, values))
+            if self._built_at is not None:
+                self._update(product_id, values)
+
+    def _update(self, product_id, values):
+        features = None if values is None else product_features(*values[1:], self.price_buckets)
+        affected = set()
+        for feature in set(self._vectors.get(product_id, {})) | set(features or {}):
+            affected |= self._postings.get(feature, set())
+        self._set_vector(product_id, features)
+        self._top.pop(product_id, None)
+        affected.discard(product_id)
+
+        for other in affected:
+            top = self._top.get(other)
+            if top is None:
+                continue
+            if any(pid == product_id for pid, _ in top):
+                # Skornya bisa turun; produk pengganti belum diketahui,
+                # jadi top-K produk ini dihitung ulang saat diminta
+                del self._top[other]
+                continue
+            score = self._similarity(other, product_id)
+            key = (score, str(product_id))
+            if score > 0 and (len(top) < self.top_k or key > (top[-1][1], str(top[-1][0]))):
+                merged = sorted(top + ((product_id, score),), key=lambda item: (item[1], str(item[0])), reverse=True)
+                self._top[other] = tuple(merged[:self.top_k])
+
+    def invalidate(self):
+        # Bulk import: build penuh dimulai di lookup berikutnya
+        with self._lock:
+            self._invalidated = True
+            if self._built_at is not None:
+                self._built_at = float('-inf')
+
+    def ensure_fresh(self, dbsession):
+        if self._built_at is None:
+            # Belum ada indeks yang bisa dipakai: build pertama ditunggu,
+            # request yang datang bersamaan memakai hasil build yang sama
+            with self._build_lock:
+                if self._built_at is None:
+                    self._build(dbsession)
+        elif time.monotonic() - self._built_at >= self.rebuild_interval:
+            self._rebuild_in_background(dbsession.get_bind())
+
+    def similar(self, dbsession, product_id, limit=None):
+        """
+        ``[(product_id, similarity), ...]`` terurut menurun, atau None kalau
+        produk tidak ada.
+        """
+        self.ensure_fresh(dbsession)
+        with self._lock:
+            if product_id not in self._vectors:
+                return None
+            top = self._top.get(product_id)
+            if top is None:
+                top = self._top[product_id] = self._compute_top(product_id)
+        return list(top[:limit] if limit else top)
+
+
+def create_index(settings):
+    return SimilarityIndex(
+        get_price_buckets(settings),
+        int(settings.get('similarity.top_k', DEFAULT_TOP_K)),
+        int(settings.get('similarity.rebuild_interval', DEFAULT_REBUILD_INTERVAL)),
+    )
+
+
+def get_similarity_index(request):
+    registry = request.registry
+    index = registry.get('similarity_index')
+    if index is None:
+        with _registry_lock:
+            index = registry.get('similarity_index')
+            if index is None:
+                index = create_index(registry.settings or {})
+                registry['similarity_index'] = index
+    return index
+
+
+def update_similarity_on_commit(request, products=(), deleted=(), rebuild=False):
+    """
+    Perbarui vektor ``products`` (objek Product yang dibuat/diubah) dan
+    buang ``deleted`` (product_id) setelah transaksi commit. ``rebuild``
+    membuang seluruh indeks (mis. setelah bulk import).
+    """
+    index = get_similarity_index(request)
+    # Nilai atribut diambil sekarang, objeknya sudah expired setelah commit
+    values = [_feature_values(product) for product in products]
+
+    def after_commit(success):
+        if success:
+            if rebuild:
+                index.invalidate()
+                return
+            for row in values:
+                index.update(row[0], row)
+            for product_id in deleted:
+                index.update(product_id)
+
+    tm = getattr(request, 'tm', None) or transaction.manager
+    tm.get().addAfterCommitHook(after_commit)
+
+
+def includeme(config):
+    config.registry['similarity_index'] = create_index(config.get_settings())
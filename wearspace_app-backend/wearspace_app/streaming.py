@@ -0,0 +1,116 @@
+# wearspace_app/streaming.py
+import json
+import logging
+
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+
+STREAM_BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+def wants_stream(request):
+    """
+    Streaming bersifat opt-in lewat ``?stream=1``.
+    """
+    return (request.params.get('stream') or '').lower() in TRUE_VALUES
+
+
+def iter_query(request, build_query, serialize_row):
+    """
+    Generator baris hasil serialisasi yang dibaca lewat server-side cursor.
+
+    pyramid_tm sudah commit dan menutup ``request.dbsession`` sebelum server
+    WSGI mulai membaca ``app_iter``, jadi generator ini membuka Session
+    sendiri (read-only) dari engine yang sama. ``build_query(session)``
+    harus mengembalikan Query; barisnya diambil per batch dengan
+    ``yield_per`` (yang juga mengaktifkan ``stream_results``) sehingga
+    memori tetap rata berapa pun jumlah barisnya.
+    """
+    settings = request.registry.settings or {}
+    batch_size = int(settings.get('api.stream.batch_size', STREAM_BATCH_SIZE))
+    bind = request.dbsession.get_bind()
+
+    def rows():
+        session = Session(bind=bind)
+        try:
+            for row in build_query(session).yield_per(batch_size):
+                yield serialize_row(row)
+        finally:
+            session.close()
+
+    return rows()
+
+
+def stream_query(request, build_query, serialize_row):
+    """
+    Seperti ``iter_query``, hasilnya dirender oleh renderer ``json_stream``.
+    """
+    request.override_renderer = 'json_stream'
+    return iter_query(request, build_query, serialize_row)
+
+
+def iter_chunks(encoded_rows, chunk_size=CHUNK_SIZE):
+    """
+    Gabungkan potongan bytes menjadi chunk ~``chunk_size`` untuk ``app_iter``.
+    """
+    buffer = []
+    size = 0
+    try:
+        for encoded in encoded_rows:
+            buffer.append(encoded)
+            size += len(encoded)
+            if size >= chunk_size:
+                yield b''.join(buffer)
+                buffer, size = [], 0
+    except Exception:
+        # Header sudah terkirim, yang bisa dilakukan hanya mencatat error
+        log.exception('Streaming response aborted')
+        raise
+    if buffer:
+        yield b''.join(buffer)
+
+
+class StreamingJSON(object):
+    """
+    Renderer yang mengubah iterable menjadi WSGI ``app_iter``.
+
+    Elemen array ditulis satu per satu dan dikumpulkan per ~64KB sebelum
+    dikirim, jadi tidak ada list atau string utuh yang dibangun di memori.
+    """
+
+    def __init__(self, serializer=json.dumps, chunk_size=CHUNK_SIZE, **kw):
+        self.serializer = serializer
+        self.chunk_size = chunk_size
+        self.kw = kw
+
+    def __call__(self, info):
+        def _render(value, system):
+            request = system.get('request')
+            if request is not None:
+                response = request.response
+                ct = response.content_type
+                if ct == response.default_content_type:
+                    response.content_type = 'application/json'
+            return self.iter_json(value)
+        return _render
+
+    def iter_json(self, rows):
+        return iter_chunks(self._encode(rows), self.chunk_size)
+
+    def _encode(self, rows):
+        dumps = self.serializer
+        yield b'['
+        first = True
+        for row in rows:
+            encoded = dumps(row, **self.kw)
+            if isinstance(encoded, str):
+                encoded = encoded.encode('utf-8')
+            if not first:
+                yield b','
+            yield encoded
+            first = False
+        yield b']'
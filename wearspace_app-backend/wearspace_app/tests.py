@@ -6,9 +6,7 @@ from datetime import datetime, timedelta
 from pyramid import testing
 from webob.multidict import MultiDict
 from webob.response import Response
-from webob.exc import HTTPNotFound, HTTPBadRequest, HTTPUnauthorized, HTTPConflict
-
-from sqlalchemy import engine_from_config
+from webob.exc import HTTPNotFound, HTTPBadRequest, HTTPUnauthorized, HTTPConflict, HTTPNotModified
 
 from .models import (
     Base,
@@ -18,6 +16,7 @@ from .models import (
     Transaction,
     Favorite,
     Inspiration,
+    get_engine,
     get_session_factory,
     get_tm_session,
 )
@@ -41,12 +40,12 @@ class BaseTest(unittest.TestCase):
         self.config.include('pyramid_tm')
         self.config.include('pyramid_sqlalchemy')
         self.config.include('pyramid_retry')
-        self.config.include('..models')
-        self.config.include('..routes') # Include routes to resolve view_config
+        self.config.include('.models')
+        self.config.include('.routes') # Include routes to resolve view_config
         self.config.scan('.views.api') # Scan specific API views
 
         settings = self.config.get_settings()
-        self.engine = engine_from_config(settings, 'sqlalchemy.')
+        self.engine = get_engine(settings)
         Base.metadata.create_all(self.engine) # Create all tables
         session_factory = get_session_factory(self.engine)
         self.dbsession = get_tm_session(session_factory, transaction.manager)
@@ -289,6 +288,16 @@ class BrandAPITests(BaseTest):
         self.assertGreaterEqual(len(response.json), 1)
         self.assertIn(self.test_brand.name, [b['name'] for b in response.json])
 
+    def test_get_brand_by_id(self):
+        from .views.api import get_brand
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_brand_id)
+        self.assertEqual(get_brand(request)['name'], 'Test Brand')
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(uuid.uuid4())
+        with self.assertRaises(HTTPNotFound):
+            get_brand(request)
+
     def test_create_brand_success(self):
         from .views.api import create_brand
         request = _get_app_request(self.dbsession)
@@ -929,4 +938,2368 @@ class InspirationAPITests(BaseTest):
         request = _get_app_request(self.dbsession)
         request.matchdict['id'] = str(uuid.uuid4())
         with self.assertRaises(HTTPNotFound):
-            delete_inspiration(request)
\ No newline at end of file
+            delete_inspiration(request)
+
+
+# --- Pagination Tests ---
+class PaginationTests(BaseTest):
+    def _add_products(self, count):
+        ids = []
+        base = datetime(2025, 1, 1, 10, 0, 0)
+        for i in range(count):
+            product_id = uuid.uuid4()
+            self.dbsession.add(Product(
+                id=product_id,
+                name=f"Paged Product {i}",
+                brand_id=self.test_brand_id,
+                price=10 + i,
+                stock=5,
+                sizes=["M"],
+                colors=["Black"],
+                # Dua produk berbagi created_at supaya tie-break id ikut diuji
+                created_at=base + timedelta(minutes=i // 2)
+            ))
+            ids.append(product_id)
+        transaction.commit()
+        return ids
+
+    def test_cursor_roundtrip(self):
+        from .pagination import encode_cursor, decode_cursor
+        created_at = datetime(2025, 5, 27, 20, 39, 23, 791326)
+        product_id = uuid.uuid4()
+        cursor = encode_cursor([created_at, product_id])
+        self.assertEqual(
+            decode_cursor(cursor, [Product.created_at, Product.id]),
+            [created_at, str(product_id)]
+        )
+
+    def test_invalid_cursor(self):
+        from .views.api import get_products
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('after', 'not-a-cursor')])
+        with self.assertRaises(HTTPBadRequest):
+            get_products(request)
+
+    def test_invalid_limit(self):
+        from .views.api import get_products
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('limit', 'abc')])
+        with self.assertRaises(HTTPBadRequest):
+            get_products(request)
+
+    def test_get_products_walks_all_pages(self):
+        from .views.api import get_products
+        expected = set(str(i) for i in self._add_products(7))
+        expected.add(str(self.test_product_id))
+
+        seen = []
+        after = None
+        while True:
+            request = _get_app_request(self.dbsession)
+            params = [('limit', '3')]
+            if after:
+                params.append(('after', after))
+            request.params = MultiDict(params)
+            page = get_products(request)
+            self.assertLessEqual(len(page), 3)
+            seen.extend(p['id'] for p in page)
+            after = request.response.headers.get('X-Next-Cursor')
+            if not after:
+                break
+
+        self.assertEqual(len(seen), len(set(seen))) # Tidak ada duplikat antar halaman
+        self.assertEqual(set(seen), expected)
+
+    def test_limit_is_capped_by_max_page_size(self):
+        from .views.api import get_products
+        self._add_products(5)
+        self.config.get_settings()['api.page_size.max'] = '2'
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('limit', '1000')])
+        page = get_products(request)
+        self.assertEqual(len(page), 2)
+        self.assertIn('X-Next-Cursor', request.response.headers)
+
+    def test_server_default_timestamps_match_python_format(self):
+        from sqlalchemy import text
+        self._add_products(1)
+        stored = self.dbsession.execute(text('SELECT DISTINCT length(created_at) FROM products')).scalars().all()
+        self.assertEqual(stored, [26]) # 'YYYY-MM-DD HH:MM:SS.ffffff' dari server_default maupun Python
+
+    def test_brands_with_same_server_default_timestamp_are_not_skipped(self):
+        from .views.api import get_brands
+        self.dbsession.add_all([Brand(name=f"Same Second {i}") for i in range(4)])
+        transaction.commit()
+        seen, after = [], None
+        while True:
+            request = _get_app_request(self.dbsession)
+            request.params = MultiDict([('limit', '1')] + ([('after', after)] if after else []))
+            seen.extend(b['id'] for b in get_brands(request))
+            after = request.response.headers.get('X-Next-Cursor')
+            if not after:
+                break
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_keyset_query_uses_composite_index(self):
+        from sqlalchemy import event
+        from .views.api import get_products
+        self._add_products(4)
+
+        def plan(params):
+            statements = []
+
+            def record(conn, cursor, statement, parameters, context, executemany):
+                if statement.startswith('SELECT') and 'LIMIT' in statement:
+                    statements.append((statement, parameters))
+
+            request = _get_app_request(self.dbsession)
+            request.params = MultiDict(params)
+            engine = self.dbsession.get_bind()
+            event.listen(engine, 'before_cursor_execute', record)
+            try:
+                get_products(request)
+            finally:
+                event.remove(engine, 'before_cursor_execute', record)
+            statement, parameters = statements[-1]
+            rows = self.dbsession.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+            return ' | '.join(row[-1] for row in rows), request.response.headers['X-Next-Cursor']
+
+        for extra, index in (
+            ([], 'ix_products_created_at_id'),
+            ([('brand_id', str(self.test_brand_id))], 'ix_products_brand_id_created_at_id'),
+        ):
+            _, cursor = plan([('limit', '2')] + extra)
+            detail, _ = plan([('limit', '2'), ('after', cursor)] + extra)
+            self.assertIn(f'USING INDEX {index}', detail)
+            self.assertNotIn('TEMP B-TREE', detail)
+
+
+# --- Product Filter & Sort Tests ---
+class ProductFilterTests(BaseTest):
+    def _seed_catalog(self):
+        self.dbsession.add_all([
+            Product(name="Runner", brand_id=self.test_brand_id, price=150,
+                    category="Footwear", material="Mesh", stock=3,
+                    sizes=["US 9", "US 10"], colors=["Black"]),
+            Product(name="Trail", brand_id=self.test_brand_id, price=80,
+                    category="Footwear", material="Leather", stock=0,
+                    sizes=["US 8"], colors=["Brown", "Black"]),
+            Product(name="Cap", brand_id=self.test_brand_id, price=20,
+                    category="Accessories", material="Cotton", stock=12,
+                    sizes=["One Size"], colors=["White"]),
+        ])
+        transaction.commit()
+
+    def _get(self, params):
+        from .views.api import get_products
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict(params)
+        return get_products(request)
+
+    def test_filter_category_and_price_range(self):
+        self._seed_catalog()
+        products = self._get([('category', 'Footwear'), ('price_min', '100'), ('price_max', '200')])
+        self.assertEqual([p['name'] for p in products], ['Runner'])
+
+    def test_filter_in_stock_size_and_color(self):
+        self._seed_catalog()
+        products = self._get([('color', 'Black'), ('in_stock', 'true')])
+        self.assertEqual([p['name'] for p in products], ['Runner'])
+        products = self._get([('size', 'US 8')])
+        self.assertEqual([p['name'] for p in products], ['Trail'])
+
+    def test_sort_by_price_descending_with_cursor(self):
+        self._seed_catalog()
+        from .views.api import get_products
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('sort', '-price'), ('limit', '2')])
+        first_page = get_products(request)
+        self.assertEqual([p['name'] for p in first_page], ['Runner', 'Test Product'])
+
+        cursor = request.response.headers['X-Next-Cursor']
+        second_page = self._get([('sort', '-price'), ('limit', '2'), ('after', cursor)])
+        self.assertEqual([p['name'] for p in second_page], ['Trail', 'Cap'])
+
+    def test_invalid_sort_and_filter_values(self):
+        with self.assertRaises(HTTPBadRequest):
+            self._get([('sort', 'stock')])
+        with self.assertRaises(HTTPBadRequest):
+            self._get([('price_min', 'cheap')])
+        with self.assertRaises(HTTPBadRequest):
+            self._get([('brand_id', 'not-a-uuid')])
+
+
+# --- Product Search Tests ---
+class ProductSearchTests(BaseTest):
+    def _search(self, q):
+        from .views.api import search_product
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('q', q)])
+        return search_product(request)
+
+    def _create(self, **fields):
+        from .views.api import create_product
+        request = _get_app_request(self.dbsession)
+        request.json_body = dict({
+            'brand_id': str(self.test_brand_id),
+            'price': 100, 'stock': 5, 'sizes': ['M'], 'colors': ['Black'],
+        }, **fields)
+        return create_product(request).json
+
+    def test_search_ranks_name_matches_first(self):
+        self._create(name='Linen Shirt', description='Breathable summer top', material='Linen')
+        self._create(name='Summer Shorts', description='Pairs well with a linen shirt', material='Cotton')
+        results = self._search('linen')
+        self.assertEqual([p['name'] for p in results], ['Linen Shirt', 'Summer Shorts'])
+
+    def test_search_matches_brand_name_and_follows_updates(self):
+        from .views.api import update_product, delete_product
+        created = self._create(name='Parka', material='Nylon')
+        self.assertEqual([p['name'] for p in self._search('test brand')], ['Parka'])
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = created['id']
+        request.json_body = {'name': 'Anorak'}
+        update_product(request)
+        self.assertEqual(self._search('parka'), [])
+        self.assertEqual([p['name'] for p in self._search('anorak')], ['Anorak'])
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = created['id']
+        delete_product(request)
+        self.assertEqual(self._search('anorak'), [])
+
+    def test_fts_writes_look_up_rows_by_rowid(self):
+        from sqlalchemy import event, text
+        from .views.api import update_brand, update_product, delete_product
+        created = self._create(name='Parka', material='Nylon')
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith(('DELETE FROM products_fts ', 'UPDATE products_fts ')):
+                statements.append((statement, parameters))
+
+        engine = self.dbsession.get_bind()
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            request = _get_app_request(self.dbsession)
+            request.matchdict['id'] = created['id']
+            request.json_body = {'name': 'Anorak'}
+            update_product(request)
+            request = _get_app_request(self.dbsession)
+            request.matchdict['id'] = str(self.test_brand_id)
+            request.json_body = {'name': 'Renamed Brand'}
+            update_brand(request)
+            self.assertEqual([p['name'] for p in self._search('renamed')], ['Anorak'])
+            request = _get_app_request(self.dbsession)
+            request.matchdict['id'] = created['id']
+            delete_product(request)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+        self.assertEqual(len(statements), 3)
+        for statement, parameters in statements:
+            rows = self.dbsession.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+            # 'INDEX 0:' tanpa '=' berarti full scan tabel FTS5
+            self.assertIn('VIRTUAL TABLE INDEX 0:=', ' | '.join(row[-1] for row in rows))
+        self.assertEqual(self.dbsession.execute(text('SELECT count(*) FROM products_fts_ids')).scalar(), 0)
+
+    def test_search_requires_query(self):
+        with self.assertRaises(HTTPBadRequest):
+            self._search('  ')
+
+
+# --- Bulk Import Tests ---
+class ProductImportTests(BaseTest):
+    def _import(self, body, content_type='text/csv', batch_size=None):
+        import io
+        from .views.api import import_products
+        if batch_size:
+            self.config.get_settings()['api.import.batch_size'] = str(batch_size)
+        request = _get_app_request(self.dbsession)
+        request.content_type = content_type
+        request.body_file = io.BytesIO(body.encode('utf-8'))
+        summary = import_products(request)
+        transaction.commit()
+        return summary
+
+    def _names(self):
+        return sorted(name for (name,) in self.dbsession.query(Product.name))
+
+    def test_csv_import_resolves_brand_names_and_reports_row_errors(self):
+        summary = self._import(
+            "name,brand,price,stock,sizes,colors,category\n"
+            "Linen Tee,test brand,120.5,4,S|M,White|Black,Apparel\n"
+            "Ghost,Unknown Brand,10,1,M,Black,\n"
+            "No Price,Test Brand,,1,M,Black,\n"
+            "Denim Jacket,Test Brand,300,0,L,Blue,Outerwear\n",
+            batch_size=2
+        )
+        self.assertEqual(summary['inserted'], 2)
+        self.assertEqual([e['row'] for e in summary['errors']], [2, 3])
+        self.assertIn('Unknown Brand', summary['errors'][0]['error'])
+        self.assertEqual(self._names(), ['Denim Jacket', 'Linen Tee', 'Test Product'])
+
+        tee = self.dbsession.query(Product).filter_by(name='Linen Tee').one()
+        self.assertEqual(tee.brand_id, self.test_brand_id)
+        self.assertEqual(tee.sizes, ['S', 'M'])
+        self.assertEqual(float(tee.price), 120.5)
+
+        # Produk hasil import ikut masuk indeks pencarian
+        from .search import search_products
+        self.assertEqual([p.name for p in search_products(self.dbsession, 'denim', 10)], ['Denim Jacket'])
+
+    def test_ndjson_import(self):
+        summary = self._import(
+            '{"name": "Cap", "brand_id": "%s", "price": 15, "stock": 3, "sizes": ["One"], "colors": ["Red"]}\n'
+            'not json\n'
+            '\n'
+            '{"name": "Scarf", "brand_id": "%s", "price": 5, "stock": 1, "sizes": ["One"], "colors": ["Red"]}\n'
+            % (self.test_brand_id, uuid.uuid4()),
+            content_type='application/x-ndjson'
+        )
+        self.assertEqual(summary['inserted'], 1)
+        self.assertEqual(summary['failed'], 2)
+        self.assertEqual([e['row'] for e in summary['errors']], [2, 3])
+        self.assertEqual(self._names(), ['Cap', 'Test Product'])
+
+    def test_database_error_only_rejects_failing_row(self):
+        from sqlalchemy import text
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TRIGGER reject_boom BEFORE INSERT ON products "
+                "WHEN NEW.name = 'Boom' BEGIN SELECT RAISE(ABORT, 'boom rejected'); END"
+            ))
+        summary = self._import(
+            "name,brand,price,stock,sizes,colors\n"
+            "Ok One,Test Brand,1,1,M,Black\n"
+            "Boom,Test Brand,1,1,M,Black\n"
+            "Ok Two,Test Brand,1,1,M,Black\n"
+        )
+        self.assertEqual(summary['inserted'], 2)
+        self.assertEqual(summary['errors'], [{'row': 2, 'error': 'boom rejected'}])
+        self.assertEqual(self._names(), ['Ok One', 'Ok Two', 'Test Product'])
+
+    def test_unsupported_content_type(self):
+        from webob.exc import HTTPUnsupportedMediaType
+        with self.assertRaises(HTTPUnsupportedMediaType):
+            self._import('name\nx\n', content_type='text/plain')
+
+
+# --- Catalog Cache Tests ---
+class LRUCacheTests(unittest.TestCase):
+    def test_eviction_and_counters(self):
+        from .cache import LRUCache
+        cache = LRUCache(max_entries=2)
+        cache.set('products', 'a', 1, cache.generation('products'))
+        cache.set('products', 'b', 2, cache.generation('products'))
+        self.assertEqual(cache.get('products', 'a'), 1) # 'a' jadi paling baru
+        cache.set('products', 'c', 3, cache.generation('products'))
+        self.assertIsNone(cache.get('products', 'b')) # 'b' yang di-evict
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_invalidate_is_per_namespace_and_rejects_stale_set(self):
+        from .cache import LRUCache
+        cache = LRUCache()
+        cache.set('products', 'a', 1, 0)
+        cache.set('brands', 'a', 2, 0)
+        stale_generation = cache.generation('products')
+        cache.invalidate('products')
+        self.assertIsNone(cache.get('products', 'a'))
+        self.assertEqual(cache.get('brands', 'a'), 2)
+        # Hasil query yang dimulai sebelum invalidasi tidak boleh masuk cache
+        self.assertFalse(cache.set('products', 'a', 1, stale_generation))
+        self.assertIsNone(cache.get('products', 'a'))
+
+    def test_concurrent_access(self):
+        import threading
+        from .cache import LRUCache
+        cache = LRUCache(max_entries=16)
+
+        def worker(n):
+            for i in range(500):
+                key = (n * i) % 40
+                if cache.get('products', key) is None:
+                    cache.set('products', key, i, cache.generation('products'))
+                if i % 97 == 0:
+                    cache.invalidate('products')
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 8 * 500)
+        self.assertLessEqual(stats['size'], 16)
+
+
+class CatalogCacheTests(BaseTest):
+    def test_get_products_is_cached_until_product_write_commits(self):
+        from .views.api import get_products, create_product, get_cache_stats
+        first = get_products(_get_app_request(self.dbsession))
+        second = get_products(_get_app_request(self.dbsession))
+        self.assertIs(first, second)
+        stats = get_cache_stats(_get_app_request(self.dbsession))
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+        request = _get_app_request(self.dbsession)
+        request.json_body = {
+            'name': 'Cached Away', 'brand_id': str(self.test_brand_id),
+            'price': 10, 'stock': 1, 'sizes': ['M'], 'colors': ['Red'],
+        }
+        create_product(request)
+        transaction.commit()
+
+        names = [p['name'] for p in get_products(_get_app_request(self.dbsession))]
+        self.assertIn('Cached Away', names)
+
+    def test_brand_write_does_not_invalidate_products(self):
+        from .views.api import get_products, create_brand, get_cache_stats
+        get_products(_get_app_request(self.dbsession))
+        request = _get_app_request(self.dbsession)
+        request.json_body = {'name': 'Another Brand'}
+        create_brand(request)
+        transaction.commit()
+        get_products(_get_app_request(self.dbsession))
+        self.assertEqual(get_cache_stats(_get_app_request(self.dbsession))['hits'], 1)
+
+
+# --- Conditional GET Tests ---
+class ConditionalGetTests(BaseTest):
+    def test_collection_etag_returns_304_until_write(self):
+        from .views.api import get_products, update_product
+        request = _get_app_request(self.dbsession)
+        get_products(request)
+        etag = request.response.headers['ETag']
+
+        request = _get_app_request(self.dbsession)
+        request.headers['If-None-Match'] = etag
+        with self.assertRaises(HTTPNotModified):
+            get_products(request)
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_product_id)
+        request.json_body = {'stock': 3}
+        update_product(request)
+        transaction.commit()
+
+        request = _get_app_request(self.dbsession)
+        request.headers['If-None-Match'] = etag
+        self.assertIsInstance(get_products(request), list)
+        self.assertNotEqual(request.response.headers['ETag'], etag)
+
+    def test_collection_etag_depends_on_query(self):
+        from .views.api import get_products
+        request = _get_app_request(self.dbsession)
+        get_products(request)
+        etag = request.response.headers['ETag']
+
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('category', 'Apparel')])
+        request.headers['If-None-Match'] = etag
+        get_products(request)
+        self.assertNotEqual(request.response.headers['ETag'], etag)
+
+    def test_item_etag_and_last_modified(self):
+        from .views.api import get_inspiration, update_inspiration
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_inspiration_id)
+        get_inspiration(request)
+        etag = request.response.headers['ETag']
+        last_modified = request.response.headers['Last-Modified']
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_inspiration_id)
+        request.headers['If-Modified-Since'] = last_modified
+        with self.assertRaises(HTTPNotModified):
+            get_inspiration(request)
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_inspiration_id)
+        request.json_body = {'title': 'Renamed'}
+        update_inspiration(request)
+        transaction.commit()
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_inspiration_id)
+        request.headers['If-None-Match'] = etag
+        self.assertEqual(get_inspiration(request)['title'], 'Renamed')
+
+    def test_item_etag_depends_on_fields(self):
+        from .views.api import get_product
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_product_id)
+        get_product(request)
+        etag = request.response.headers['ETag']
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_product_id)
+        request.params = MultiDict([('fields', 'name')])
+        request.headers['If-None-Match'] = etag
+        self.assertEqual(set(get_product(request)), {'name'})
+        self.assertNotEqual(request.response.headers['ETag'], etag)
+
+    def test_item_not_found(self):
+        from .views.api import get_product
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(uuid.uuid4())
+        with self.assertRaises(HTTPNotFound):
+            get_product(request)
+
+
+# --- Serializer Tests ---
+class SerializerTests(BaseTest):
+    def test_converts_column_types_and_drops_password(self):
+        from .serializers import serialize
+        user = self.dbsession.query(User).get(self.test_user_id)
+        data = serialize(user)
+        self.assertNotIn('hashed_password', data)
+        self.assertEqual(data['id'], str(self.test_user_id))
+        self.assertIsInstance(data['created_at'], str)
+
+        product = self.dbsession.query(Product).get(self.test_product_id)
+        data = serialize(product)
+        self.assertEqual(data['price'], 99.99)
+        self.assertEqual(data['brand_id'], str(self.test_brand_id))
+        self.assertEqual(data['sizes'], ["M", "L"])
+
+    def test_expired_attributes_are_loaded(self):
+        from .serializers import serialize
+        product = self.dbsession.query(Product).get(self.test_product_id)
+        self.dbsession.expire(product)
+        self.assertEqual(serialize(product)['name'], 'Test Product')
+
+    def test_nested_relations(self):
+        from .serializers import serialize
+        self.dbsession.add(Transaction(
+            user_id=self.test_user_id, product_id=self.test_product_id,
+            customer_name="Nested", shipping_address="Jl. Test",
+            payment_method="Transfer", purchased_size="M", purchased_color="Red"
+        ))
+        self.dbsession.flush()
+        t = self.dbsession.query(Transaction).filter_by(customer_name="Nested").one()
+        data = serialize(t, ('product', 'user'))
+        self.assertEqual(data['product']['id'], str(self.test_product_id))
+        self.assertNotIn('hashed_password', data['user'])
+
+        t.user_id = None
+        self.dbsession.flush()
+        self.dbsession.expire(t, ['user'])
+        self.assertNotIn('user', serialize(t, ('product', 'user')))
+
+
+# --- Sparse Fieldset Tests ---
+class SparseFieldsetTests(BaseTest):
+    def _request(self, fields, **params):
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('fields', fields)] + list(params.items()))
+        return request
+
+    def test_get_products_returns_only_requested_fields(self):
+        from sqlalchemy import event
+        from .views.api import get_products
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        self.dbsession.expunge_all()
+        engine = self.dbsession.get_bind()
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            data = get_products(self._request('id,name,price'))
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        self.assertEqual(data, [{'id': str(self.test_product_id), 'name': 'Test Product', 'price': 99.99}])
+
+        # Kolom yang tidak diminta juga tidak ikut di-SELECT
+        select = [s for s in statements if 'FROM products' in s][0]
+        self.assertIn('products.price', select)
+        self.assertNotIn('products.description', select)
+
+    def test_sort_column_is_loaded_but_not_returned(self):
+        from .views.api import get_products
+        data = get_products(self._request('id', sort='-price', limit='1'))
+        self.assertEqual(data, [{'id': str(self.test_product_id)}])
+
+    def test_unknown_field_is_rejected(self):
+        from .views.api import get_products, get_users
+        with self.assertRaises(HTTPBadRequest):
+            get_products(self._request('id,secret'))
+        # hashed_password tidak pernah boleh diminta
+        with self.assertRaises(HTTPBadRequest):
+            get_users(self._request('email,hashed_password'))
+
+    def test_get_product_by_id(self):
+        from .views.api import get_product
+        request = self._request('name,stock')
+        request.matchdict = {'id': str(self.test_product_id)}
+        self.assertEqual(get_product(request), {'name': 'Test Product', 'stock': 10})
+
+    def test_transaction_relations_are_opt_in(self):
+        from .views.api import get_transactions
+        self.dbsession.add(Transaction(
+            user_id=self.test_user_id, product_id=self.test_product_id,
+            customer_name="Sparse", shipping_address="Jl. Test",
+            payment_method="Transfer", purchased_size="M", purchased_color="Red"
+        ))
+        transaction.commit()
+        data = get_transactions(self._request('customer_name'))
+        self.assertEqual(data, [{'customer_name': 'Sparse'}])
+
+        data = get_transactions(self._request('customer_name,product'))
+        self.assertEqual(set(data[0]), {'customer_name', 'product'})
+        self.assertEqual(data[0]['product']['id'], str(self.test_product_id))
+
+
+# --- Streaming Response Tests ---
+class StreamingTests(BaseTest):
+    def _render(self, rows, chunk_size=64):
+        from .streaming import StreamingJSON
+        render = StreamingJSON(chunk_size=chunk_size)(None)
+        return list(render(rows, {}))
+
+    def test_renderer_streams_valid_json_in_chunks(self):
+        import json
+        rows = ({'n': i, 'name': 'x' * 20} for i in range(50))
+        chunks = self._render(rows)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(b''.join(chunks)), [{'n': i, 'name': 'x' * 20} for i in range(50)])
+        self.assertEqual(json.loads(b''.join(self._render(iter([])))), [])
+
+    def test_get_transactions_stream(self):
+        import json
+        from .views.api import get_transactions
+        for i in range(3):
+            self.dbsession.add(Transaction(
+                user_id=self.test_user_id, product_id=self.test_product_id,
+                customer_name=f"Stream {i}", shipping_address="Jl. Test",
+                payment_method="Transfer", purchased_size="M", purchased_color="Red",
+                transaction_date=datetime(2025, 1, 1 + i)
+            ))
+        transaction.commit()
+
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('stream', '1'), ('limit', '1')])
+        rows = get_transactions(request)
+        self.assertEqual(request.override_renderer, 'json_stream')
+        data = json.loads(b''.join(self._render(rows)))
+        # Streaming tidak terkena limit pagination
+        self.assertEqual([t['customer_name'] for t in data], ['Stream 0', 'Stream 1', 'Stream 2'])
+        self.assertEqual(data[0]['product']['id'], str(self.test_product_id))
+        self.assertNotIn('hashed_password', data[0]['user'])
+
+    def test_get_users_stream(self):
+        import json
+        from .views.api import get_users
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('stream', 'true')])
+        data = json.loads(b''.join(self._render(get_users(request))))
+        self.assertEqual(
+            sorted(u['email'] for u in data),
+            [self.test_admin_email, self.test_user_email]
+        )
+
+
+# --- Export Tests ---
+class ExportTests(BaseTest):
+    def _export(self, entity, fmt, **params):
+        from .views.api import export_entity
+        request = _get_app_request(self.dbsession)
+        request.matchdict = {'entity': entity, 'format': fmt}
+        request.params = MultiDict(params)
+        response = export_entity(request)
+        return response, b''.join(response.app_iter).decode('utf-8')
+
+    def test_products_ndjson(self):
+        import json
+        response, body = self._export('products', 'ndjson', fields='id,name,sizes')
+        self.assertEqual(response.content_type, 'application/x-ndjson')
+        self.assertEqual(
+            [json.loads(line) for line in body.splitlines()],
+            [{'id': str(self.test_product_id), 'name': 'Test Product', 'sizes': ['M', 'L']}]
+        )
+
+    def test_products_csv_can_be_reimported(self):
+        import csv
+        import io
+        from .importer import ProductImporter
+        response, body = self._export('products', 'csv')
+        self.assertEqual(response.content_type, 'text/csv')
+        self.assertIn('attachment', response.content_disposition)
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 1)
+        self.assertNotIn('hashed_password', rows[0])
+        self.assertEqual(rows[0]['sizes'], 'M|L')
+
+        summary = ProductImporter(self.dbsession).run(rows)
+        self.assertEqual((summary['inserted'], summary['errors']), (1, []))
+
+    def test_transactions_are_streamed_in_order(self):
+        import csv
+        import io
+        for i in (2, 1, 3):
+            self.dbsession.add(Transaction(
+                user_id=self.test_user_id, product_id=self.test_product_id,
+                customer_name=f"Export {i}", shipping_address="Jl. Test",
+                payment_method="Transfer", purchased_size="M", purchased_color="Red",
+                transaction_date=datetime(2025, 1, i)
+            ))
+        transaction.commit()
+        self.config.get_settings()['api.stream.batch_size'] = '2'
+        _, body = self._export('transactions', 'csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([r['customer_name'] for r in rows], ['Export 1', 'Export 2', 'Export 3'])
+
+    def test_unknown_export(self):
+        with self.assertRaises(HTTPNotFound):
+            self._export('users', 'csv')
+        with self.assertRaises(HTTPNotFound):
+            self._export('products', 'xml')
+
+
+# --- JSON Renderer Tests ---
+class FastJSONRendererTests(unittest.TestCase):
+    def _render(self, value, pretty=False, params=None):
+        from .renderers import FastJSON
+        request = testing.DummyRequest(params=params or {})
+        return FastJSON(pretty=pretty)(None)(value, {'request': request}), request
+
+    def test_compact_by_default(self):
+        body, request = self._render({'a': [1, 2], 'b': 'x'})
+        self.assertEqual(body, b'{"a":[1,2],"b":"x"}')
+        self.assertEqual(request.response.content_type, 'application/json')
+
+    def test_pretty_from_setting_or_query(self):
+        body, _ = self._render({'a': 1}, pretty=True)
+        self.assertIn(b'\n', body)
+        body, _ = self._render({'a': 1}, params={'pretty': '1'})
+        self.assertIn(b'\n', body)
+
+    def test_encodes_uuid_datetime_and_decimal(self):
+        import json
+        from decimal import Decimal
+        value_id = uuid.uuid4()
+        when = datetime(2025, 5, 27, 20, 39, 23, 791326)
+        body, _ = self._render({'id': value_id, 'at': when, 'price': Decimal('9.50')})
+        self.assertEqual(json.loads(body), {
+            'id': str(value_id), 'at': when.isoformat(), 'price': 9.5
+        })
+
+
+# --- Stock Reservation Tests ---
+class StockReservationTests(BaseTest):
+    def test_reserve_stock_is_conditional(self):
+        from .inventory import reserve_stock
+        self.assertEqual(reserve_stock(self.dbsession, self.test_product_id, 4), 6)
+        self.assertIsNone(reserve_stock(self.dbsession, self.test_product_id, 7))
+        self.assertEqual(reserve_stock(self.dbsession, self.test_product_id, 6), 0)
+        self.assertIsNone(reserve_stock(self.dbsession, self.test_product_id))
+        self.assertIsNone(reserve_stock(self.dbsession, uuid.uuid4()))
+        transaction.commit()
+        self.assertEqual(self.dbsession.query(Product).get(self.test_product_id).stock, 0)
+
+
+class ShardedStockTests(BaseTest):
+    def _update(self, **data):
+        from .views.api import update_product
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_product_id)
+        request.json_body = data
+        response = update_product(request)
+        transaction.commit()
+        return response
+
+    def _shards(self):
+        from .models import ProductStockShard
+        return [
+            stock for (stock,) in self.dbsession.query(ProductStockShard.stock)
+            .filter(ProductStockShard.product_id == self.test_product_id)
+            .order_by(ProductStockShard.shard)
+        ]
+
+    def test_enable_split_and_read_sum(self):
+        from .views.api import get_product, get_products
+        self.assertEqual(self._update(stock_shards=4)['stock'], 10)
+        self.assertEqual(self._shards(), [3, 3, 2, 2])
+        self.assertEqual(self.dbsession.query(Product.stock).scalar(), 0)
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_product_id)
+        self.assertEqual(get_product(request)['stock'], 10)
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('in_stock', 'true')])
+        self.assertEqual([p['stock'] for p in get_products(request)], [10])
+
+        # Set stok baru membagi ulang ke semua shard
+        self._update(stock=6)
+        self.assertEqual(self._shards(), [2, 2, 1, 1])
+
+    def test_reserve_drains_every_shard(self):
+        from .inventory import reserve_stock
+        self._update(stock_shards=3)
+        remaining = [reserve_stock(self.dbsession, self.test_product_id) for _ in range(10)]
+        self.assertEqual(sorted(remaining, reverse=True), list(range(9, -1, -1)))
+        self.assertIsNone(reserve_stock(self.dbsession, self.test_product_id))
+        self.assertEqual(self._shards(), [0, 0, 0])
+
+    def test_reserve_spans_shards_when_none_is_big_enough(self):
+        from .inventory import reserve_stock
+        self._update(stock_shards=5, stock=5)
+        self.assertEqual(reserve_stock(self.dbsession, self.test_product_id, 3), 2)
+        self.assertIsNone(reserve_stock(self.dbsession, self.test_product_id, 3))
+        self.assertEqual(sum(self._shards()), 2)
+
+    def test_disable_moves_stock_back(self):
+        from .inventory import reserve_stock
+        self._update(stock_shards=4)
+        reserve_stock(self.dbsession, self.test_product_id, 2)
+        transaction.commit()
+        response = self._update(stock_shards=0)
+        self.assertEqual((response['stock'], response['stock_shards']), (8, 0))
+        self.assertEqual(self._shards(), [])
+
+    def test_invalid_shard_count(self):
+        with self.assertRaises(HTTPBadRequest):
+            self._update(stock_shards=1000)
+
+
+# --- Checkout Tests ---
+class CheckoutTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.second_product_id = uuid.uuid4()
+        self.dbsession.add(Product(
+            id=self.second_product_id, name="Second Product", brand_id=self.test_brand_id,
+            price=20, stock=1, sizes=["S"], colors=["Black"]
+        ))
+        transaction.commit()
+
+    def _checkout(self, items):
+        from .views.api import checkout_cart
+        request = _get_app_request(self.dbsession)
+        request.json_body = {
+            'customer_name': 'Cart Customer',
+            'shipping_address': 'Jl. Keranjang',
+            'payment_method': 'Transfer',
+            'items': items,
+        }
+        return checkout_cart(request)
+
+    def _stock(self, product_id):
+        return self.dbsession.query(Product.stock).filter(Product.id == product_id).scalar()
+
+    def test_checkout_multiple_items(self):
+        response = self._checkout([
+            {'product_id': str(self.test_product_id), 'size': 'M', 'color': 'Red', 'qty': 2},
+            {'product_id': str(self.second_product_id), 'size': 'S', 'color': 'Black'},
+            {'product_id': str(self.test_product_id), 'size': 'L', 'color': 'Blue', 'qty': 3},
+        ])
+        transaction.commit()
+        self.assertEqual(response.status_code, 201)
+        lines = response.json['transactions']
+        self.assertEqual([(t['purchased_size'], t['quantity']) for t in lines], [('M', 2), ('S', 1), ('L', 3)])
+        self.assertEqual(self._stock(self.test_product_id), 5)
+        self.assertEqual(self._stock(self.second_product_id), 0)
+        self.assertEqual(self.dbsession.query(Transaction).count(), 3)
+
+    def test_checkout_is_atomic(self):
+        with self.assertRaises(HTTPBadRequest) as ctx:
+            self._checkout([
+                {'product_id': str(self.test_product_id), 'size': 'M', 'color': 'Red', 'qty': 2},
+                {'product_id': str(self.second_product_id), 'size': 'S', 'color': 'Black', 'qty': 2},
+            ])
+        self.assertEqual(ctx.exception.json['product_ids'], [str(self.second_product_id)])
+        # pyramid_tm membatalkan transaksi saat view raise
+        transaction.abort()
+        self.assertEqual(self._stock(self.test_product_id), 10)
+        self.assertEqual(self._stock(self.second_product_id), 1)
+        self.assertEqual(self.dbsession.query(Transaction).count(), 0)
+
+    def test_checkout_validation(self):
+        with self.assertRaises(HTTPBadRequest):
+            self._checkout([])
+        with self.assertRaises(HTTPBadRequest):
+            self._checkout([{'product_id': str(self.test_product_id), 'size': 'M', 'color': 'Red', 'qty': 0}])
+        with self.assertRaises(HTTPBadRequest) as ctx:
+            self._checkout([{'product_id': str(uuid.uuid4()), 'size': 'M', 'color': 'Red'}])
+        self.assertEqual(ctx.exception.json['error'], 'Product not found.')
+
+
+class StockContentionTests(unittest.TestCase):
+    BUYERS = 200
+    STOCK = 50
+
+    def setUp(self):
+        import os
+        import tempfile
+        # Database file (bukan :memory:) supaya semua thread melihat data yang sama
+        self.tmpdir = tempfile.mkdtemp()
+        self.config = testing.setUp(settings={
+            'sqlalchemy.url': 'sqlite:///' + os.path.join(self.tmpdir, 'contention.db'),
+        })
+        self.engine = get_engine(self.config.get_settings())
+        Base.metadata.create_all(self.engine)
+        self.session_factory = get_session_factory(self.engine)
+
+        self.product_id = uuid.uuid4()
+        with transaction.manager:
+            dbsession = get_tm_session(self.session_factory, transaction.manager)
+            brand = Brand(id=uuid.uuid4(), name="Contention Brand")
+            dbsession.add(brand)
+            dbsession.add(Product(
+                id=self.product_id, name="Limited Sneaker", brand=brand,
+                price=150, stock=self.STOCK, sizes=["42"], colors=["White"]
+            ))
+
+    def tearDown(self):
+        import shutil
+        testing.tearDown()
+        self.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def _buy(self, barrier):
+        from .views.api import create_transaction
+        barrier.wait()
+        try:
+            with transaction.manager:
+                request = testing.DummyRequest(json_body={
+                    'product_id': str(self.product_id),
+                    'customer_name': 'Buyer',
+                    'shipping_address': 'Jl. Rebutan',
+                    'payment_method': 'Transfer',
+                    'purchased_size': '42',
+                    'purchased_color': 'White',
+                })
+                request.registry = self.config.registry
+                request.dbsession = get_tm_session(self.session_factory, transaction.manager)
+                create_transaction(request)
+            return True
+        except HTTPBadRequest as e:
+            self.assertEqual(e.json['error'], 'Product out of stock.')
+            return False
+
+    def test_no_overselling_with_sharded_stock(self):
+        from .inventory import configure_stock_shards
+        with transaction.manager:
+            dbsession = get_tm_session(self.session_factory, transaction.manager)
+            configure_stock_shards(dbsession, dbsession.query(Product).get(self.product_id), 8)
+        self.test_no_overselling_with_concurrent_buyers()
+
+    def test_no_overselling_with_concurrent_buyers(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        barrier = threading.Barrier(self.BUYERS)
+        with ThreadPoolExecutor(max_workers=self.BUYERS) as pool:
+            results = list(pool.map(lambda _: self._buy(barrier), range(self.BUYERS)))
+
+        self.assertEqual(results.count(True), self.STOCK)
+        with transaction.manager:
+            dbsession = get_tm_session(self.session_factory, transaction.manager)
+            from .inventory import shard_totals
+            stock = dbsession.query(Product.stock).filter(Product.id == self.product_id).scalar()
+            self.assertEqual(stock, 0)
+            self.assertEqual(shard_totals(dbsession, [self.product_id]).get(self.product_id, 0), 0)
+            self.assertEqual(dbsession.query(Transaction).count(), self.STOCK)
+
+
+# --- Idempotency Tests ---
+class IdempotencyTests(BaseTest):
+    BACKEND = 'memory'
+
+    def setUp(self):
+        from .idempotency import create_store
+        super().setUp()
+        transaction.commit()
+        self.store = create_store({'idempotency.backend': self.BACKEND})
+        self.config.registry['idempotency_store'] = self.store
+
+    def _post(self, key=None, **overrides):
+        from .views.api import create_transaction
+        request = _get_app_request(self.dbsession)
+        request.json_body = dict({
+            'product_id': str(self.test_product_id),
+            'customer_name': 'Retry Customer',
+            'shipping_address': 'Jl. Ulang',
+            'payment_method': 'Transfer',
+            'purchased_size': 'M',
+            'purchased_color': 'Red',
+        }, **overrides)
+        if key is not None:
+            request.headers['Idempotency-Key'] = key
+        response = create_transaction(request)
+        transaction.commit()
+        return response
+
+    def _stock(self):
+        return self.dbsession.query(Product.stock).filter(Product.id == self.test_product_id).scalar()
+
+    def test_replay_returns_first_response(self):
+        first = self._post('order-1')
+        replay = self._post('order-1')
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.json, first.json)
+        self.assertEqual(replay.headers['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+        self.assertEqual(self._stock(), 9)
+        self.assertEqual(self.dbsession.query(Transaction).count(), 1)
+
+    def test_without_key_every_request_is_new(self):
+        self._post()
+        self._post()
+        self.assertEqual(self._stock(), 8)
+        self.assertEqual(self.dbsession.query(Transaction).count(), 2)
+
+    def test_key_reused_with_different_body(self):
+        from webob.exc import HTTPUnprocessableEntity
+        self._post('order-1')
+        with self.assertRaises(HTTPUnprocessableEntity):
+            self._post('order-1', purchased_size='L')
+        transaction.abort()
+        self.assertEqual(self._stock(), 9)
+
+    def test_failed_request_does_not_consume_key(self):
+        self.dbsession.query(Product).filter(Product.id == self.test_product_id).update({'stock': 0})
+        transaction.commit()
+        with self.assertRaises(HTTPBadRequest):
+            self._post('order-1')
+        transaction.abort()
+
+        self.dbsession.query(Product).filter(Product.id == self.test_product_id).update({'stock': 1})
+        transaction.commit()
+        response = self._post('order-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response.headers)
+        self.assertEqual(self._stock(), 0)
+
+    def test_checkout_replay(self):
+        from .views.api import checkout_cart
+        responses = []
+        for _ in range(2):
+            request = _get_app_request(self.dbsession)
+            request.headers['Idempotency-Key'] = 'cart-1'
+            request.json_body = {
+                'customer_name': 'Cart Customer',
+                'shipping_address': 'Jl. Keranjang',
+                'payment_method': 'Transfer',
+                'items': [{'product_id': str(self.test_product_id), 'size': 'M', 'color': 'Red', 'qty': 3}],
+            }
+            responses.append(checkout_cart(request))
+            transaction.commit()
+        self.assertEqual(responses[1].json, responses[0].json)
+        self.assertEqual(self._stock(), 7)
+
+
+class DatabaseIdempotencyTests(IdempotencyTests):
+    BACKEND = 'database'
+
+    def test_expired_key_is_reused(self):
+        from datetime import timezone
+        from .models import IdempotencyKey
+        self._post('order-1')
+        expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+        self.dbsession.query(IdempotencyKey).update({'expires_at': expired})
+        transaction.commit()
+        replay = self._post('order-1')
+        self.assertNotIn('Idempotent-Replayed', replay.headers)
+        self.assertEqual(self._stock(), 8)
+        self.assertEqual(self.dbsession.query(IdempotencyKey).count(), 1)
+
+
+class MemoryIdempotencyStoreTests(unittest.TestCase):
+    def test_store_is_bounded(self):
+        from .idempotency import MemoryIdempotencyStore
+        store = MemoryIdempotencyStore(max_entries=2)
+        for key in ('a', 'b', 'c'):
+            self.assertIsNone(store.claim(None, 'anonymous', key, 'hash'))
+        self.assertEqual(list(store._entries), [('anonymous', 'b'), ('anonymous', 'c')])
+
+    def test_keys_are_scoped_per_user(self):
+        from .idempotency import MemoryIdempotencyStore
+        store = MemoryIdempotencyStore()
+        self.assertIsNone(store.claim(None, 'user-1', 'k', 'hash'))
+        self.assertIsNone(store.claim(None, 'user-2', 'k', 'hash'))
+        with self.assertRaises(HTTPConflict):
+            store.claim(None, 'user-1', 'k', 'hash')
+
+
+# --- Product Facet Tests ---
+class ProductFacetTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.other_brand_id = uuid.uuid4()
+        self.dbsession.add(Brand(id=self.other_brand_id, name="Other Brand"))
+        self.dbsession.add_all([
+            Product(name="Runner", brand_id=self.test_brand_id, price=150,
+                    category="Footwear", material="Mesh", stock=3,
+                    sizes=["42", "43"], colors=["Black"]),
+            Product(name="Trail", brand_id=self.other_brand_id, price=80,
+                    category="Footwear", material="Leather", stock=0,
+                    sizes=["42"], colors=["Brown", "Black"]),
+        ])
+        transaction.commit()
+        self.config.registry.settings['api.facets.price_buckets'] = '100 200'
+
+    def _facets(self, params=()):
+        from .views.api import get_product_facets
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict(params)
+        return get_product_facets(request)
+
+    @staticmethod
+    def _counts(values):
+        return {v['value']: v['count'] for v in values}
+
+    def test_facet_counts(self):
+        facets = self._facets()
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(self._counts(facets['brand']), {str(self.test_brand_id): 2, str(self.other_brand_id): 1})
+        self.assertEqual(facets['brand'][0]['name'], 'Test Brand')
+        self.assertEqual(self._counts(facets['category']), {'Footwear': 2, 'Apparel': 1})
+        self.assertEqual(self._counts(facets['size']), {'42': 2, '43': 1, 'M': 1, 'L': 1})
+        self.assertEqual(self._counts(facets['color']), {'Black': 2, 'Brown': 1, 'Red': 1, 'Blue': 1})
+        self.assertEqual(
+            [(b['min'], b['max'], b['count']) for b in facets['price']],
+            [(0, 100.0, 2), (100.0, 200.0, 1), (200.0, None, 0)]
+        )
+
+    def test_facets_follow_other_filters(self):
+        facets = self._facets([('category', 'Footwear'), ('in_stock', 'true')])
+        self.assertEqual(facets['total'], 1)
+        self.assertEqual(self._counts(facets['color']), {'Black': 1})
+        # Facet category mengabaikan filter category-nya sendiri
+        self.assertEqual(self._counts(facets['category']), {'Footwear': 1, 'Apparel': 1})
+
+    def test_facets_are_cached_until_product_write(self):
+        from .cache import get_catalog_cache
+        self.assertEqual(self._facets([('limit', '5')])['total'], 3)
+        self.dbsession.add(Product(name="Cap", brand_id=self.test_brand_id, price=20,
+                                   stock=1, sizes=["One"], colors=["White"]))
+        transaction.commit()
+        # Parameter non-filter tidak masuk kunci cache
+        self.assertEqual(self._facets()['total'], 3)
+        get_catalog_cache(_get_app_request(self.dbsession)).invalidate('products')
+        self.assertEqual(self._facets()['total'], 4)
+
+    def test_invalid_filter(self):
+        with self.assertRaises(HTTPBadRequest):
+            self._facets([('price_min', 'abc')])
+
+
+# --- Product Card Read Model Tests ---
+class ProductCardTests(BaseTest):
+    def setUp(self):
+        from .cards import rebuild_cards
+        super().setUp()
+        rebuild_cards(self.dbsession)
+        transaction.commit()
+
+    def _card(self, product_id):
+        from .models import ProductCard
+        self.dbsession.expire_all()
+        return self.dbsession.query(ProductCard).get(product_id)
+
+    def test_rebuild_copies_product_and_brand(self):
+        card = self._card(self.test_product_id)
+        self.assertEqual(card.name, 'Test Product')
+        self.assertEqual(card.brand_name, 'Test Brand')
+        self.assertTrue(card.in_stock)
+        self.assertEqual(card.favorite_count, 0)
+
+    def test_product_writes_maintain_card(self):
+        from .views.api import create_product, delete_product, update_product
+        request = _get_app_request(self.dbsession)
+        request.json_body = {
+            'name': 'Card Product', 'brand_id': str(self.test_brand_id), 'price': 50,
+            'stock': 4, 'sizes': ['S'], 'colors': ['Black'],
+        }
+        product_id = uuid.UUID(create_product(request).json['id'])
+        transaction.commit()
+        card = self._card(product_id)
+        self.assertEqual(card.brand_name, 'Test Brand')
+        self.assertTrue(card.in_stock)
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(product_id)
+        request.json_body = {'price': 75, 'stock': 0}
+        update_product(request)
+        transaction.commit()
+        card = self._card(product_id)
+        self.assertEqual(float(card.price), 75)
+        self.assertFalse(card.in_stock)
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(product_id)
+        delete_product(request)
+        transaction.commit()
+        self.assertIsNone(self._card(product_id))
+
+    def test_sold_out_checkout_updates_in_stock(self):
+        from .views.api import create_transaction
+        self.dbsession.query(Product).filter(Product.id == self.test_product_id).update({'stock': 1})
+        transaction.commit()
+        request = _get_app_request(self.dbsession)
+        request.json_body = {
+            'product_id': str(self.test_product_id), 'customer_name': 'Last Buyer',
+            'shipping_address': 'Jl. Terakhir', 'payment_method': 'Transfer',
+            'purchased_size': 'M', 'purchased_color': 'Red',
+        }
+        create_transaction(request)
+        transaction.commit()
+        self.assertFalse(self._card(self.test_product_id).in_stock)
+
+    def test_brand_rename_updates_cards(self):
+        from .views.api import update_brand
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.test_brand_id)
+        request.json_body = {'name': 'Renamed Brand'}
+        update_brand(request)
+        transaction.commit()
+        self.assertEqual(self._card(self.test_product_id).brand_name, 'Renamed Brand')
+
+    def test_favorites_update_count(self):
+        from .views.api import add_favorite, remove_favorite
+        self.config.testing_securitypolicy(userid=str(self.test_user_id))
+        request = _get_app_request(self.dbsession)
+        request.json_body = {'product_id': str(self.test_product_id)}
+        add_favorite(request)
+        transaction.commit()
+        self.assertEqual(self._card(self.test_product_id).favorite_count, 1)
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['product_id'] = str(self.test_product_id)
+        remove_favorite(request)
+        transaction.commit()
+        self.assertEqual(self._card(self.test_product_id).favorite_count, 0)
+
+    def test_listing_reads_only_product_cards(self):
+        from sqlalchemy import event
+        from .views.api import get_product_cards
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict([('sort', '-price'), ('in_stock', 'true')])
+        engine = self.dbsession.get_bind()
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            cards = get_product_cards(request)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        self.assertEqual([c['name'] for c in cards], ['Test Product'])
+        self.assertEqual(cards[0]['brand_name'], 'Test Brand')
+        selects = [s for s in statements if s.startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertIn('FROM product_cards', selects[0])
+        self.assertNotIn('JOIN', selects[0])
+
+
+# --- Brand Products Tests ---
+class BrandProductsTests(BaseTest):
+    def _seed_brands(self, count, products_per_brand=3, offset=0):
+        brand_ids = []
+        for i in range(offset, offset + count):
+            brand = Brand(id=uuid.uuid4(), name=f"Brand {i}")
+            self.dbsession.add(brand)
+            for j in range(products_per_brand):
+                self.dbsession.add(Product(
+                    name=f"Brand {i} Product {j}", brand_id=brand.id, price=10 + j,
+                    stock=j, sizes=["M"], colors=["Black"]
+                ))
+            brand_ids.append(brand.id)
+        transaction.commit()
+        return brand_ids
+
+    def _request(self, params=(), **matchdict):
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict(params)
+        request.matchdict.update(matchdict)
+        return request
+
+    def _count_selects(self, view, request):
+        from sqlalchemy import event
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.startswith('SELECT'):
+                statements.append(statement)
+
+        engine = self.dbsession.get_bind()
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            data = view(request)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        return data, len(statements)
+
+    def test_brand_products_paginated_with_brand(self):
+        from .views.api import get_brand_products
+        brand_id = self._seed_brands(2)[0]
+        request = self._request([('sort', '-price'), ('limit', '2')], id=str(brand_id))
+        products, selects = self._count_selects(get_brand_products, request)
+        self.assertEqual([p['price'] for p in products], [12.0, 11.0])
+        self.assertEqual(products[0]['brand']['name'], 'Brand 0')
+        self.assertIn('X-Next-Cursor', request.response.headers)
+        # Cek brand + satu query produk dengan JOIN brand
+        self.assertEqual(selects, 2)
+
+        request = self._request([('in_stock', 'true'), ('fields', 'name')], id=str(brand_id))
+        self.assertEqual(
+            sorted(p['name'] for p in get_brand_products(request)),
+            ['Brand 0 Product 1', 'Brand 0 Product 2']
+        )
+
+    def test_brand_products_not_found(self):
+        from .views.api import get_brand_products
+        with self.assertRaises(HTTPNotFound):
+            get_brand_products(self._request(id=str(uuid.uuid4())))
+        with self.assertRaises(HTTPBadRequest):
+            get_brand_products(self._request(id='not-a-uuid'))
+
+    def test_brand_index_top_products(self):
+        from .views.api import get_brands
+        self._seed_brands(2)
+        brands = get_brands(self._request([('top_products', '2'), ('products_sort', '-price')]))
+        by_name = {b['name']: b for b in brands}
+        self.assertEqual(by_name['Brand 1']['product_count'], 3)
+        self.assertEqual([p['price'] for p in by_name['Brand 1']['products']], [12.0, 11.0])
+        self.assertEqual(by_name['Test Brand']['product_count'], 1)
+
+    def test_brand_index_query_count_is_fixed(self):
+        from .cache import get_catalog_cache
+        from .views.api import get_brands
+        self._seed_brands(2)
+        _, few = self._count_selects(get_brands, self._request([('top_products', '3')]))
+        self._seed_brands(6, offset=2)
+        get_catalog_cache(self._request()).invalidate('products')
+        brands, many = self._count_selects(get_brands, self._request([('top_products', '3')]))
+        self.assertEqual(len(brands), 9)
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, 4)
+
+    def test_brand_index_sees_new_brand(self):
+        from .views.api import create_brand, get_brands
+        self.assertEqual(len(get_brands(self._request([('top_products', '1')]))), 1)
+        request = _get_app_request(self.dbsession)
+        request.json_body = {'name': 'Fresh Brand'}
+        create_brand(request)
+        transaction.commit()
+        brands = get_brands(self._request([('top_products', '1')]))
+        self.assertEqual(sorted(b['name'] for b in brands), ['Fresh Brand', 'Test Brand'])
+
+    def test_invalid_top_products(self):
+        from .views.api import get_brands
+        with self.assertRaises(HTTPBadRequest):
+            get_brands(self._request([('top_products', '100')]))
+
+
+# --- Product Variant Tests ---
+class ProductVariantTests(BaseTest):
+    def _variants(self, product_id):
+        from .models import ProductVariant
+        return {
+            (v.size, v.color): v.stock
+            for v in self.dbsession.query(ProductVariant).filter(ProductVariant.product_id == product_id)
+        }
+
+    def _stock(self, product_id):
+        return self.dbsession.query(Product.stock).filter(Product.id == product_id).scalar()
+
+    def _update(self, product_id, data):
+        from .views.api import update_product
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(product_id)
+        request.json_body = data
+        response = update_product(request)
+        transaction.commit()
+        return response
+
+    def test_create_product_with_variants_keeps_bad_request(self):
+        from .views.api import create_product
+        variants = [{'size': 'M', 'color': 'Red', 'stock': 2}, {'size': 'L', 'color': 'Red', 'stock': 1}]
+        request = _get_app_request(self.dbsession)
+        request.json_body = {'name': 'Variant Tee', 'brand_id': str(uuid.uuid4()), 'price': 50, 'variants': variants}
+        with self.assertRaises(HTTPBadRequest) as ctx:
+            create_product(request)
+        self.assertEqual(ctx.exception.json['error'], 'Brand not found for the given brand_id.')
+        transaction.abort()
+
+        request = _get_app_request(self.dbsession)
+        request.json_body = {'name': 'Variant Tee', 'brand_id': str(self.test_brand_id), 'price': 50, 'variants': variants}
+        response = create_product(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['stock'], 3)
+
+    def _set_runner_variants(self):
+        self._update(self.test_product_id, {'variants': [
+            {'size': 'US 9', 'color': 'White', 'stock': 2},
+            {'size': 'US 10', 'color': 'Black', 'stock': 0},
+            {'size': 'US 10', 'color': 'White', 'stock': 1},
+        ]})
+
+    def _buy(self, size, color):
+        from .views.api import create_transaction
+        request = _get_app_request(self.dbsession)
+        request.json_body = {
+            'product_id': str(self.test_product_id), 'customer_name': 'Variant Buyer',
+            'shipping_address': 'Jl. Varian', 'payment_method': 'Transfer',
+            'purchased_size': size, 'purchased_color': color,
+        }
+        return create_transaction(request)
+
+    def test_variants_follow_sizes_and_colors(self):
+        self.assertEqual(
+            self._variants(self.test_product_id),
+            {('M', 'Red'): None, ('M', 'Blue'): None, ('L', 'Red'): None, ('L', 'Blue'): None}
+        )
+        self._update(self.test_product_id, {'sizes': ['M', 'XL']})
+        self.assertEqual(
+            set(self._variants(self.test_product_id)),
+            {('M', 'Red'), ('M', 'Blue'), ('XL', 'Red'), ('XL', 'Blue')}
+        )
+
+    def test_set_variants_updates_totals(self):
+        response = self._update(self.test_product_id, {'variants': [
+            {'size': 'M', 'color': 'Red', 'stock': 2},
+            {'size': 'L', 'color': 'Red', 'stock': 3},
+        ]})
+        self.assertEqual(response['sizes'], ['M', 'L'])
+        self.assertEqual(response['colors'], ['Red'])
+        self.assertEqual(len(response['variants']), 2)
+        self.assertEqual(self._stock(self.test_product_id), 5)
+        self.assertEqual(self._variants(self.test_product_id), {('M', 'Red'): 2, ('L', 'Red'): 3})
+
+        with self.assertRaises(HTTPBadRequest):
+            self._update(self.test_product_id, {'variants': [
+                {'size': 'M', 'color': 'Red'}, {'size': 'M', 'color': 'Red'},
+            ]})
+
+    def test_transaction_reserves_variant_stock(self):
+        self._set_runner_variants()
+        self.assertEqual(self._buy('US 9', 'White').status_code, 201)
+        transaction.commit()
+        self.assertEqual(self._variants(self.test_product_id)[('US 9', 'White')], 1)
+        self.assertEqual(self._stock(self.test_product_id), 2)
+
+        with self.assertRaises(HTTPBadRequest) as ctx:
+            self._buy('US 10', 'Black')
+        self.assertEqual(ctx.exception.json['error'], 'Variant out of stock.')
+        transaction.abort()
+        with self.assertRaises(HTTPBadRequest) as ctx:
+            self._buy('US 9', 'Black')
+        self.assertEqual(ctx.exception.json['error'], 'Variant not available.')
+        transaction.abort()
+        # Stok produk yang sempat dikurangi ikut dibatalkan
+        self.assertEqual(self._stock(self.test_product_id), 2)
+
+    def test_checkout_reserves_variant_stock(self):
+        from .views.api import checkout_cart
+        self._set_runner_variants()
+
+        def checkout(items):
+            request = _get_app_request(self.dbsession)
+            request.json_body = {
+                'customer_name': 'Cart Customer', 'shipping_address': 'Jl. Keranjang',
+                'payment_method': 'Transfer', 'items': items,
+            }
+            return checkout_cart(request)
+
+        with self.assertRaises(HTTPBadRequest) as ctx:
+            checkout([
+                {'product_id': str(self.test_product_id), 'size': 'US 9', 'color': 'White'},
+                {'product_id': str(self.test_product_id), 'size': 'US 10', 'color': 'Black'},
+            ])
+        self.assertEqual(ctx.exception.json['error'], 'Variant out of stock.')
+        transaction.abort()
+
+        checkout([
+            {'product_id': str(self.test_product_id), 'size': 'US 9', 'color': 'White', 'qty': 2},
+            {'product_id': str(self.test_product_id), 'size': 'US 10', 'color': 'White'},
+        ])
+        transaction.commit()
+        self.assertEqual(self._stock(self.test_product_id), 0)
+        self.assertEqual(
+            self._variants(self.test_product_id),
+            {('US 9', 'White'): 0, ('US 10', 'Black'): 0, ('US 10', 'White'): 0}
+        )
+
+    def test_size_and_color_filter_matches_same_variant(self):
+        from .views.api import get_products
+        self._set_runner_variants()
+
+        def names(params):
+            request = _get_app_request(self.dbsession)
+            request.params = MultiDict(params)
+            return [p['name'] for p in get_products(request)]
+
+        self.assertEqual(names([('size', 'US 9'), ('color', 'White')]), ['Test Product'])
+        self.assertEqual(names([('size', 'US 9'), ('color', 'Black')]), [])
+        self.assertEqual(names([('size', 'US 10'), ('color', 'Black')]), ['Test Product'])
+        self.assertEqual(names([('size', 'US 10'), ('color', 'Black'), ('in_stock', 'true')]), [])
+
+    def test_size_facet_within_selected_color(self):
+        from .facets import ProductFacets, get_price_buckets
+        self._set_runner_variants()
+        self.dbsession.add(Product(
+            name="Cap", brand_id=self.test_brand_id, price=20, stock=3,
+            sizes=["One Size"], colors=["Black"]
+        ))
+        transaction.commit()
+        facets = ProductFacets(self.dbsession, {'color': 'White'}, get_price_buckets(None)).compute()
+        self.assertEqual(facets['total'], 1)
+        self.assertEqual(
+            sorted((f['value'], f['count']) for f in facets['size']),
+            [('US 10', 1), ('US 9', 1)]
+        )
+        self.assertEqual(
+            sorted((f['value'], f['count']) for f in facets['color']),
+            [('Black', 2), ('White', 1)]
+        )
+
+
+# --- Also Bought Recommendation Tests ---
+class AlsoBoughtTests(BaseTest):
+    def setUp(self):
+        from .cards import rebuild_cards
+        super().setUp()
+        self.products = {}
+        for name in ('Shoe', 'Sock', 'Cap'):
+            product = Product(
+                name=name, brand_id=self.test_brand_id, price=10, stock=50,
+                sizes=["M"], colors=["Black"]
+            )
+            self.dbsession.add(product)
+            self.dbsession.flush()
+            self.products[name] = product.id
+        self.users = []
+        for i in range(3):
+            user = User(id=uuid.uuid4(), email=f"buyer{i}@example.com")
+            user.set_password("secret")
+            self.dbsession.add(user)
+            self.users.append(user.id)
+        rebuild_cards(self.dbsession)
+        transaction.commit()
+
+    def _purchase(self, user_id, product, status='Berhasil'):
+        transaction_id = uuid.uuid4()
+        self.dbsession.add(Transaction(
+            id=transaction_id, user_id=user_id, product_id=self.products[product],
+            customer_name='Buyer', shipping_address='Jl. Rekomendasi', payment_method='Transfer',
+            purchased_size='M', purchased_color='Black', transaction_status=status,
+        ))
+        transaction.commit()
+        return transaction_id
+
+    def _also_bought(self, product, params=()):
+        from .views.api import get_also_bought
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.products[product])
+        request.params = MultiDict(params)
+        return [(p['name'], p['co_purchases']) for p in get_also_bought(request)]
+
+    def test_co_purchase_ranking(self):
+        for product in ('Shoe', 'Sock', 'Cap'):
+            self._purchase(self.users[0], product)
+        self._purchase(self.users[1], 'Shoe')
+        self._purchase(self.users[1], 'Sock')
+        # Belum dibayar dan transaksi guest tidak dihitung
+        self._purchase(self.users[2], 'Shoe', 'Menunggu Pembayaran')
+        self._purchase(self.users[2], 'Cap')
+        self._purchase(None, 'Shoe')
+        self._purchase(None, 'Cap')
+
+        self.assertEqual(self._also_bought('Shoe'), [('Sock', 2), ('Cap', 1)])
+        self.assertEqual(self._also_bought('Shoe', [('limit', '1')]), [('Sock', 2)])
+        self.assertEqual(sorted(self._also_bought('Cap')), [('Shoe', 1), ('Sock', 1)])
+
+    def test_status_change_updates_incrementally(self):
+        from .views.api import delete_transaction, update_transaction_status
+        self._purchase(self.users[0], 'Shoe')
+        pending = self._purchase(self.users[0], 'Sock', 'Menunggu Pembayaran')
+        self.assertEqual(self._also_bought('Shoe'), [])
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(pending)
+        request.json_body = {'transaction_status': 'Berhasil'}
+        update_transaction_status(request)
+        transaction.commit()
+        self.assertEqual(self._also_bought('Shoe'), [('Sock', 1)])
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(pending)
+        delete_transaction(request)
+        transaction.commit()
+        self.assertEqual(self._also_bought('Shoe'), [])
+
+    def test_unknown_product(self):
+        from .views.api import get_also_bought
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(uuid.uuid4())
+        with self.assertRaises(HTTPNotFound):
+            get_also_bought(request)
+        request.matchdict['id'] = 'not-a-uuid'
+        with self.assertRaises(HTTPBadRequest):
+            get_also_bought(request)
+
+
+class CoPurchaseIndexTests(unittest.TestCase):
+    def test_top_k_is_bounded(self):
+        from .recommendations import CoPurchaseIndex
+        index = CoPurchaseIndex(top_k=2)
+        index._built_at = index._refreshed_at = float('inf')
+        dirty = set()
+        rows = [(i, 'u1', p, 'Berhasil', None) for i, p in enumerate('abcd')]
+        rows.append((9, 'u2', 'a', 'Berhasil', None))
+        rows.append((10, 'u2', 'b', 'Berhasil', None))
+        index._apply(rows, dirty)
+        index._update_top(dirty)
+        self.assertEqual(index._top['a'], (('b', 2), ('c', 1)))
+        self.assertEqual(index.stats()['pairs'], 12)
+
+
+class CoPurchaseRebuildTests(unittest.TestCase):
+    def setUp(self):
+        import os
+        import tempfile
+        # Database file supaya thread rebuild melihat data yang sama
+        self.tmpdir = tempfile.mkdtemp()
+        self.config = testing.setUp(settings={
+            'sqlalchemy.url': 'sqlite:///' + os.path.join(self.tmpdir, 'copurchase.db'),
+        })
+        self.engine = get_engine(self.config.get_settings())
+        Base.metadata.create_all(self.engine)
+        self.session_factory = get_session_factory(self.engine)
+        self.products = [uuid.uuid4() for _ in range(3)]
+        self.users = [uuid.uuid4() for _ in range(2)]
+        with transaction.manager:
+            dbsession = get_tm_session(self.session_factory, transaction.manager)
+            brand = Brand(id=uuid.uuid4(), name="Co-purchase Brand")
+            dbsession.add(brand)
+            for i, product_id in enumerate(self.products):
+                dbsession.add(Product(id=product_id, name=f"Item {i}", brand=brand, price=10,
+                                      stock=5, sizes=["M"], colors=["Black"]))
+        self.purchases = {}
+        for user_id in self.users:
+            for product_id in self.products[:2]:
+                self.purchases[user_id, product_id] = self._buy(user_id, product_id)
+
+    def tearDown(self):
+        import shutil
+        testing.tearDown()
+        self.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def _buy(self, user_id, product_id):
+        transaction_id = uuid.uuid4()
+        with transaction.manager:
+            dbsession = get_tm_session(self.session_factory, transaction.manager)
+            dbsession.add(Transaction(
+                id=transaction_id, user_id=user_id, product_id=product_id, customer_name="Buyer",
+                shipping_address="A", payment_method="Transfer", transaction_status="Berhasil",
+                purchased_size="M", purchased_color="Black",
+            ))
+        return transaction_id
+
+    def test_periodic_rebuild_runs_in_background_and_serves_stale_matrix(self):
+        from sqlalchemy.orm import Session
+        from .recommendations import CoPurchaseIndex
+        a, b, c = self.products
+        index = CoPurchaseIndex()
+
+        def also_bought(product_id):
+            # Satu Session per lookup, seperti request
+            dbsession = Session(bind=self.engine)
+            try:
+                return index.also_bought(dbsession, product_id)
+            finally:
+                dbsession.close()
+
+        self.assertEqual(also_bought(a), [(b, 2)])
+
+        # Perubahan yang tidak terlihat refresh inkremental: hapus tanpa discard
+        with transaction.manager:
+            dbsession = get_tm_session(self.session_factory, transaction.manager)
+            dbsession.query(Transaction).filter(
+                Transaction.id == self.purchases[self.users[1], b]
+            ).delete(synchronize_session=False)
+        self._buy(self.users[0], c)
+        index._built_at -= index.rebuild_interval
+
+        with index._build_lock:
+            # Build berjalan (tertahan di lock): lookup tidak menunggu dan
+            # masih memakai matriks lama (pembelian c masuk lewat refresh)
+            self.assertEqual(also_bought(a), [(b, 2), (c, 1)])
+            self.assertTrue(index._rebuild_thread.is_alive())
+        index._rebuild_thread.join(10)
+        # b dan c seri; urutan seri mengikuti str(product_id) yang acak
+        self.assertCountEqual(also_bought(a), [(b, 1), (c, 1)])
+        self.assertEqual(index.stats()['purchases'], 4)
+
+
+# --- Ranking Tests ---
+class RankingEngineTests(unittest.TestCase):
+    def test_decayed_scores(self):
+        from .rankings import TRENDING, RankingEngine
+        engine = RankingEngine(half_life=100)
+        start = engine._epoch
+        engine.record('old', 4.0, at=start)
+        engine.record('new', 3.0, at=start + 100)
+        engine.record('new', 0, sales=2)
+        ranked = engine.top(TRENDING)
+        self.assertEqual([pid for pid, _ in ranked], ['new', 'old'])
+        # 3 * 2 vs 4: event 'new' satu half-life lebih baru
+        self.assertAlmostEqual(ranked[0][1] / ranked[1][1], 1.5)
+        self.assertEqual(engine.top('best_sellers'), [('new', 2)])
+
+    def test_epoch_rebase_keeps_order(self):
+        from .rankings import MAX_EPOCH_HALF_LIVES, TRENDING, RankingEngine
+        engine = RankingEngine(half_life=1)
+        start = engine._epoch
+        engine.record('a', 1.0, at=start)
+        engine.record('b', 1.0, at=start + 1)
+        engine.record('c', 1.0, at=start + MAX_EPOCH_HALF_LIVES + 1)
+        self.assertGreater(engine._epoch, start)
+        self.assertEqual([pid for pid, _ in engine.top(TRENDING)], ['c', 'b', 'a'])
+
+    def test_category_tops(self):
+        from .rankings import BEST_SELLERS, RankingEngine
+        engine = RankingEngine()
+        engine.set_category('shoe', 'Footwear')
+        engine.set_category('tee', 'Apparel')
+        engine.record('shoe', sales=1)
+        engine.record('tee', sales=3)
+        self.assertEqual(engine.top(BEST_SELLERS, 'Footwear'), [('shoe', 1)])
+        engine.record('shoe', sales=5)
+        self.assertEqual([pid for pid, _ in engine.top(BEST_SELLERS)], ['shoe', 'tee'])
+        engine.forget('shoe')
+        self.assertEqual(engine.top(BEST_SELLERS, 'Footwear'), [])
+
+    def test_purchase_updates_cached_top_without_recompute(self):
+        from .rankings import BEST_SELLERS, TRENDING, RankingEngine
+        engine = RankingEngine(max_results=3)
+        for i, pid in enumerate('abcde'):
+            engine.set_category(pid, 'Apparel')
+            engine.record(pid, 1.0 + i, sales=1 + i)
+        self.assertEqual([pid for pid, _ in engine.top(BEST_SELLERS)], ['e', 'd', 'c'])
+        self.assertEqual([pid for pid, _ in engine.top(TRENDING, 'Apparel')], ['e', 'd', 'c'])
+        cached = engine._tops[(BEST_SELLERS, None)]
+        engine.record('a', 10.0, sales=10)
+        engine.record('c', 0, sales=3)
+        self.assertIs(engine._tops[(BEST_SELLERS, None)], cached)
+        self.assertEqual(engine.top(BEST_SELLERS), [('a', 11), ('c', 6), ('e', 5)])
+        self.assertEqual([pid for pid, _ in engine.top(TRENDING, 'Apparel')], ['a', 'e', 'd'])
+        # Pembatalan di list yang penuh: pengganti dihitung ulang dari semua produk
+        engine.record('a', 0, sales=-11)
+        self.assertNotIn((BEST_SELLERS, None), engine._tops)
+        self.assertEqual(engine.top(BEST_SELLERS), [('c', 6), ('e', 5), ('d', 4)])
+
+    def test_incremental_tops_match_recompute(self):
+        import random
+        from .rankings import BEST_SELLERS, TRENDING, RankingEngine
+        rng = random.Random(7)
+        engine = RankingEngine(max_results=4)
+        products = [f'p{i}' for i in range(12)]
+        categories = ['Footwear', 'Apparel', None]
+        keys = [(kind, category) for kind in (TRENDING, BEST_SELLERS) for category in categories]
+        for step in range(400):
+            pid = rng.choice(products)
+            action = rng.random()
+            if action < 0.6:
+                engine.record(pid, rng.choice([0, 1.0, 3.0]), sales=rng.choice([-2, 0, 1, 2]))
+            elif action < 0.9:
+                engine.set_category(pid, rng.choice(categories))
+            else:
+                engine.forget(pid)
+            if step % 5 == 0:
+                kind, category = rng.choice(keys)
+                engine.top(kind, category)
+            if step % 20 == 0:
+                cached = {key: engine.top(*key) for key in keys}
+                engine._tops.clear()
+                for key in keys:
+                    self.assertEqual([pid for pid, _ in cached[key]], [pid for pid, _ in engine.top(*key)])
+
+
+class RankingViewTests(BaseTest):
+    def setUp(self):
+        from .cards import rebuild_cards
+        super().setUp()
+        self.runner_id = uuid.uuid4()
+        self.dbsession.add(Product(
+            id=self.runner_id, name="Runner", brand_id=self.test_brand_id, price=150,
+            stock=20, category="Footwear", sizes=["US 9"], colors=["Black"]
+        ))
+        rebuild_cards(self.dbsession)
+        transaction.commit()
+
+    def _buy(self, product_id, size, color):
+        from .views.api import create_transaction
+        request = _get_app_request(self.dbsession)
+        request.json_body = {
+            'product_id': str(product_id), 'customer_name': 'Rank Buyer',
+            'shipping_address': 'Jl. Ranking', 'payment_method': 'Transfer',
+            'purchased_size': size, 'purchased_color': color,
+        }
+        response = create_transaction(request)
+        transaction.commit()
+        return response.json['id']
+
+    def _ranked(self, view, params=()):
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict(params)
+        return view(request)
+
+    def test_rankings_follow_transactions(self):
+        from .views.api import get_best_sellers, get_trending_products, update_transaction_status
+        self._buy(self.runner_id, 'US 9', 'Black')
+        self._buy(self.runner_id, 'US 9', 'Black')
+        tee_transaction = self._buy(self.test_product_id, 'M', 'Red')
+
+        sellers = self._ranked(get_best_sellers)
+        self.assertEqual([(p['name'], p['sales']) for p in sellers], [('Runner', 2), ('Test Product', 1)])
+        trending = self._ranked(get_trending_products, [('category', 'Apparel')])
+        self.assertEqual([p['name'] for p in trending], ['Test Product'])
+        self.assertGreater(trending[0]['score'], 0)
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = tee_transaction
+        request.json_body = {'transaction_status': 'Dibatalkan'}
+        update_transaction_status(request)
+        transaction.commit()
+        sellers = self._ranked(get_best_sellers)
+        self.assertEqual([(p['name'], p['sales']) for p in sellers], [('Runner', 2)])
+
+    def test_removed_favorite_leaves_trending(self):
+        from .views.api import add_favorite, get_trending_products, remove_favorite
+        self.config.testing_securitypolicy(userid=str(self.test_user_id))
+        request = _get_app_request(self.dbsession)
+        request.json_body = {'product_id': str(self.runner_id)}
+        add_favorite(request)
+        transaction.commit()
+        self.assertEqual([p['name'] for p in self._ranked(get_trending_products)], ['Runner'])
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['product_id'] = str(self.runner_id)
+        remove_favorite(request)
+        transaction.commit()
+        self.assertEqual(self._ranked(get_trending_products), [])
+
+    def test_checkpoint_is_additive(self):
+        from .models import ProductRanking
+        from .rankings import BEST_SELLERS, RankingEngine, get_ranking_engine
+        self._buy(self.runner_id, 'US 9', 'Black')
+        engine = get_ranking_engine(_get_app_request(self.dbsession))
+        engine.sync(self.dbsession)
+        engine.checkpoint(self.dbsession)
+        transaction.commit()
+        # Proses lain dengan event sendiri: checkpoint-nya ditambahkan
+        other = RankingEngine()
+        other.sync(self.dbsession)
+        other.record(self.runner_id, 3.0, 2)
+        other.checkpoint(self.dbsession)
+        transaction.commit()
+        row = self.dbsession.query(ProductRanking).get(self.runner_id)
+        self.assertEqual(row.sales_count, 3)
+        engine.checkpoint(self.dbsession)
+        transaction.commit()
+        self.assertEqual(engine.top(BEST_SELLERS, 'Footwear'), [(self.runner_id, 3)])
+
+    def test_rebuild_rankings(self):
+        from .models import ProductRanking
+        from .rankings import rebuild_rankings
+        self.dbsession.add(Transaction(
+            user_id=self.test_user_id, product_id=self.runner_id, customer_name='Old Buyer',
+            shipping_address='Jl. Lama', payment_method='Transfer', purchased_size='US 9',
+            purchased_color='Black', quantity=4, transaction_status='Berhasil',
+        ))
+        self.dbsession.add(Favorite(user_id=self.test_user_id, product_id=self.test_product_id))
+        rebuild_rankings(self.dbsession)
+        transaction.commit()
+        rows = {r.product_id: r for r in self.dbsession.query(ProductRanking)}
+        self.assertEqual(rows[self.runner_id].sales_count, 4)
+        self.assertEqual(rows[self.test_product_id].sales_count, 0)
+        self.assertGreater(rows[self.runner_id].trending_score, rows[self.test_product_id].trending_score)
+
+
+# --- Similar Products Tests ---
+class SimilarityIndexTests(unittest.TestCase):
+    def _index(self, top_k=3):
+        from decimal import Decimal
+        from .similarity import SimilarityIndex
+        index = SimilarityIndex([Decimal(100), Decimal(500)], top_k=top_k)
+        index._built_at = float('inf')
+        return index
+
+    def test_cosine_scores(self):
+        from .similarity import product_features
+        index = self._index()
+        index.update('runner', ('runner', 'Footwear', 'Mesh, Rubber', 'nike', ['Black'], ['42'], 150))
+        index.update('trail', ('trail', 'Footwear', 'Rubber', 'nike', ['Brown'], ['42'], 180))
+        index.update('tee', ('tee', 'Apparel', 'Cotton', 'adidas', ['Black'], ['M'], 30))
+        ranked = index.similar(None, 'runner')
+        self.assertEqual([pid for pid, _ in ranked], ['trail', 'tee'])
+        features = product_features('Footwear', 'Mesh, Rubber', 'nike', ['Black'], ['42'], 150, index.price_buckets)
+        self.assertIn(('material', 'mesh'), features)
+        self.assertIn(('price', '1'), features)
+        # Tidak berbagi fitur apa pun: tidak muncul sama sekali
+        index.update('cap', ('cap', 'Headwear', None, 'puma', ['Red'], ['One'], 1000))
+        self.assertEqual(index.similar(None, 'cap'), [])
+        self.assertIsNone(index.similar(None, 'missing'))
+
+    def test_update_refreshes_cached_tops(self):
+        index = self._index(top_k=1)
+        index.update('a', ('a', 'Footwear', None, 'nike', [], [], 150))
+        index.update('b', ('b', 'Footwear', None, 'adidas', [], [], 150))
+        self.assertEqual([pid for pid, _ in index.similar(None, 'a')], ['b'])
+        # Produk baru yang lebih mirip masuk ke top-K yang sudah di-cache
+        index.update('c', ('c', 'Footwear', None, 'nike', [], [], 150))
+        [(pid, score)] = index.similar(None, 'a')
+        self.assertEqual(pid, 'c')
+        self.assertAlmostEqual(score, 1.0)
+        # Produk di top-K berubah jauh: top-K dihitung ulang
+        index.update('c', ('c', 'Apparel', None, 'puma', [], [], 30))
+        self.assertEqual([pid for pid, _ in index.similar(None, 'a')], ['b'])
+        index.update('b')
+        self.assertEqual(index.similar(None, 'a'), [])
+
+
+class SimilarityRebuildTests(unittest.TestCase):
+    def setUp(self):
+        import os
+        import tempfile
+        # Database file supaya thread rebuild melihat data yang sama
+        self.tmpdir = tempfile.mkdtemp()
+        self.config = testing.setUp(settings={
+            'sqlalchemy.url': 'sqlite:///' + os.path.join(self.tmpdir, 'similarity.db'),
+        })
+        self.engine = get_engine(self.config.get_settings())
+        Base.metadata.create_all(self.engine)
+        self.session_factory = get_session_factory(self.engine)
+        self.brand_id = uuid.uuid4()
+        with transaction.manager:
+            dbsession = get_tm_session(self.session_factory, transaction.manager)
+            dbsession.add(Brand(id=self.brand_id, name="Similarity Brand"))
+        self.runner = self._add("Runner", "Footwear")
+        self.tee = self._add("Tee", "Apparel")
+
+    def tearDown(self):
+        import shutil
+        testing.tearDown()
+        self.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def _add(self, name, category):
+        product_id = uuid.uuid4()
+        with transaction.manager:
+            dbsession = get_tm_session(self.session_factory, transaction.manager)
+            dbsession.add(Product(id=product_id, name=name, brand_id=self.brand_id, price=100, stock=1,
+                                  category=category, material="Mesh", sizes=["42"], colors=["Black"]))
+        return product_id
+
+    def test_periodic_rebuild_runs_in_background_and_serves_stale_index(self):
+        from sqlalchemy.orm import Session
+        from .similarity import SimilarityIndex
+        index = SimilarityIndex([], top_k=5)
+
+        def similar(product_id):
+            # Satu Session per lookup, seperti request
+            dbsession = Session(bind=self.engine)
+            try:
+                return [pid for pid, _ in index.similar(dbsession, product_id)]
+            finally:
+                dbsession.close()
+
+        self.assertEqual(similar(self.runner), [self.tee])
+        # Produk yang tidak lewat update(): hanya terlihat setelah build penuh
+        trail = self._add("Trail", "Footwear")
+        index._built_at -= index.rebuild_interval
+
+        with index._build_lock:
+            # Build tertahan di lock: lookup tidak menunggu dan memakai indeks lama
+            self.assertEqual(similar(self.runner), [self.tee])
+            self.assertTrue(index._rebuild_thread.is_alive())
+        index._rebuild_thread.join(10)
+        self.assertEqual(similar(self.runner), [trail, self.tee])
+        self.assertGreater(index._built_at, 0)
+
+    def test_updates_during_build_are_replayed(self):
+        from .similarity import SimilarityIndex
+        index = SimilarityIndex([], top_k=5)
+        rows = [
+            ('a', 'Footwear', None, 'nike', [], [], 150),
+            ('b', 'Footwear', None, 'nike', [], [], 150),
+        ]
+
+        class BuildSession(object):
+            def query(self, *columns):
+                # Produk b dihapus setelah build membaca datanya
+                index.update('b')
+                return rows
+
+        index.rebuild(BuildSession())
+        self.assertEqual(index.similar(None, 'a'), [])
+        self.assertIsNone(index.similar(None, 'b'))
+
+
+class SimilarProductViewTests(BaseTest):
+    def setUp(self):
+        from .cards import rebuild_cards
+        super().setUp()
+        self.similar_id = uuid.uuid4()
+        self.other_id = uuid.uuid4()
+        self.dbsession.add(Product(
+            id=self.similar_id, name="Similar Tee", brand_id=self.test_brand_id, price=80,
+            stock=5, material="Cotton", category="Apparel", sizes=["M"], colors=["Red"]
+        ))
+        self.dbsession.add(Product(
+            id=self.other_id, name="Other Boot", brand_id=self.test_brand_id, price=900,
+            stock=5, material="Leather", category="Footwear", sizes=["43"], colors=["Brown"]
+        ))
+        rebuild_cards(self.dbsession)
+        transaction.commit()
+
+    def _similar(self, product_id):
+        from .views.api import get_similar_products
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(product_id)
+        return [(p['name'], p['similarity']) for p in get_similar_products(request)]
+
+    def test_similar_products_follow_updates(self):
+        from .views.api import update_product
+        ranked = self._similar(self.test_product_id)
+        self.assertEqual([name for name, _ in ranked], ['Similar Tee', 'Other Boot'])
+        self.assertGreater(ranked[0][1], ranked[1][1])
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(self.other_id)
+        request.json_body = {'category': 'Apparel', 'material': 'Cotton', 'price': 99, 'sizes': ['M', 'L'], 'colors': ['Red', 'Blue']}
+        update_product(request)
+        transaction.commit()
+        self.assertEqual(self._similar(self.test_product_id)[0], ('Other Boot', 1.0))
+
+    def test_unknown_product(self):
+        from .views.api import get_similar_products
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(uuid.uuid4())
+        with self.assertRaises(HTTPNotFound):
+            get_similar_products(request)
+
+
+# --- Transaction Listing Tests ---
+class TransactionListingTests(BaseTest):
+    def _seed_transactions(self, count, status='Berhasil', user_id=None, day=1):
+        from datetime import timezone
+        for i in range(count):
+            self.dbsession.add(Transaction(
+                user_id=user_id or self.test_user_id, product_id=self.test_product_id,
+                customer_name=f"Customer {i}", shipping_address="Jl. Test", payment_method="Transfer",
+                transaction_status=status, purchased_size="M", purchased_color="Black",
+                transaction_date=datetime(2026, 10, day, 10, i % 60, tzinfo=timezone.utc),
+            ))
+        transaction.commit()
+
+    def _list(self, params):
+        from sqlalchemy import event
+        from .views.api import get_transactions
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict(params)
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.startswith('SELECT'):
+                statements.append(statement)
+
+        engine = self.dbsession.get_bind()
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            data = get_transactions(request)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        return data, len(statements)
+
+    def test_query_count_independent_of_page_size(self):
+        params = [('fields', 'id,customer_name,product,user'), ('limit', '50')]
+        self._seed_transactions(3)
+        few, few_selects = self._list(params)
+        self._seed_transactions(30, user_id=self.test_admin_id, day=2)
+        many, many_selects = self._list(params)
+        self.assertEqual((len(few), len(many)), (3, 33))
+        self.assertEqual(many[-1]['product']['name'], 'Test Product')
+        self.assertEqual(many[-1]['user']['email'], 'admin@example.com')
+        self.assertEqual(few_selects, many_selects)
+        self.assertEqual(many_selects, 1)
+
+    def test_filters(self):
+        self._seed_transactions(2, day=1)
+        self._seed_transactions(3, status='Dibatalkan', user_id=self.test_admin_id, day=5)
+        count = lambda params: len(self._list(params + [('fields', 'id')])[0])
+        self.assertEqual(count([('status', 'Dibatalkan')]), 3)
+        self.assertEqual(count([('user_id', str(self.test_user_id))]), 2)
+        self.assertEqual(count([('product_id', str(self.test_product_id))]), 5)
+        self.assertEqual(count([('product_id', str(uuid.uuid4()))]), 0)
+        self.assertEqual(count([('date_from', '2026-10-02')]), 3)
+        # date_to tanggal saja mencakup seluruh hari itu
+        self.assertEqual(count([('date_to', '2026-10-01')]), 2)
+        self.assertEqual(count([('date_from', '2026-10-05T10:01:00+00:00'), ('date_to', '2026-10-05T10:02:00Z')]), 1)
+        self.assertEqual(count([('status', 'Berhasil'), ('user_id', str(self.test_admin_id))]), 0)
+
+    def test_invalid_filters(self):
+        for params in (
+            [('status', 'Unknown')],
+            [('user_id', 'not-a-uuid')],
+            [('date_from', '18-10-2026')],
+            [('date_from', '2026-10-05'), ('date_to', '2026-10-01')],
+        ):
+            with self.assertRaises(HTTPBadRequest):
+                self._list(params)
+
+
+# --- Sales Rollup Tests ---
+class SalesRollupTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.second_product_id = uuid.uuid4()
+        self.dbsession.add(Product(
+            id=self.second_product_id, name="Second Product", brand_id=self.test_brand_id,
+            price=20, stock=10, sizes=["S"], colors=["Black"]
+        ))
+        transaction.commit()
+
+    def _report(self, params):
+        from .views.api import get_sales_analytics
+        request = _get_app_request(self.dbsession)
+        request.params = MultiDict(params)
+        return get_sales_analytics(request)
+
+    def _rollups(self):
+        from .models import SalesDaily
+        return sorted(
+            (str(r.brand_id), r.category, r.payment_method, r.transaction_status, r.orders, r.units, float(r.revenue))
+            for r in self.dbsession.query(SalesDaily)
+            if r.orders or r.units or r.revenue
+        )
+
+    def _create(self):
+        from .views.api import create_transaction
+        request = _get_app_request(self.dbsession)
+        request.json_body = {
+            'product_id': str(self.test_product_id), 'customer_name': 'Rollup Customer',
+            'shipping_address': 'Jl. Rollup', 'payment_method': 'Credit Card',
+            'purchased_size': 'M', 'purchased_color': 'Red',
+        }
+        transaction_id = create_transaction(request).json['id']
+        transaction.commit()
+        return transaction_id
+
+    def _set_status(self, transaction_id, status):
+        from .views.api import update_transaction_status
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = transaction_id
+        request.json_body = {'transaction_status': status}
+        update_transaction_status(request)
+        transaction.commit()
+
+    def _assert_matches_rebuild(self):
+        from .sales import rebuild_sales
+        incremental = self._rollups()
+        rebuild_sales(self.dbsession)
+        transaction.commit()
+        self.assertEqual(incremental, self._rollups())
+
+    def test_rollups_follow_transaction_lifecycle(self):
+        from .views.api import checkout_cart, delete_transaction
+        transaction_id = self._create()
+        request = _get_app_request(self.dbsession)
+        request.json_body = {
+            'customer_name': 'Cart Customer', 'shipping_address': 'Jl. Keranjang', 'payment_method': 'Transfer',
+            'items': [
+                {'product_id': str(self.test_product_id), 'size': 'L', 'color': 'Blue', 'qty': 2},
+                {'product_id': str(self.second_product_id), 'size': 'S', 'color': 'Black', 'qty': 3},
+            ],
+        }
+        checkout_cart(request)
+        transaction.commit()
+
+        pending = self._report([('status', 'Menunggu Pembayaran'), ('group_by', 'payment_method')])
+        self.assertEqual(pending['totals'], {'orders': 3, 'units': 6, 'revenue': 359.97})
+        self.assertEqual(
+            [(r['payment_method'], r['units']) for r in pending['rows']],
+            [('Credit Card', 1), ('Transfer', 5)]
+        )
+        self.assertEqual(self._report([])['totals']['orders'], 0)
+
+        self._set_status(transaction_id, 'Berhasil')
+        paid = self._report([('group_by', 'category,status')])
+        self.assertEqual(paid['rows'], [
+            {'category': 'Apparel', 'status': 'Berhasil', 'orders': 1, 'units': 1, 'revenue': 99.99},
+        ])
+        self._assert_matches_rebuild()
+
+        # Harga produk berubah setelah order: revenue tetap memakai harga saat order
+        self.test_product = self.dbsession.query(Product).get(self.test_product_id)
+        self.test_product.price = 500
+        transaction.commit()
+        self._set_status(transaction_id, 'Dibatalkan')
+        self.assertEqual(self._report([])['totals']['revenue'], 0)
+        self.assertEqual(self._report([('status', 'Dibatalkan')])['totals']['revenue'], 99.99)
+        self._assert_matches_rebuild()
+
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = transaction_id
+        delete_transaction(request)
+        transaction.commit()
+        self.assertEqual(self._report([('status', 'all')])['totals']['orders'], 2)
+        self._assert_matches_rebuild()
+
+    def test_report_groups_by_day_and_brand(self):
+        from datetime import date
+        self._set_status(self._create(), 'Berhasil')
+        today = date.today().isoformat()
+        report = self._report([('group_by', 'day,brand'), ('date_from', today), ('date_to', today)])
+        self.assertEqual(report['rows'], [{
+            'day': today, 'brand_id': str(self.test_brand_id), 'brand_name': 'Test Brand',
+            'orders': 1, 'units': 1, 'revenue': 99.99,
+        }])
+        self.assertEqual(self._report([('date_to', '2000-01-01')])['rows'], [])
+        self.assertEqual(self._report([('brand_id', str(uuid.uuid4()))])['rows'], [])
+
+    def test_invalid_params(self):
+        for params in (
+            [('group_by', 'day,color')],
+            [('status', 'Unknown')],
+            [('date_from', '18/10/2026')],
+            [('date_from', '2026-10-05'), ('date_to', '2026-10-01')],
+            [('brand_id', 'not-a-uuid')],
+        ):
+            with self.assertRaises(HTTPBadRequest):
+                self._report(params)
+
+
+# --- Transaction Archive Tests ---
+class ArchiveCutoffTests(unittest.TestCase):
+    def test_cutoff_is_start_of_month(self):
+        from datetime import timezone
+        from .archive import archive_cutoff
+        now = datetime(2026, 3, 18, 12, 0, tzinfo=timezone.utc)
+        self.assertEqual(archive_cutoff(1, now), datetime(2026, 2, 1, tzinfo=timezone.utc))
+        self.assertEqual(archive_cutoff(3, now), datetime(2025, 12, 1, tzinfo=timezone.utc))
+        self.assertEqual(archive_cutoff(15, now), datetime(2024, 12, 1, tzinfo=timezone.utc))
+
+
+class TransactionArchiveTests(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.ids = {}
+        for name, status, date in (
+            ('old_paid', 'Berhasil', datetime(2024, 1, 5, 9, 0)),
+            ('old_cancelled', 'Dibatalkan', datetime(2024, 2, 5, 9, 0)),
+            ('old_pending', 'Menunggu Pembayaran', datetime(2024, 1, 6, 9, 0)),
+            ('recent_paid', 'Berhasil', datetime.now()),
+        ):
+            self.ids[name] = uuid.uuid4()
+            self.dbsession.add(Transaction(
+                id=self.ids[name], user_id=self.test_user_id, product_id=self.test_product_id,
+                customer_name=name, shipping_address="Jl. Arsip", payment_method="Transfer",
+                transaction_status=status, purchased_size="M", purchased_color="Red",
+                quantity=2, unit_price=99.99, transaction_date=date,
+            ))
+        transaction.commit()
+
+    def _request(self, transaction_id, params=()):
+        request = _get_app_request(self.dbsession)
+        request.matchdict['id'] = str(transaction_id)
+        request.params = MultiDict(params)
+        return request
+
+    def _archive(self, batch_size=1000):
+        from .archive import archive_cutoff, archive_transactions
+        moved = archive_transactions(self.dbsession, archive_cutoff(12), batch_size)
+        transaction.commit()
+        return moved
+
+    def test_archives_closed_old_transactions_in_batches(self):
+        from .archive import drop_empty_partitions, ensure_partitions
+        from .models import TransactionArchive
+        self.assertEqual(self._archive(batch_size=1), 1)
+        self.assertEqual(self._archive(batch_size=1), 1)
+        self.assertEqual(self._archive(batch_size=1), 0)
+        remaining = sorted(name for (name,) in self.dbsession.query(Transaction.customer_name))
+        self.assertEqual(remaining, ['old_pending', 'recent_paid'])
+        self.assertEqual(
+            {row.id for row in self.dbsession.query(TransactionArchive)},
+            {self.ids['old_paid'], self.ids['old_cancelled']}
+        )
+        # Partisi hanya ada di PostgreSQL
+        self.assertEqual(ensure_partitions(self.dbsession), 0)
+        self.assertEqual(drop_empty_partitions(self.dbsession, datetime.now()), [])
+
+    def test_rebuilds_keep_archived_transactions(self):
+        from .models import ProductRanking
+        from .rankings import rebuild_rankings
+        from .recommendations import CoPurchaseIndex
+        from .sales import rebuild_sales, sales_report
+        other_id = uuid.uuid4()
+        self.dbsession.add(Product(
+            id=other_id, name="Other Product", brand_id=self.test_brand_id, price=10,
+            stock=5, sizes=["M"], colors=["Red"]
+        ))
+        self.dbsession.add(Transaction(
+            user_id=self.test_user_id, product_id=other_id, customer_name="other",
+            shipping_address="Jl. Arsip", payment_method="Transfer", transaction_status="Berhasil",
+            purchased_size="M", purchased_color="Red", unit_price=10, transaction_date=datetime.now(),
+        ))
+        transaction.commit()
+
+        def rebuilt():
+            rebuild_sales(self.dbsession)
+            rebuild_rankings(self.dbsession)
+            transaction.commit()
+            index = CoPurchaseIndex()
+            index.rebuild(self.dbsession)
+            return (
+                sales_report(self.dbsession, {'status': 'all', 'group_by': 'day,category,status'}),
+                dict(self.dbsession.query(ProductRanking.product_id, ProductRanking.sales_count)),
+                index.also_bought(self.dbsession, other_id),
+            )
+
+        before = rebuilt()
+        self.assertEqual(self._archive(), 2)
+        self.assertEqual(rebuilt(), before)
+        self.assertEqual(before[0]['totals'], {'orders': 5, 'units': 9, 'revenue': 809.92})
+        self.assertEqual(before[1][self.test_product_id], 6)
+        self.assertEqual(before[2], [(self.test_product_id, 1)])
+
+    def test_get_transaction_reads_archive(self):
+        from .views.api import get_transaction
+        before = get_transaction(self._request(self.ids['old_paid']))
+        self._archive()
+        self.assertIsNone(self.dbsession.query(Transaction).get(self.ids['old_paid']))
+
+        request = self._request(self.ids['old_paid'])
+        self.assertEqual(get_transaction(request), before)
+        self.assertEqual(request.response.headers['X-Transaction-Archived'], 'true')
+        self.assertEqual(before['product']['name'], 'Test Product')
+        self.assertEqual(before['user']['email'], self.test_user_email)
+
+        sparse = get_transaction(self._request(self.ids['old_paid'], [('fields', 'id,quantity,product')]))
+        self.assertEqual(set(sparse), {'id', 'quantity', 'product'})
+        self.assertEqual(sparse['quantity'], 2)
+        with self.assertRaises(HTTPNotFound):
+            get_transaction(self._request(uuid.uuid4()))
+
+    def test_archived_transactions_cannot_be_modified(self):
+        from .views.api import delete_transaction, update_transaction_status
+        self._archive()
+        request = self._request(self.ids['old_cancelled'])
+        request.json_body = {'transaction_status': 'Berhasil'}
+        with self.assertRaises(HTTPConflict):
+            update_transaction_status(request)
+        with self.assertRaises(HTTPConflict):
+            delete_transaction(self._request(self.ids['old_cancelled']))
@@ -0,0 +1,80 @@
+# wearspace_app/transactions.py
+import uuid
+from datetime import datetime, time, timedelta, timezone
+
+from webob.exc import HTTPBadRequest
+
+from .models import Transaction
+
+TRANSACTION_STATUSES = ('Menunggu Pembayaran', 'Berhasil', 'Dibatalkan')
+
+
+def _parse_uuid(params, key):
+    value = params.get(key)
+    if not value:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise HTTPBadRequest(json={'error': f'Invalid UUID format for {key}.'})
+
+
+def _parse_date(params, key, end=False):
+    """
+    ``YYYY-MM-DD`` atau datetime ISO 8601. Tanggal saja pada ``date_to``
+    berarti sampai akhir hari itu. Nilai tanpa zona waktu dianggap UTC.
+    """
+    value = params.get(key)
+    if not value:
+        return None
+    try:
+        if len(value) == 10:
+            parsed = datetime.combine(datetime.strptime(value, '%Y-%m-%d').date(), time())
+            if end:
+                parsed += timedelta(days=1)
+        else:
+            parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPBadRequest(json={'error': f'Invalid {key}. Use YYYY-MM-DD or ISO 8601.'})
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def apply_transaction_filters(query, params):
+    """
+    Filter ``status``, ``user_id``, ``product_id``, ``date_from`` dan
+    ``date_to`` untuk listing transaksi. ``date_to`` eksklusif untuk
+    datetime, inklusif untuk tanggal saja.
+
+    Filter user/status memakai index (user_id, transaction_date) dan
+    (transaction_status, transaction_date), sehingga urutan
+    transaction_date tetap dibaca dari index.
+    """
+    status = params.get('status')
+    if status:
+        if status not in TRANSACTION_STATUSES:
+            raise HTTPBadRequest(json={
+                'error': f"Invalid status. Must be one of: {', '.join(TRANSACTION_STATUSES)}"
+            })
+        query = query.filter(Transaction.transaction_status == status)
+
+    user_id = _parse_uuid(params, 'user_id')
+    if user_id:
+        query = query.filter(Transaction.user_id == user_id)
+
+    product_id = _parse_uuid(params, 'product_id')
+    if product_id:
+        query = query.filter(Transaction.product_id == product_id)
+
+    date_from = _parse_date(params, 'date_from')
+    if date_from:
+        query = query.filter(Transaction.transaction_date >= date_from)
+
+    date_to = _parse_date(params, 'date_to', end=True)
+    if date_to:
+        query = query.filter(Transaction.transaction_date < date_to)
+
+    if date_from and date_to and date_from >= date_to:
+        raise HTTPBadRequest(json={'error': 'date_from must be before date_to.'})
+    return query
@@ -0,0 +1,151 @@
+# wearspace_app/variants.py
+from sqlalchemy import exists, insert, or_, update
+from webob.exc import HTTPBadRequest
+from zope.sqlalchemy import mark_changed
+
+from .inventory import set_stock
+from .models import ProductVariant
+
+MAX_VARIANTS = 200
+
+
+def variant_rows(product_id, sizes, colors, stock=None):
+    """
+    Baris product_variants untuk setiap kombinasi ``sizes`` x ``colors``.
+    """
+    rows = []
+    seen = set()
+    for size in sizes or ():
+        for color in colors or ():
+            if (size, color) in seen:
+                continue
+            seen.add((size, color))
+            rows.append({'product_id': product_id, 'size': size, 'color': color, 'stock': stock})
+    return rows
+
+
+def insert_variants(dbsession, records):
+    """
+    Varian untuk produk yang di-insert lewat Core (bulk import), dengan
+    satu executemany untuk seluruh batch.
+    """
+    rows = [
+        row for record in records
+        for row in variant_rows(record['id'], record.get('sizes'), record.get('colors'))
+    ]
+    if rows:
+        dbsession.execute(insert(ProductVariant), rows)
+        mark_changed(dbsession)
+
+
+def parse_variants(value):
+    """
+    Validasi ``variants`` dari body produk: list ``{size, color, stock}``.
+    ``stock`` boleh dikosongkan (stok varian tidak dihitung sendiri).
+    Mengembalikan list ``(size, color, stock)``.
+    """
+    if not isinstance(value, list) or not value:
+        raise HTTPBadRequest(json={'error': 'variants must be a non-empty list.'})
+    if len(value) > MAX_VARIANTS:
+        raise HTTPBadRequest(json={'error': f'Too many variants (max {MAX_VARIANTS}).'})
+    variants = []
+    seen = set()
+    for number, item in enumerate(value, start=1):
+        if not isinstance(item, dict):
+            raise HTTPBadRequest(json={'error': f'Variant {number} must be an object.'})
+        size, color, stock = item.get('size'), item.get('color'), item.get('stock')
+        if not size or not color:
+            raise HTTPBadRequest(json={'error': f'Variant {number}: size and color are required.'})
+        if stock is not None and (isinstance(stock, bool) or not isinstance(stock, int) or stock < 0):
+            raise HTTPBadRequest(json={'error': f'Variant {number}: stock must be a non-negative integer.'})
+        if (size, color) in seen:
+            raise HTTPBadRequest(json={'error': f'Variant {number}: duplicate size/color.'})
+        seen.add((size, color))
+        variants.append((size, color, stock))
+    return variants
+
+
+def _unique(values):
+    return list(dict.fromkeys(values))
+
+
+def set_variants(dbsession, product, variants):
+    """
+    Ganti seluruh varian ``product`` dengan hasil ``parse_variants``.
+
+    ``sizes``/``colors`` diisi ulang dari varian. Kalau semua varian punya
+    stok, ``Product.stock`` menjadi jumlahnya, jadi stok produk tetap total
+    dari stok per varian.
+    """
+    existing = {(v.size, v.color): v for v in product.variants}
+    replacement = []
+    for size, color, stock in variants:
+        variant = existing.get((size, color)) or ProductVariant(size=size, color=color)
+        variant.stock = stock
+        replacement.append(variant)
+    # Varian yang tidak ada di list baru dihapus lewat delete-orphan
+    product.variants = replacement
+    product.sizes = _unique(size for size, _, _ in variants)
+    product.colors = _unique(color for _, color, _ in variants)
+    if all(stock is not None for _, _, stock in variants):
+        set_stock(dbsession, product, sum(stock for _, _, stock in variants))
+    dbsession.flush()
+
+
+def reserve_variant(dbsession, product_id, size, color, quantity=1):
+    """
+    Kurangi stok satu varian dengan conditional UPDATE, sama seperti
+    ``reserve_stock``. Varian dengan stok NULL selalu berhasil (stoknya
+    dibatasi ``Product.stock`` saja).
+
+    Mengembalikan True kalau berhasil atau produk tidak punya varian sama
+    sekali, False kalau stok varian kurang, dan None kalau produk punya
+    varian tetapi tidak untuk kombinasi ``size``/``color`` ini.
+    """
+    result = dbsession.execute(
+        update(ProductVariant)
+        .where(
+            ProductVariant.product_id == product_id,
+            ProductVariant.size == size,
+            ProductVariant.color == color,
+            or_(ProductVariant.stock.is_(None), ProductVariant.stock >= quantity),
+        )
+        .values(stock=ProductVariant.stock - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        mark_changed(dbsession)
+        return True
+    found = dbsession.query(
+        exists().where(
+            ProductVariant.product_id == product_id,
+            ProductVariant.size == size,
+            ProductVariant.color == color,
+        )
+    ).scalar()
+    if found:
+        return False
+    has_variants = dbsession.query(
+        exists().where(ProductVariant.product_id == product_id)
+    ).scalar()
+    return None if has_variants else True
+
+
+def reserve_variants(dbsession, lines):
+    """
+    Reservasi stok varian untuk baris checkout ``(product_id, size, color,
+    qty)``; baris dengan varian yang sama dijumlahkan dulu. Mengembalikan
+    ``(unavailable, out_of_stock)``, masing-masing list product_id.
+    """
+    quantities = {}
+    for product_id, size, color, qty in lines:
+        key = (product_id, size, color)
+        quantities[key] = quantities.get(key, 0) + qty
+    unavailable, out_of_stock = [], []
+    for (product_id, size, color), qty in quantities.items():
+        reserved = reserve_variant(dbsession, product_id, size, color, qty)
+        if reserved is None:
+            unavailable.append(product_id)
+        elif not reserved:
+            out_of_stock.append(product_id)
+    return unavailable, out_of_stock
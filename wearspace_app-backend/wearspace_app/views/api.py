@@ -1,16 +1,43 @@
+import csv
 import uuid
 from pyramid.view import view_config
 from pyramid.response import Response
 from webob.exc import HTTPNotFound, HTTPBadRequest, HTTPInternalServerError, HTTPUnauthorized, HTTPConflict
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
 from ..models import (
-    User, Brand, Product, Transaction, Favorite, Inspiration
+    User, Brand, Product, ProductCard, Transaction, Favorite, Inspiration
 )
 from ..models.meta import UUIDColumn # Pastikan ini benar
+from ..pagination import get_page_size, paginate
+from ..archive import get_archived_transaction, is_archived
+from ..brands import count_products_by_brand, parse_top_products, top_products_by_brand
+from ..cards import (
+    CARD_SORT_KEYS, adjust_favorite_count, apply_card_filters, refresh_brand_cards, refresh_cards, remove_card,
+)
+from ..catalog import apply_product_filters, get_product_sort
+from ..checkout import parse_checkout_items, place_order
+from ..export import export_response
+from ..facets import ProductFacets, filter_signature, get_price_buckets
+from ..inventory import configure_stock_shards, fill_sharded_stock, reserve_stock, set_stock
+from ..idempotency import idempotent
+from ..importer import IMPORT_BATCH_SIZE, ProductImporter, detect_format, read_rows
+from ..rankings import (
+    BEST_SELLERS, CANCELLED_STATUS, FAVORITE_WEIGHT, PURCHASE_WEIGHT, TRENDING,
+    ranked_products, record_on_commit, update_product_on_commit,
+)
+from ..recommendations import get_co_purchase_index, refresh_on_commit
+from ..sales import move_sales, product_attributes, record_sales, sales_report
+from ..search import index_product, reindex_brand, remove_product, search_products
+from ..similarity import get_similarity_index, update_similarity_on_commit
+from ..cache import cached_collection, get_catalog_cache, invalidate_on_commit
+from ..conditional import check_collection, check_item
+from ..serializers import load_only_options, parse_fields, serialize
+from ..streaming import stream_query, wants_stream
+from ..transactions import TRANSACTION_STATUSES, apply_transaction_filters
+from ..variants import parse_variants, reserve_variant, set_variants
 from pyramid.security import remember, forget # Hapus authenticated_userid dari sini
-from datetime import datetime
-from decimal import Decimal
 
 # Helper: validasi field kosong
 def require_fields(data, required_fields):
@@ -20,21 +47,13 @@ def require_fields(data, required_fields):
         raise HTTPBadRequest(json={'error': f'Missing fields: {", ".join(missing)}'})
 
 # Helper: Serialisasi objek
-def serialize_object(obj):
+# Memakai serializer yang dikompilasi per model (lihat serializers.py),
+# hashed_password sudah dibuang di sana. relations: mis. ('product', 'user'),
+# fields: hasil parse_fields untuk ?fields=
+def serialize_object(obj, relations=(), fields=None):
     if not obj:
         return None
-    data = {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
-    for key, value in data.items():
-        if isinstance(value, uuid.UUID):
-            data[key] = str(value)
-        elif isinstance(value, datetime):
-            if value:
-                data[key] = value.isoformat()
-        elif isinstance(value, Decimal):
-            data[key] = float(value)
-    if 'hashed_password' in data: # Hapus hashed_password untuk keamanan
-        del data['hashed_password']
-    return data
+    return serialize(obj, relations, fields)
 
 # --- Authentication and User Management ---
 
@@ -113,19 +132,29 @@ def logout_user(request):
 
 @view_config(route_name='users', request_method='GET', renderer='json')
 def get_users(request):
-    users = request.dbsession.query(User).all()
-    return [serialize_object(user) for user in users]
+    fields, _ = parse_fields(request, User)
+    options = load_only_options(User, fields, [User.created_at])
+    if wants_stream(request):
+        # ?stream=1: seluruh user dikirim bertahap tanpa pagination
+        return stream_query(
+            request,
+            lambda session: session.query(User).options(*options).order_by(User.created_at, User.id),
+            lambda u: serialize_object(u, fields=fields)
+        )
+    users, _ = paginate(request, request.dbsession.query(User).options(*options), [User.created_at, User.id])
+    return [serialize_object(user, fields=fields) for user in users]
 
 @view_config(route_name='user_by_id', request_method='GET', renderer='json')
 def get_user(request):
     user_id = request.matchdict['id']
+    fields, _ = parse_fields(request, User)
     try:
-        user = request.dbsession.query(User).get(uuid.UUID(user_id))
+        user = request.dbsession.query(User).options(*load_only_options(User, fields)).get(uuid.UUID(user_id))
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format for user ID.'})
     if not user:
         raise HTTPNotFound(json={'error': 'User not found.'})
-    return serialize_object(user)
+    return serialize_object(user, fields=fields)
 
 @view_config(route_name='user_by_id', request_method='PUT', renderer='json')
 def update_user(request):
@@ -172,8 +201,80 @@ def delete_user(request):
 
 @view_config(route_name='brands', request_method='GET', renderer='json')
 def get_brands(request):
-    brands = request.dbsession.query(Brand).all()
-    return [serialize_object(brand) for brand in brands]
+    fields, _ = parse_fields(request, Brand)
+    top_products = parse_top_products(request.params)
+    if top_products:
+        return get_brand_index(request, fields, top_products)
+    check_collection(request, 'brands')
+
+    def build():
+        query = request.dbsession.query(Brand).options(*load_only_options(Brand, fields, [Brand.created_at]))
+        brands, _ = paginate(request, query, [Brand.created_at, Brand.id])
+        return [serialize_object(brand, fields=fields) for brand in brands]
+    return cached_collection(request, 'brands', build)
+
+# Mode brand-index (?top_products=N): setiap brand beserta jumlah produk dan
+# N produk teratas (urutan ?products_sort=, default terbaru). Selalu tiga
+# query: halaman brand, COUNT .. GROUP BY, dan row_number() per brand.
+def get_brand_index(request, fields, top_products):
+    # Isinya berubah kalau brand atau produk berubah
+    check_collection(request, 'brands', 'products')
+    sort_column, descending = get_product_sort({'sort': request.params.get('products_sort') or '-created_at'})
+
+    def build():
+        query = request.dbsession.query(Brand).options(*load_only_options(Brand, fields, [Brand.created_at]))
+        brands, _ = paginate(request, query, [Brand.created_at, Brand.id])
+        brand_ids = [brand.id for brand in brands]
+        counts = count_products_by_brand(request.dbsession, brand_ids)
+        top = top_products_by_brand(request.dbsession, brand_ids, top_products, sort_column, descending)
+        products = [product for items in top.values() for product in items]
+        rows = fill_sharded_stock(request.dbsession, products, [serialize_object(p) for p in products])
+        by_id = {product.id: row for product, row in zip(products, rows)}
+
+        result = []
+        for brand in brands:
+            data = serialize_object(brand, fields=fields)
+            data['product_count'] = counts.get(brand.id, 0)
+            data['products'] = [by_id[product.id] for product in top.get(brand.id, [])]
+            result.append(data)
+        return result
+    # Disimpan di namespace 'products'; generasi 'brands' masuk kunci supaya
+    # brand baru tidak membaca entri lama
+    generation = get_catalog_cache(request).generation('brands')
+    return cached_collection(
+        request, 'products', build,
+        key=('brand_index', generation) + tuple(sorted(request.params.items()))
+    )
+
+@view_config(route_name='brand_products', request_method='GET', renderer='json')
+def get_brand_products(request):
+    try:
+        brand_uuid = uuid.UUID(request.matchdict['id'])
+    except ValueError:
+        raise HTTPBadRequest(json={'error': 'Invalid UUID format for brand ID.'})
+    fields, relations = parse_fields(request, Product, ('brand',))
+    check_collection(request, 'products')
+
+    def build():
+        if not request.dbsession.query(Brand.id).filter(Brand.id == brand_uuid).first():
+            raise HTTPNotFound(json={'error': 'Brand not found.'})
+        dialect_name = request.dbsession.get_bind().dialect.name
+        sort_column, descending = get_product_sort(request.params)
+        options = load_only_options(Product, fields, [sort_column])
+        if 'brand' in relations:
+            # Brand yang sama untuk semua baris, dimuat lewat JOIN di query yang sama
+            options.append(joinedload(Product.brand))
+        query = request.dbsession.query(Product).options(*options).filter(Product.brand_id == brand_uuid)
+        params = {key: value for key, value in request.params.items() if key != 'brand_id'}
+        query = apply_product_filters(query, params, dialect_name)
+        products, _ = paginate(request, query, [sort_column, Product.id], descending=descending)
+        return fill_sharded_stock(
+            request.dbsession, products, [serialize_object(p, relations, fields) for p in products]
+        )
+    return cached_collection(
+        request, 'products', build,
+        key=('brand_products', str(brand_uuid)) + tuple(sorted(request.params.items()))
+    )
 
 @view_config(route_name='brands', request_method='POST', renderer='json')
 def create_brand(request):
@@ -187,6 +288,7 @@ def create_brand(request):
         brand = Brand(name=data['name'])
         request.dbsession.add(brand)
         request.dbsession.flush()
+        invalidate_on_commit(request, 'brands')
         return Response(json=serialize_object(brand), status=201)
     except IntegrityError:
         request.dbsession.rollback()
@@ -195,6 +297,19 @@ def create_brand(request):
         request.dbsession.rollback()
         raise HTTPInternalServerError(f'Failed to create brand: {e}')
 
+@view_config(route_name='brand_by_id', request_method='GET', renderer='json')
+def get_brand(request):
+    try:
+        brand_uuid = uuid.UUID(request.matchdict['id'])
+    except ValueError:
+        raise HTTPBadRequest(json={'error': 'Invalid UUID format for brand ID.'})
+    fields, _ = parse_fields(request, Brand)
+    check_item(request, Brand, brand_uuid, 'Brand not found.')
+    brand = request.dbsession.query(Brand).options(*load_only_options(Brand, fields)).get(brand_uuid)
+    if not brand:
+        raise HTTPNotFound(json={'error': 'Brand not found.'})
+    return serialize_object(brand, fields=fields)
+
 @view_config(route_name='brand_by_id', request_method='PUT', renderer='json')
 def update_brand(request):
     brand_id = request.matchdict['id']
@@ -210,6 +325,11 @@ def update_brand(request):
         if 'name' in data:
             brand.name = data['name']
         request.dbsession.flush()
+        if 'name' in data:
+            reindex_brand(request.dbsession, brand.id)
+            refresh_brand_cards(request.dbsession, brand.id)
+        # Nama brand juga tampil di facet produk
+        invalidate_on_commit(request, 'brands', 'products')
         return serialize_object(brand)
     except IntegrityError:
         request.dbsession.rollback()
@@ -229,19 +349,82 @@ def delete_brand(request):
         raise HTTPNotFound(json={'error': 'Brand not found.'})
 
     request.dbsession.delete(brand)
+    invalidate_on_commit(request, 'brands', 'products')
     return Response(json={'message': 'Brand deleted successfully'}, status=200)
 
 # --- Product Management ---
 
 @view_config(route_name='products', request_method='GET', renderer='json')
 def get_products(request):
-    products = request.dbsession.query(Product).all()
-    return [serialize_object(p) for p in products]
+    fields, _ = parse_fields(request, Product)
+    check_collection(request, 'products')
+
+    # Filter dan sort dikerjakan di SQL, browser hanya menerima satu halaman
+    def build():
+        dialect_name = request.dbsession.get_bind().dialect.name
+        sort_column, descending = get_product_sort(request.params)
+        query = request.dbsession.query(Product).options(*load_only_options(Product, fields, [sort_column]))
+        query = apply_product_filters(query, request.params, dialect_name)
+        products, _ = paginate(request, query, [sort_column, Product.id], descending=descending)
+        return fill_sharded_stock(
+            request.dbsession, products, [serialize_object(p, fields=fields) for p in products]
+        )
+    return cached_collection(request, 'products', build)
+
+@view_config(route_name='product_cards', request_method='GET', renderer='json')
+def get_product_cards(request):
+    # Dibaca dari read model product_cards: tanpa join Brand/Favorite,
+    # urutan ?sort= langsung mengikuti satu index
+    fields, _ = parse_fields(request, ProductCard)
+    sort_column, descending = get_product_sort(request.params, CARD_SORT_KEYS)
+    query = request.dbsession.query(ProductCard).options(*load_only_options(ProductCard, fields, [sort_column]))
+    query = apply_card_filters(query, request.params)
+    cards, _ = paginate(request, query, [sort_column, ProductCard.id], descending=descending)
+    return [serialize_object(card, fields=fields) for card in cards]
+
+def _ranked_cards(request, kind, value_key):
+    # Urutan dari engine ranking in-process (rankings.py), kartunya diambil
+    # dengan satu query ke product_cards
+    ranked = ranked_products(request, kind, get_page_size(request))
+    cards = {
+        card.id: card for card in
+        request.dbsession.query(ProductCard).filter(ProductCard.id.in_([pid for pid, _ in ranked]))
+    }
+    return [
+        dict(serialize_object(cards[pid]), **{value_key: round(value, 4)})
+        for pid, value in ranked if pid in cards
+    ]
+
+@view_config(route_name='product_trending', request_method='GET', renderer='json')
+def get_trending_products(request):
+    # ?category= membatasi ke satu category; score = skor trending saat ini
+    return _ranked_cards(request, TRENDING, 'score')
+
+@view_config(route_name='product_best_sellers', request_method='GET', renderer='json')
+def get_best_sellers(request):
+    # sales = jumlah unit terjual dari transaksi yang tidak dibatalkan
+    return _ranked_cards(request, BEST_SELLERS, 'sales')
+
+@view_config(route_name='product_facets', request_method='GET', renderer='json')
+def get_product_facets(request):
+    check_collection(request, 'products')
+    price_buckets = get_price_buckets(request.registry.settings)
+    # Namespace 'products' ikut diinvalidasi oleh setiap write produk/stok
+    return cached_collection(
+        request, 'products',
+        lambda: ProductFacets(request.dbsession, request.params, price_buckets).compute(),
+        key=('facets',) + filter_signature(request.params)
+    )
 
 @view_config(route_name='products', request_method='POST', renderer='json')
 def create_product(request):
     data = request.json_body
     required_fields = ['name', 'brand_id', 'price', 'stock', 'sizes', 'colors']
+    variants = None
+    if 'variants' in data:
+        # Stok per size/color: sizes, colors dan stock diturunkan dari varian
+        variants = parse_variants(data['variants'])
+        required_fields = ['name', 'brand_id', 'price']
     
     try:
         require_fields(data, required_fields)
@@ -258,9 +441,9 @@ def create_product(request):
             name=data['name'],
             brand_id=brand_id_uuid,
             price=data['price'],
-            stock=data['stock'],
-            sizes=data['sizes'],
-            colors=data['colors'],
+            stock=data.get('stock', 0),
+            sizes=data.get('sizes', []),
+            colors=data.get('colors', []),
             description=data.get('description'),
             image_url=data.get('image_url'),
             material=data.get('material'),
@@ -268,23 +451,110 @@ def create_product(request):
         )
         request.dbsession.add(product)
         request.dbsession.flush()
-        return Response(json=serialize_object(product), status=201)
+        # Tanpa variants, varian dibuat dari sizes x colors saat flush
+        if variants is not None:
+            set_variants(request.dbsession, product, variants)
+        index_product(request.dbsession, product.id)
+        refresh_cards(request.dbsession, [product.id])
+        update_similarity_on_commit(request, [product])
+        invalidate_on_commit(request, 'products')
+        return Response(json=serialize_object(product, ('variants',)), status=201)
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format for brand ID.'})
+    except HTTPBadRequest as e:
+        raise e
     except Exception as e:
         request.dbsession.rollback()
         raise HTTPInternalServerError(f'Failed to create product: {e}')
 
+@view_config(route_name='product_import', request_method='POST', renderer='json')
+def import_products(request):
+    # Body CSV/NDJSON dibaca bertahap dan di-insert per batch (lihat importer.py)
+    fmt = detect_format(request)
+    settings = request.registry.settings or {}
+    batch_size = int(settings.get('api.import.batch_size', IMPORT_BATCH_SIZE))
+    importer = ProductImporter(request.dbsession, batch_size)
+    try:
+        summary = importer.run(read_rows(request.body_file, fmt))
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise HTTPBadRequest(json={'error': f'Malformed import file: {e}'})
+    if summary['inserted']:
+        invalidate_on_commit(request, 'products')
+        update_similarity_on_commit(request, rebuild=True)
+    return summary
+
+@view_config(route_name='product_search', request_method='GET', renderer='json')
+def search_product(request):
+    q = (request.params.get('q') or '').strip()
+    if not q:
+        raise HTTPBadRequest(json={'error': 'Missing search query parameter q.'})
+    fields, _ = parse_fields(request, Product)
+    products = search_products(
+        request.dbsession, q, get_page_size(request), load_only_options(Product, fields)
+    )
+    return fill_sharded_stock(request.dbsession, products, [serialize_object(p, fields=fields) for p in products])
+
 @view_config(route_name='product_by_id', request_method='GET', renderer='json')
 def get_product(request):
     product_id = request.matchdict['id']
     try:
-        product = request.dbsession.query(Product).get(uuid.UUID(product_id))
+        product_uuid = uuid.UUID(product_id)
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format for product ID.'})
+    fields, relations = parse_fields(request, Product, ('variants',))
+    check_item(request, Product, product_uuid, 'Product not found.')
+    options = load_only_options(Product, fields)
+    options += [selectinload(getattr(Product, name)) for name in relations]
+    product = request.dbsession.query(Product).options(*options).get(product_uuid)
     if not product:
         raise HTTPNotFound(json={'error': 'Product not found.'})
-    return serialize_object(product)
+    # Produk sharded: stok dibaca sebagai jumlah semua shard
+    return fill_sharded_stock(request.dbsession, [product], [serialize_object(product, relations, fields)])[0]
+
+@view_config(route_name='product_also_bought', request_method='GET', renderer='json')
+def get_also_bought(request):
+    try:
+        product_uuid = uuid.UUID(request.matchdict['id'])
+    except ValueError:
+        raise HTTPBadRequest(json={'error': 'Invalid UUID format for product ID.'})
+    # Top-K dibaca dari matriks co-purchase di memory (recommendations.py),
+    # lalu kartunya diambil dengan satu query ke product_cards
+    ranked = get_co_purchase_index(request).also_bought(
+        request.dbsession, product_uuid, get_page_size(request)
+    )
+    if not ranked:
+        if not request.dbsession.query(Product.id).filter(Product.id == product_uuid).first():
+            raise HTTPNotFound(json={'error': 'Product not found.'})
+        return []
+    cards = {
+        card.id: card for card in
+        request.dbsession.query(ProductCard).filter(ProductCard.id.in_([pid for pid, _ in ranked]))
+    }
+    return [
+        dict(serialize_object(cards[pid]), co_purchases=count)
+        for pid, count in ranked if pid in cards
+    ]
+
+@view_config(route_name='product_similar', request_method='GET', renderer='json')
+def get_similar_products(request):
+    try:
+        product_uuid = uuid.UUID(request.matchdict['id'])
+    except ValueError:
+        raise HTTPBadRequest(json={'error': 'Invalid UUID format for product ID.'})
+    # Top-K cosine similarity atribut dari indeks in-process (similarity.py)
+    ranked = get_similarity_index(request).similar(
+        request.dbsession, product_uuid, get_page_size(request)
+    )
+    if ranked is None:
+        raise HTTPNotFound(json={'error': 'Product not found.'})
+    cards = {
+        card.id: card for card in
+        request.dbsession.query(ProductCard).filter(ProductCard.id.in_([pid for pid, _ in ranked]))
+    }
+    return [
+        dict(serialize_object(cards[pid]), similarity=round(score, 4))
+        for pid, score in ranked if pid in cards
+    ]
 
 @view_config(route_name='product_by_id', request_method='PUT', renderer='json')
 def update_product(request):
@@ -306,13 +576,31 @@ def update_product(request):
             product.brand_id = brand_id_uuid
 
         for key, value in data.items():
-            if key not in ['brand_id'] and hasattr(product, key):
+            if key not in ['brand_id', 'stock', 'stock_shards', 'variants'] and hasattr(product, key):
                 setattr(product, key, value)
 
+        # stock_shards mengaktifkan/mematikan mode sharded (lihat inventory.py)
+        if 'stock_shards' in data:
+            configure_stock_shards(request.dbsession, product, data['stock_shards'], data.get('stock'))
+        elif 'stock' in data:
+            set_stock(request.dbsession, product, data['stock'])
+
+        # variants menimpa sizes/colors (dan stock kalau semua varian punya stok)
+        if 'variants' in data:
+            set_variants(request.dbsession, product, parse_variants(data['variants']))
+
         request.dbsession.flush()
-        return serialize_object(product)
+        index_product(request.dbsession, product.id)
+        refresh_cards(request.dbsession, [product.id])
+        if 'category' in data:
+            update_product_on_commit(request, product.id, product.category)
+        update_similarity_on_commit(request, [product])
+        invalidate_on_commit(request, 'products')
+        return fill_sharded_stock(request.dbsession, [product], [serialize_object(product, ('variants',))])[0]
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format provided.'})
+    except HTTPBadRequest as e:
+        raise e
     except Exception as e:
         request.dbsession.rollback()
         raise HTTPInternalServerError(f'Failed to update product: {e}')
@@ -327,25 +615,49 @@ def delete_product(request):
     if not product:
         raise HTTPNotFound(json={'error': 'Product not found.'})
 
+    remove_product(request.dbsession, product.id)
+    remove_card(request.dbsession, product.id)
+    update_product_on_commit(request, product.id, deleted=True)
+    update_similarity_on_commit(request, deleted=[product.id])
     request.dbsession.delete(product)
+    invalidate_on_commit(request, 'products')
     return Response(json={'message': 'Product deleted successfully'}, status=200)
 
 # --- Transaction Management ---
 @view_config(route_name='transactions', request_method='GET', renderer='json')
 def get_transactions(request):
-    transactions = request.dbsession.query(Transaction).all()
-    serialized_transactions = []
-    for t in transactions:
-        t_data = serialize_object(t)
-        if t.product:
-            t_data['product'] = serialize_object(t.product)
-        if t.user:
-            t_data['user'] = serialize_object(t.user)
-        serialized_transactions.append(t_data)
-    return serialized_transactions
+    fields, relations = parse_fields(request, Transaction, ('product', 'user'))
+    # Transaction tidak punya created_at, urutan memakai transaction_date
+    options = load_only_options(Transaction, fields, [Transaction.transaction_date])
+    # ?fields=product,user dimuat dengan JOIN di query yang sama, jadi satu
+    # halaman tetap satu SELECT berapa pun jumlah transaksinya
+    options += [joinedload(getattr(Transaction, name)) for name in relations]
+    # Validasi filter sebelum stream dimulai supaya error tetap 400
+    apply_transaction_filters(request.dbsession.query(Transaction), request.params)
+    if wants_stream(request):
+        # ?stream=1: seluruh transaksi dikirim bertahap tanpa pagination
+        return stream_query(
+            request,
+            lambda session: (
+                apply_transaction_filters(session.query(Transaction), request.params)
+                .options(*options)
+                .order_by(Transaction.transaction_date, Transaction.id)
+            ),
+            lambda t: serialize_object(t, relations, fields)
+        )
+    transactions, _ = paginate(
+        request,
+        apply_transaction_filters(request.dbsession.query(Transaction), request.params).options(*options),
+        [Transaction.transaction_date, Transaction.id]
+    )
+    return [serialize_object(t, relations, fields) for t in transactions]
 
 @view_config(route_name='transactions', request_method='POST', renderer='json')
 def create_transaction(request):
+    # Retry dengan Idempotency-Key yang sama mendapat response pertama lagi
+    return idempotent(request, 'transactions', lambda: _create_transaction(request))
+
+def _create_transaction(request):
     data = request.json_body
     required_fields = ['product_id', 'customer_name', 'shipping_address',
                        'payment_method', 'purchased_size', 'purchased_color']
@@ -357,14 +669,22 @@ def create_transaction(request):
 
     try:
         product_id_uuid = uuid.UUID(data['product_id'])
-        product = request.dbsession.query(Product).get(product_id_uuid)
-        if not product:
-            raise HTTPBadRequest(json={'error': 'Product not found.'})
-
-        if product.stock <= 0:
+        # Cek stok dan pengurangan dalam satu UPDATE supaya tidak oversell
+        if reserve_stock(request.dbsession, product_id_uuid) is None:
+            exists = request.dbsession.query(Product.id).filter(Product.id == product_id_uuid).first()
+            if not exists:
+                raise HTTPBadRequest(json={'error': 'Product not found.'})
             raise HTTPBadRequest(json={'error': 'Product out of stock.'})
+        # Stok size/color yang dibeli dikurangi di transaksi yang sama
+        reserved = reserve_variant(
+            request.dbsession, product_id_uuid, data['purchased_size'], data['purchased_color']
+        )
+        if reserved is None:
+            raise HTTPBadRequest(json={'error': 'Variant not available.'})
+        if not reserved:
+            raise HTTPBadRequest(json={'error': 'Variant out of stock.'})
 
-        product.stock -= 1
+        products = product_attributes(request.dbsession, [product_id_uuid])
 
         user_id = None
         # Gunakan request.authenticated_userid untuk mendapatkan ID pengguna yang sedang login
@@ -379,34 +699,69 @@ def create_transaction(request):
             payment_method=data['payment_method'],
             purchased_size=data['purchased_size'],
             purchased_color=data['purchased_color'],
+            unit_price=products[product_id_uuid][2],
             transaction_status='Menunggu Pembayaran'
         )
         request.dbsession.add(transaction)
         request.dbsession.flush()
+        record_sales(request.dbsession, [transaction], products=products)
+        # Stok produk berubah, list produk di cache ikut basi
+        invalidate_on_commit(request, 'products')
+        record_on_commit(request, [(product_id_uuid, PURCHASE_WEIGHT, 1)])
 
         return Response(json=serialize_object(transaction), status=201)
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format.'})
+    except HTTPBadRequest as e:
+        raise e
     except Exception as e:
         request.dbsession.rollback()
         raise HTTPInternalServerError(f'Failed to create transaction: {e}')
 
+@view_config(route_name='checkout', request_method='POST', renderer='json')
+def checkout_cart(request):
+    return idempotent(request, 'checkout', lambda: _checkout_cart(request))
+
+def _checkout_cart(request):
+    data = request.json_body
+    require_fields(data, ['customer_name', 'shipping_address', 'payment_method', 'items'])
+    lines = parse_checkout_items(data['items'])
+
+    user_id = None
+    if request.authenticated_userid:
+        try:
+            user_id = uuid.UUID(request.authenticated_userid)
+        except ValueError:
+            raise HTTPBadRequest(json={'error': 'Invalid UUID format for user ID in session.'})
+
+    # Stok semua baris dan semua Transaction ditulis dalam satu transaksi
+    transactions = place_order(request.dbsession, data, lines, user_id)
+    invalidate_on_commit(request, 'products')
+    record_on_commit(request, [
+        (product_id, PURCHASE_WEIGHT * qty, qty) for product_id, _, _, qty in lines
+    ])
+    return Response(json={'transactions': [serialize_object(t) for t in transactions]}, status=201)
+
 @view_config(route_name='transaction_by_id', request_method='GET', renderer='json')
 def get_transaction(request):
     transaction_id = request.matchdict['id']
+    fields, relations = parse_fields(request, Transaction, ('product', 'user'))
+    options = load_only_options(Transaction, fields)
+    options += [joinedload(getattr(Transaction, name)) for name in relations]
     try:
-        transaction = request.dbsession.query(Transaction).get(uuid.UUID(transaction_id))
+        transaction_uuid = uuid.UUID(transaction_id)
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format for transaction ID.'})
+    transaction = request.dbsession.query(Transaction).options(*options).get(transaction_uuid)
     if not transaction:
-        raise HTTPNotFound(json={'error': 'Transaction not found.'})
+        # Transaksi lama yang sudah selesai dibaca dari transactions_archive
+        archived = get_archived_transaction(request.dbsession, transaction_uuid, relations, fields)
+        if archived is None:
+            raise HTTPNotFound(json={'error': 'Transaction not found.'})
+        request.response.headers['X-Transaction-Archived'] = 'true'
+        return archived
 
-    t_data = serialize_object(transaction)
-    if transaction.product:
-        t_data['product'] = serialize_object(transaction.product)
-    if transaction.user:
-        t_data['user'] = serialize_object(transaction.user)
-    return t_data
+    return serialize_object(transaction, relations, fields)
 
 @view_config(route_name='transaction_by_id', request_method='PUT', renderer='json')
 def update_transaction_status(request):
@@ -420,15 +775,24 @@ def update_transaction_status(request):
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format for transaction ID.'})
     if not transaction:
+        if is_archived(request.dbsession, uuid.UUID(transaction_id)):
+            raise HTTPConflict(json={'error': 'Archived transactions cannot be modified.'})
         raise HTTPNotFound(json={'error': 'Transaction not found.'})
 
-    valid_statuses = ['Menunggu Pembayaran', 'Berhasil', 'Dibatalkan']
-    if data['transaction_status'] not in valid_statuses:
-        raise HTTPBadRequest(json={'error': f"Invalid status. Must be one of: {', '.join(valid_statuses)}"})
+    if data['transaction_status'] not in TRANSACTION_STATUSES:
+        raise HTTPBadRequest(json={'error': f"Invalid status. Must be one of: {', '.join(TRANSACTION_STATUSES)}"})
 
     try:
+        old_status = transaction.transaction_status
+        cancelled = old_status == CANCELLED_STATUS
         transaction.transaction_status = data['transaction_status']
         request.dbsession.flush()
+        move_sales(request.dbsession, transaction, old_status)
+        refresh_on_commit(request)
+        # Best sellers hanya menghitung transaksi yang tidak dibatalkan
+        if cancelled != (transaction.transaction_status == CANCELLED_STATUS):
+            quantity = transaction.quantity or 1
+            record_on_commit(request, [(transaction.product_id, 0, quantity if cancelled else -quantity)])
         return serialize_object(transaction)
     except Exception as e:
         request.dbsession.rollback()
@@ -442,9 +806,15 @@ def delete_transaction(request):
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format for transaction ID.'})
     if not transaction:
+        if is_archived(request.dbsession, uuid.UUID(transaction_id)):
+            raise HTTPConflict(json={'error': 'Archived transactions cannot be modified.'})
         raise HTTPNotFound(json={'error': 'Transaction not found.'})
 
+    record_sales(request.dbsession, [transaction], sign=-1)
     request.dbsession.delete(transaction)
+    refresh_on_commit(request, [transaction.id])
+    if transaction.transaction_status != CANCELLED_STATUS:
+        record_on_commit(request, [(transaction.product_id, 0, -(transaction.quantity or 1))])
     # Perubahan di sini: Ubah status menjadi 200 OK
     return Response(json={'message': 'Transaction deleted successfully'}, status=200) # Ganti 200 jadi 200
 
@@ -462,12 +832,16 @@ def get_favorites(request):
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format for user ID in session.'})
 
-    favorites = request.dbsession.query(Favorite).filter(Favorite.user_id == user_uuid).all()
-    favorite_products = []
-    for fav in favorites:
-        if fav.product:
-            favorite_products.append(serialize_object(fav.product))
-    return favorite_products
+    # Satu query JOIN, bukan satu query produk per favorit
+    fields, _ = parse_fields(request, Product)
+    products = (
+        request.dbsession.query(Product)
+        .join(Favorite, Favorite.product_id == Product.id)
+        .filter(Favorite.user_id == user_uuid)
+        .options(*load_only_options(Product, fields))
+        .all()
+    )
+    return fill_sharded_stock(request.dbsession, products, [serialize_object(p, fields=fields) for p in products])
 
 @view_config(route_name='favorites', request_method='POST', renderer='json')
 def add_favorite(request):
@@ -500,6 +874,9 @@ def add_favorite(request):
         favorite = Favorite(user_id=user_uuid, product_id=product_uuid)
         request.dbsession.add(favorite)
         request.dbsession.flush()
+        adjust_favorite_count(request.dbsession, product_uuid, 1)
+        # Waktu event = created_at, supaya remove_favorite bisa membatalkannya persis
+        record_on_commit(request, [(product_uuid, FAVORITE_WEIGHT, 0, favorite.created_at)])
         return Response(json={'message': 'Product added to favorites'}, status=201)
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format.'})
@@ -534,18 +911,24 @@ def remove_favorite(request):
         raise HTTPNotFound(json={'error': 'Favorite not found.'})
 
     request.dbsession.delete(favorite)
+    adjust_favorite_count(request.dbsession, product_uuid, -1)
+    record_on_commit(request, [(product_uuid, -FAVORITE_WEIGHT, 0, favorite.created_at)])
     return Response(json={'message': 'Product removed from favorites'}, status=200)
 
 # --- Inspiration Management ---
 
 @view_config(route_name='inspirations', request_method='GET', renderer='json')
 def get_inspirations(request):
+    fields, _ = parse_fields(request, Inspiration)
+    check_collection(request, 'inspirations')
     tag = request.params.get('tag')
-    query = request.dbsession.query(Inspiration)
+    query = request.dbsession.query(Inspiration).options(
+        *load_only_options(Inspiration, fields, [Inspiration.created_at])
+    )
     if tag:
         query = query.filter(Inspiration.tag.ilike(f'%{tag}%'))
-    inspirations = query.all()
-    return [serialize_object(inspo) for inspo in inspirations]
+    inspirations, _ = paginate(request, query, [Inspiration.created_at, Inspiration.id])
+    return [serialize_object(inspo, fields=fields) for inspo in inspirations]
 
 @view_config(route_name='inspirations', request_method='POST', renderer='json')
 def create_inspiration(request):
@@ -566,6 +949,7 @@ def create_inspiration(request):
         )
         request.dbsession.add(inspiration)
         request.dbsession.flush()
+        invalidate_on_commit(request, 'inspirations')
         return Response(json=serialize_object(inspiration), status=201)
     except Exception as e:
         request.dbsession.rollback()
@@ -575,12 +959,18 @@ def create_inspiration(request):
 def get_inspiration(request):
     inspiration_id = request.matchdict['id']
     try:
-        inspiration = request.dbsession.query(Inspiration).get(uuid.UUID(inspiration_id))
+        inspiration_uuid = uuid.UUID(inspiration_id)
     except ValueError:
         raise HTTPBadRequest(json={'error': 'Invalid UUID format for inspiration ID.'})
+    fields, _ = parse_fields(request, Inspiration)
+    check_item(request, Inspiration, inspiration_uuid, 'Inspiration not found.')
+    inspiration = (
+        request.dbsession.query(Inspiration)
+        .options(*load_only_options(Inspiration, fields)).get(inspiration_uuid)
+    )
     if not inspiration:
         raise HTTPNotFound(json={'error': 'Inspiration not found.'})
-    return serialize_object(inspiration)
+    return serialize_object(inspiration, fields=fields)
 
 @view_config(route_name='inspiration_by_id', request_method='PUT', renderer='json')
 def update_inspiration(request):
@@ -598,6 +988,7 @@ def update_inspiration(request):
             if hasattr(inspiration, key):
                 setattr(inspiration, key, value)
         request.dbsession.flush()
+        invalidate_on_commit(request, 'inspirations')
         return serialize_object(inspiration)
     except Exception as e:
         request.dbsession.rollback()
@@ -614,4 +1005,25 @@ def delete_inspiration(request):
         raise HTTPNotFound(json={'error': 'Inspiration not found.'})
 
     request.dbsession.delete(inspiration)
-    return Response(json={'message': 'Inspiration deleted successfully'}, status=200)
\ No newline at end of file
+    invalidate_on_commit(request, 'inspirations')
+    return Response(json={'message': 'Inspiration deleted successfully'}, status=200)
+
+# --- Export ---
+
+@view_config(route_name='export', request_method='GET')
+def export_entity(request):
+    # Dump products/transactions sebagai NDJSON atau CSV (lihat export.py)
+    return export_response(request, request.matchdict['entity'], request.matchdict['format'])
+
+# --- Analytics ---
+
+@view_config(route_name='analytics_sales', request_method='GET', renderer='json')
+def get_sales_analytics(request):
+    # Dibaca dari rollup sales_daily, bukan dari tabel transactions
+    return sales_report(request.dbsession, request.params)
+
+# --- Cache Stats ---
+
+@view_config(route_name='cache_stats', request_method='GET', renderer='json')
+def get_cache_stats(request):
+    return get_catalog_cache(request).stats()
\ No newline at end of file